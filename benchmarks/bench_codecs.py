@@ -0,0 +1,67 @@
+"""
+Benchmark memory codecs on real TripCraft AI tool outputs
+
+Compares encoded size, encode time and decode time for every available
+codec/compression pair on the payloads the tools save to memory.
+
+Usage:
+    python benchmarks/bench_codecs.py [--repeat 2000]
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+# Keep tool logging out of the measurements
+logging.disable(logging.INFO)
+
+from main import MockToolContext
+from tools import (
+    search_flights_ultimate,
+    find_hotels_ultimate,
+    save_user_preferences_ultimate,
+    aggregate_travel_results_ultimate
+)
+from utils import load_memory
+from utils.codecs import CODECS, COMPRESSORS, encode, decode
+
+def collect_payloads():
+    """Run the tools once and return the payloads they store in memory"""
+    context = MockToolContext("bench_user", "bench_session")
+    flights = search_flights_ultimate("Tokyo", "2024-02-01", "2024-02-06", context)
+    hotels = find_hotels_ultimate("Tokyo", "2024-02-01", "2024-02-06", 200.0, 2, context)
+    save_user_preferences_ultimate(context.user_id, context)
+    preferences = load_memory("travel_preferences", context.user_id)
+    aggregated = aggregate_travel_results_ultimate(flights, hotels, preferences, context)
+    return {
+        "flight_search": flights,
+        "hotel_search": hotels,
+        "travel_preferences": preferences,
+        "aggregated_results": aggregated
+    }
+
+def time_per_call(func, repeat: int) -> float:
+    """Mean microseconds per call"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+def run(repeat: int):
+    payloads = collect_payloads()
+    print(f"{'payload':<20} {'codec':<8} {'compress':<8} {'bytes':>7} {'enc us':>8} {'dec us':>8}")
+    for name, data in payloads.items():
+        for codec in CODECS:
+            for compression in COMPRESSORS:
+                encoded = encode(data, codec, compression, threshold=0)
+                enc = time_per_call(lambda: encode(data, codec, compression, threshold=0), repeat)
+                dec = time_per_call(lambda: decode(encoded), repeat)
+                print(f"{name:<20} {codec:<8} {str(compression):<8} {len(encoded):>7} {enc:>8.1f} {dec:>8.1f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=2000, help="calls per measurement")
+    args = parser.parse_args()
+    run(args.repeat)
@@ -0,0 +1,163 @@
+"""
+Benchmark the travel request parser against the original
+
+The reference is the original parser, which rebuilds its patterns and
+keyword tables on every call and checks them one by one. Both run over
+the same generated requests; the requests they parse differently are
+listed before timing (the current parser resolves multi-word cities
+through the gazetteer and leaves counts of days or people out of the
+budget, so some differences are expected).
+
+--places pads the bundled gazetteer with synthetic places, to check that
+resolving destinations costs the same against a GeoNames-sized gazetteer
+(cities15000 has about 26k places) as against the seed.
+
+Usage:
+    python benchmarks/bench_parser.py [--requests 2000] [--repeat 20] [--places 30000]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from config import TRAVEL_DEFAULTS
+from utils.gazetteer import SEED_PATH, Gazetteer, build_gazetteer, get_gazetteer, set_gazetteer
+from utils.parser import _MATCHER, parse_travel_request
+
+def reference_parse(user_input: str) -> dict:
+    """The original parser (patterns rebuilt and scanned one by one)"""
+    user_lower = user_input.lower()
+    patterns = [
+        r'to\s+([A-Za-z]+)',
+        r'visit\s+([A-Za-z]+)',
+        r'travel\s+to\s+([A-Za-z]+)',
+        r'going\s+to\s+([A-Za-z]+)',
+        r'trip\s+to\s+([A-Za-z]+)'
+    ]
+    destination = TRAVEL_DEFAULTS["default_destination"]
+    for pattern in patterns:
+        match = re.search(pattern, user_input, re.IGNORECASE)
+        if match:
+            destination = match.group(1).title()
+            break
+    budget_match = re.findall(r'\$?(\d+)', user_input)
+    budget = int(budget_match[-1]) if budget_match else TRAVEL_DEFAULTS["default_budget"]
+    dur = re.search(r'(\d+)\s*days?', user_input)
+    duration = int(dur.group(1)) if dur else TRAVEL_DEFAULTS["default_duration"]
+    if any(word in user_lower for word in ['budget', 'cheap', 'affordable', 'low-cost']):
+        style = 'budget'
+    elif any(word in user_lower for word in ['luxury', 'premium', 'high-end', 'expensive']):
+        style = 'luxury'
+    else:
+        style = TRAVEL_DEFAULTS["default_style"]
+    interest_keywords = {
+        'culture': ['culture', 'history', 'museum', 'art', 'heritage', 'traditional'],
+        'food': ['food', 'cuisine', 'restaurant', 'dining', 'culinary', 'local food'],
+        'shopping': ['shopping', 'market', 'shop', 'boutique', 'mall', 'souvenirs'],
+        'adventure': ['adventure', 'hiking', 'outdoor', 'sports', 'activities', 'nature'],
+        'nightlife': ['nightlife', 'bars', 'clubs', 'entertainment', 'party'],
+        'relaxation': ['relax', 'spa', 'beach', 'peaceful', 'quiet', 'wellness']
+    }
+    interests = [category for category, keywords in interest_keywords.items()
+                 if any(keyword in user_lower for keyword in keywords)]
+    return {
+        'destination': destination,
+        'budget': budget,
+        'duration': duration,
+        'style': style,
+        'interests': interests or TRAVEL_DEFAULTS["default_interests"],
+        'original_request': user_input
+    }
+
+OPENERS = ["Budget travel to", "Luxury trip to", "I want to visit", "Planning a trip to", "Going to",
+           "Family vacation to", "Cheap flights to", "Premium getaway to"]
+CITIES = ["Tokyo", "Paris", "London", "Bangkok", "Singapore", "Sydney", "Dubai", "Mumbai", "Rome", "Lisbon",
+          "New York", "Rio de Janeiro", "Ho Chi Minh City", "Kuala Lumpur"]
+EXTRAS = ["for {n} days", "with ${b} budget", "under {b}", "we love food and shopping", "from March {n}",
+          "museums and history please", "some nightlife and bars", "hiking in nature", "a quiet spa break",
+          "with kids", "for a week of relaxation at the beach"]
+
+# Keywords overlapping other keywords ("spa" and "art" in "sparta")
+KEYWORD_CASES = ["Trip to Sparta", "A spartan hostel in Rome", "Party in Ibiza", "Shopping at the spa"]
+
+def generate_requests(count: int, seed: int = 7) -> list:
+    """Random requests built from common phrasings, then KEYWORD_CASES"""
+    rng = random.Random(seed)
+    requests = []
+    for _ in range(count):
+        extras = rng.sample(EXTRAS, rng.randint(0, 3))
+        text = " ".join([rng.choice(OPENERS), rng.choice(CITIES)] + extras)
+        requests.append(text.format(n=rng.randint(2, 14), b=rng.randrange(500, 6000, 50)))
+    return requests + KEYWORD_CASES
+
+SYLLABLES = ["ka", "lo", "mi", "ran", "te", "vo", "zu", "bel", "dor", "sha", "nu", "pe", "gri", "ost", "ya",
+             "fen", "qui", "sor", "bra", "tal", "wen", "ix", "har", "mon", "cel"]
+
+def synthetic_gazetteer(places: int, directory: str, seed: int = 11) -> Gazetteer:
+    """The seed gazetteer plus made-up places of one to three words, each with an alias"""
+    rng = random.Random(seed)
+    def name(words):
+        return " ".join("".join(rng.sample(SYLLABLES, rng.randint(3, 4))).title() for _ in range(words))
+    padding = os.path.join(directory, "synthetic.tsv")
+    with open(padding, "w", encoding="utf-8") as target:
+        for _ in range(places):
+            lat, lon = rng.uniform(-60, 70), rng.uniform(-180, 180)
+            target.write(f"{name(rng.choice((1, 1, 2, 3)))}\tZZ\tNowhere\t{lat:.4f}\t{lon:.4f}\t\t{name(1)}\n")
+    output = os.path.join(directory, "gazetteer.bin")
+    build_gazetteer([SEED_PATH, padding], output)
+    start = time.perf_counter()
+    gazetteer = Gazetteer.load(output)
+    print(f"gazetteer: {len(gazetteer)} places, {len(gazetteer.keys)} keys, loaded in {(time.perf_counter() - start) * 1000:.1f}ms")
+    return gazetteer
+
+def time_per_call(func, requests: list, repeat: int) -> float:
+    """Mean microseconds per request"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for request in requests:
+            func(request)
+    return (time.perf_counter() - start) / (repeat * len(requests)) * 1e6
+
+def run(count: int, repeat: int, places: int = 0):
+    requests = generate_requests(count)
+    if places:
+        directory = tempfile.TemporaryDirectory()
+        set_gazetteer(synthetic_gazetteer(places, directory.name))
+    else:
+        gazetteer = get_gazetteer()
+        print(f"gazetteer: {len(gazetteer)} places, {len(gazetteer.keys)} keys")
+    def differences(request):
+        # Fields the reference does not produce (dates, confidence) are not compared
+        current, reference = parse_travel_request(request), reference_parse(request)
+        return {field: (reference[field], current[field]) for field in reference if current[field] != reference[field]}
+    mismatches = [r for r in requests if differences(r)]
+    print(f"{len(requests)} requests, {len(mismatches)} parsed differently from the reference")
+    for request in mismatches[:5]:
+        print(f"  {request!r}: {differences(request)}")
+    # Keywords are matched exactly like the reference's substring checks
+    keyword_mismatches = [r for r in requests if {'style', 'interests'} & set(differences(r))]
+    if keyword_mismatches:
+        raise SystemExit(f"style/interests differ from the reference for {keyword_mismatches[:5]}")
+    reference = time_per_call(reference_parse, requests, repeat)
+    compiled = time_per_call(parse_travel_request, requests, repeat)
+    resolve = time_per_call(_MATCHER.destination, requests, repeat)
+    print(f"{'parser':<12} {'us/request':>10}")
+    print(f"{'reference':<12} {reference:>10.2f}")
+    print(f"{'current':<12} {compiled:>10.2f}   ({reference / compiled:.1f}x)")
+    print(f"{'destination':<12} {resolve:>10.2f}   (words + gazetteer lookups, part of current)")
+    if places:
+        set_gazetteer(None)
+        directory.cleanup()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000, help="generated requests")
+    parser.add_argument("--repeat", type=int, default=20, help="passes over the requests")
+    parser.add_argument("--places", type=int, default=0, help="synthetic places added to the gazetteer")
+    args = parser.parse_args()
+    run(args.requests, args.repeat, args.places)
@@ -1,5 +1,6 @@
 """Multi-agent system for TripCraft AI"""
 
 from .multi_agent_system import create_travel_agents, get_agent_system, AGENT_SYSTEM
+from .fast_path import FastPathPlanner, get_fast_path_planner
 
-__all__ = ["create_travel_agents", "get_agent_system", "AGENT_SYSTEM"]
\ No newline at end of file
+__all__ = ["create_travel_agents", "get_agent_system", "AGENT_SYSTEM", "FastPathPlanner", "get_fast_path_planner"]
\ No newline at end of file
@@ -0,0 +1,141 @@
+"""
+Rule-based fast path for fully specified travel requests
+
+A request whose destination and dates the parser understood with high
+confidence ("Budget travel to Tokyo for 5 days from March 3") needs no
+LLM round-trip: FastPathPlanner calls the search tools and the aggregator
+directly. Every other request goes to the agent runner. stats() reports
+how often the fast path was taken and the time spent on each route.
+
+Past or impossible dates lower the parser's dates confidence, so such
+requests go to the agents. A budget that is not required but was not
+stated is planned with the default budget and listed in the response's
+'defaulted' fields.
+"""
+import threading
+import time
+from datetime import date
+from typing import Dict, Any, List, Optional
+
+from config import logger, FAST_PATH_CONFIG
+from utils import parse_travel_request
+from tools import (
+    search_flights_ultimate,
+    find_hotels_ultimate,
+    save_user_preferences_ultimate,
+    aggregate_travel_results_ultimate
+)
+from .multi_agent_system import get_agent_system
+
+ROUTES = ("fast_path", "agents")
+
+# Parsed fields the fast path runs the tools with
+PLAN_FIELDS = ("destination", "dates", "budget")
+
+class FastPathPlanner:
+    """Send fully specified requests straight to the tools, the rest to the agents
+
+    Args:
+        runner: Agent runner for the other requests (the shared agent system's if None)
+        min_confidence: Parser confidence each required field needs
+        required_fields: Parsed fields that must reach min_confidence
+    """
+
+    def __init__(self, runner=None, min_confidence: Optional[float] = None,
+                 required_fields: Optional[List[str]] = None):
+        self._runner = runner
+        self.min_confidence = (FAST_PATH_CONFIG["fast_path_min_confidence"]
+                               if min_confidence is None else min_confidence)
+        self.required_fields = list(FAST_PATH_CONFIG["fast_path_required_fields"]
+                                    if required_fields is None else required_fields)
+        self._lock = threading.Lock()
+        self._counts = dict.fromkeys(ROUTES, 0)
+        self._seconds = dict.fromkeys(ROUTES, 0.0)
+
+    @property
+    def runner(self):
+        return self._runner or get_agent_system()["runner"]
+
+    def accepts(self, parsed: Dict[str, Any]) -> bool:
+        """Whether a parsed request is specified well enough to skip the agents"""
+        if not FAST_PATH_CONFIG["fast_path_enabled"]:
+            return False
+        confidence = parsed.get('confidence', {})
+        return all(confidence.get(field, 0.0) >= self.min_confidence for field in self.required_fields)
+
+    def run_tools(self, parsed: Dict[str, Any], context) -> Dict[str, Any]:
+        """Search flights and hotels for the parsed dates and aggregate a plan"""
+        destination = parsed['destination']
+        depart, back = parsed['depart_date'], parsed['return_date']
+        nights = max(1, (date.fromisoformat(back) - date.fromisoformat(depart)).days)
+        flights = search_flights_ultimate(destination, depart, back, context)
+        hotels = find_hotels_ultimate(destination, depart, back, parsed['budget'] / nights,
+                                      FAST_PATH_CONFIG["fast_path_guests"], context)
+        preferences = save_user_preferences_ultimate(getattr(context, 'user_id', 'anonymous'), context)
+        return aggregate_travel_results_ultimate(flights, hotels, preferences, context,
+                                                 budget=parsed['budget'], nights=nights,
+                                                 destination=destination)
+
+    def plan(self, request: str, context, parsed: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Plan a trip on the fast path if possible, else through the agent system
+
+        Args:
+            request: Natural language travel request
+            context: Tool context
+            parsed: The request already parsed by parse_travel_request
+
+        Returns:
+            Dictionary with the route taken, the parsed request, the
+            aggregated plan (fast path) or the agent response, the fields
+            the plan used defaults for (fast path) and the time taken
+        """
+        start = time.perf_counter()
+        parsed = parsed or parse_travel_request(request)
+        plan = response = None
+        defaulted: List[str] = []
+        if self.accepts(parsed):
+            route = "fast_path"
+            confidence = parsed.get('confidence', {})
+            defaulted = [field for field in PLAN_FIELDS if not confidence.get(field, 0.0)]
+            if defaulted:
+                logger.info(f"[FastPathPlanner.plan] planning with default {', '.join(defaulted)}")
+            plan = self.run_tools(parsed, context)
+        else:
+            route = "agents"
+            response = self.runner.run(request)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self._counts[route] += 1
+            self._seconds[route] += elapsed
+        logger.info(f"[FastPathPlanner.plan] {route} for {parsed['destination']} in {elapsed * 1000:.1f}ms")
+        return {
+            'route': route,
+            'parsed': parsed,
+            'plan': plan,
+            'agent_response': response,
+            'defaulted': defaulted,
+            'elapsed_ms': round(elapsed * 1000, 2)
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """Requests per route, the fast path rate and mean milliseconds per route"""
+        with self._lock:
+            counts, seconds = dict(self._counts), dict(self._seconds)
+        total = sum(counts.values())
+        stats = {'requests': total, **counts,
+                 'fast_path_rate': round(counts['fast_path'] / total, 4) if total else 0.0}
+        for route in ROUTES:
+            stats[f'{route}_ms'] = round(seconds[route] / counts[route] * 1000, 2) if counts[route] else 0.0
+        return stats
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._counts = dict.fromkeys(ROUTES, 0)
+            self._seconds = dict.fromkeys(ROUTES, 0.0)
+
+_PLANNER = FastPathPlanner()
+
+def get_fast_path_planner() -> FastPathPlanner:
+    """Get the shared fast path planner"""
+    return _PLANNER
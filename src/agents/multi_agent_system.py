@@ -16,6 +16,8 @@ from config import logger, MODEL_CONFIG
 from tools import (
     search_flights_ultimate,
     find_hotels_ultimate,
+    find_hotels_near,
+    find_attractions,
     save_user_preferences_ultimate,
     aggregate_travel_results_ultimate
 )
@@ -102,10 +104,10 @@ def create_travel_agents():
         You are a hotel research specialist:
         1. Find accommodations matching user budget and preferences
         2. Evaluate location, amenities, and guest reviews
-        3. Consider proximity to attractions and transportation
+        3. Consider proximity to attractions and transportation (find_hotels_near)
         4. Provide detailed hotel information with recommendations
         """,
-        tools=[find_hotels_ultimate]
+        tools=[find_hotels_ultimate, find_hotels_near]
     )
     
     activity_researcher = AgentClass(
@@ -117,9 +119,9 @@ def create_travel_agents():
         1. Save and manage user travel preferences
         2. Recommend activities based on interests and travel style
         3. Consider cultural, culinary, and adventure options
-        4. Provide personalized activity suggestions
+        4. Provide personalized activity suggestions, with nearby places from find_attractions
         """,
-        tools=[save_user_preferences_ultimate]
+        tools=[save_user_preferences_ultimate, find_attractions]
     )
     
     # Parallel coordination for research agents
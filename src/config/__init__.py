@@ -1,5 +1,5 @@
 """Configuration module for TripCraft AI"""
 
-from .settings import get_config, logger, DEFAULT_CONFIG, MODEL_CONFIG, TRAVEL_DEFAULTS
+from .settings import get_config, logger, DEFAULT_CONFIG, MODEL_CONFIG, TRAVEL_DEFAULTS, MEMORY_CONFIG, INVENTORY_CONFIG, SEARCH_CACHE_CONFIG, BUNDLE_CONFIG, AGGREGATION_CONFIG, GEO_CONFIG, PARSER_CONFIG, FAST_PATH_CONFIG, SUPPLIER_CONFIG
 
-__all__ = ["get_config", "logger", "DEFAULT_CONFIG", "MODEL_CONFIG", "TRAVEL_DEFAULTS"]
\ No newline at end of file
+__all__ = ["get_config", "logger", "DEFAULT_CONFIG", "MODEL_CONFIG", "TRAVEL_DEFAULTS", "MEMORY_CONFIG", "INVENTORY_CONFIG", "SEARCH_CACHE_CONFIG", "BUNDLE_CONFIG", "AGGREGATION_CONFIG", "GEO_CONFIG", "PARSER_CONFIG", "FAST_PATH_CONFIG", "SUPPLIER_CONFIG"]
\ No newline at end of file
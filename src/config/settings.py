@@ -12,7 +12,7 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Default configuration
+# Default configuration (retry_* / *_delay / multiplier drive supplier retries)
 DEFAULT_CONFIG = {
     "retry_attempts": 5,
     "initial_delay": 1.0,
@@ -36,7 +36,166 @@ TRAVEL_DEFAULTS = {
     "default_budget": 2000,
     "default_duration": 5,
     "default_style": "mid-range",
-    "default_interests": ["culture", "food"]
+    "default_interests": ["culture", "food"],
+    # Demo trips depart this many days from today, give or take flex days
+    "default_lead_days": 30,
+    "default_flex_days": 3
+}
+
+# Memory subsystem configuration
+MEMORY_CONFIG = {
+    # Storage backend: "memory" (in-process) or "sqlite" (durable, WAL mode)
+    "backend": "memory",
+    # "snapshot": store read-only snapshots, loads share them (no copy)
+    # "copy": store read-only snapshots, loads return mutable copies
+    # "reference": store caller objects as-is (no isolation)
+    "isolation": "snapshot",
+    # Lock-striped segments of the in-process store (keys are sharded by user)
+    "shards": 16,
+    # Byte budget for the whole store (all shards together); least recently
+    # used entries of the shard holding the most evictable bytes go first
+    "max_bytes": 64 * 1024 * 1024,
+    # Time-to-live in seconds per key namespace (None = never expires)
+    "default_ttl": None,
+    "namespace_ttls": {
+        "flight_search": 900,
+        "hotel_search": 900,
+        "hotel_proximity_search": 900,
+        "batch_search": 900,
+        "price_calendar": 900,
+        "aggregated_results": 3600,
+        "travel_preferences": None
+    },
+    # Store identical snapshot sub-objects of at least dedup_min_bytes once
+    "dedup": True,
+    "dedup_min_bytes": 128,
+    # Namespaces that are never evicted to satisfy the byte budget
+    "pinned_namespaces": ["travel_preferences"],
+    # Per-namespace codec, e.g. {"aggregated_results": {"codec": "pickle",
+    # "compression": "zlib"}}. Codecs: json, pickle, msgpack; compression:
+    # None, zlib, lz4. Unlisted namespaces stay native objects in memory and
+    # JSON in SQLite. See benchmarks/bench_codecs.py for trade-offs.
+    "namespace_codecs": {},
+    # Payloads smaller than this are never compressed
+    "compression_threshold": 1024,
+    # SQLite backend: database file, and group commit batch size / max wait
+    "sqlite_path": "tripcraft_memory.db",
+    "sqlite_batch_size": 256,
+    "sqlite_commit_interval": 0.05,
+    # Write-behind: save_memory queues writes and a background worker applies
+    # them in batches of up to write_behind_batch_size, at least every
+    # write_behind_interval seconds; saves block once write_behind_max_pending
+    # writes are queued
+    "write_behind": True,
+    "write_behind_batch_size": 128,
+    "write_behind_interval": 0.05,
+    "write_behind_max_pending": 10000
+}
+
+# Synthetic flight and hotel inventory used by the search tools
+INVENTORY_CONFIG = {
+    # Seed for the generator (same seed = same inventory)
+    "seed": 20240601,
+    "flights_per_route": 5000,
+    "hotels_per_city": 2000,
+    # Destinations whose inventory, hotel indexes and points of interest stay
+    # cached (least recently used dropped first)
+    "cached_destinations": 64,
+    # Number of options returned by a search (cheapest first)
+    "max_results": 10
+}
+
+# Inventory suppliers behind the flight and hotel tools
+SUPPLIER_CONFIG = {
+    # "local": in-process inventory; "http": supplier API at supplier_base_url
+    # (python -m suppliers.server runs a local stand-in); "fanout": every
+    # supplier API in supplier_provider_urls at once
+    "supplier_mode": "local",
+    "supplier_base_url": "http://127.0.0.1:8765",
+    "supplier_provider_urls": [],
+    # Seconds per request attempt (connect, send and read the response)
+    "supplier_timeout": 5.0,
+    # Keep-alive connections per supplier and event loop
+    "supplier_pool_size": 10,
+    # Idle pooled connections older than this are closed instead of reused
+    "supplier_idle_timeout": 30.0,
+    # Fan-out answers once this many providers responded, or at the deadline (seconds)
+    "supplier_quorum": 2,
+    "supplier_deadline": 2.0,
+    # A provider request outlasting this latency quantile gets a hedged duplicate,
+    # once the provider has this many latencies recorded
+    "supplier_hedge_quantile": 0.95,
+    "supplier_hedge_min_samples": 20
+}
+
+# Flight + hotel bundle optimizer used by the aggregator
+BUNDLE_CONFIG = {
+    # Number of bundles returned
+    "top_k": 3,
+    # Utility weights; each term is scaled to [0, weight]. price rewards
+    # spending less of the budget, stops/duration prefer direct and short
+    # flights, rating/distance prefer good and central hotels
+    "weights": {
+        "price": 1.0,
+        "rating": 0.5,
+        "stops": 0.2,
+        "duration": 0.1,
+        "distance": 0.1
+    }
+}
+
+# Incremental re-aggregation: the aggregator memoizes its intermediate
+# results per session and only recomputes parts whose inputs changed
+AGGREGATION_CONFIG = {
+    "aggregation_incremental": True,
+    # Sessions whose intermediate results are kept (least recently used dropped)
+    "aggregation_max_sessions": 256
+}
+
+# Geospatial index of hotels and points of interest
+GEO_CONFIG = {
+    # Synthetic points of interest per city (added to the known landmarks)
+    "geo_pois_per_city": 300,
+    # Side of the square grid cells, in km
+    "geo_grid_cell_km": 0.5,
+    # Hotels scored per chunk of the hotel x attraction distance matrix
+    "geo_score_chunk": 4096,
+    # Attractions returned by find_attractions when no radius is given
+    "geo_default_k": 10
+}
+
+# Natural language request parser
+PARSER_CONFIG = {
+    # Compiled gazetteer of destinations (None = bundled utils/data/gazetteer.bin)
+    "parser_gazetteer_path": None,
+    # Worker processes of bulk parsing (None = one per CPU)
+    "parser_bulk_workers": None,
+    # Requests sent to a worker at a time
+    "parser_bulk_chunk_size": 1000,
+    # Chunks read ahead per worker (bounds memory while the writer catches up)
+    "parser_bulk_pending_chunks": 2
+}
+
+# Rule-based fast path: fully specified requests skip the agent system
+FAST_PATH_CONFIG = {
+    "fast_path_enabled": True,
+    # Parsed fields that must be understood to skip the agents (add "budget"
+    # to require a stated budget; otherwise the default budget is planned
+    # with and listed in the response's "defaulted" fields)...
+    "fast_path_required_fields": ["destination", "dates"],
+    # ...and the parser confidence each of them needs
+    "fast_path_min_confidence": 0.9,
+    # Guests the hotel search is run for
+    "fast_path_guests": 2
+}
+
+# Cache of search results shared by all users of the flight/hotel tools
+SEARCH_CACHE_CONFIG = {
+    "cache_enabled": True,
+    # Seconds a cached search stays valid
+    "cache_ttl": 300,
+    # Least recently used searches are dropped beyond this many entries
+    "cache_max_entries": 1024
 }
 
 def get_config() -> Dict[str, Any]:
@@ -44,5 +203,14 @@ def get_config() -> Dict[str, Any]:
     return {
         **DEFAULT_CONFIG,
         **MODEL_CONFIG,
+        **MEMORY_CONFIG,
+        **INVENTORY_CONFIG,
+        **SEARCH_CACHE_CONFIG,
+        **BUNDLE_CONFIG,
+        **AGGREGATION_CONFIG,
+        **GEO_CONFIG,
+        **PARSER_CONFIG,
+        **FAST_PATH_CONFIG,
+        **SUPPLIER_CONFIG,
         **TRAVEL_DEFAULTS
     }
\ No newline at end of file
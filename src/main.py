@@ -2,16 +2,21 @@
 Main entry point for TripCraft AI
 """
 import random
-from typing import Dict, Any
-from config import logger
-from utils import parse_travel_request, save_memory, get_memory_stats
+import time
+from datetime import date, timedelta
+from typing import Dict, Any, Iterable, Iterator
+from config import logger, TRAVEL_DEFAULTS
+from utils import parse_travel_request, save_memory, get_memory_stats, get_search_cache_stats
 from tools import (
     search_flights_ultimate,
     find_hotels_ultimate,
+    stream_flights,
+    stream_hotels,
+    search_price_calendar,
     save_user_preferences_ultimate,
     aggregate_travel_results_ultimate
 )
-from agents import get_agent_system
+from agents import get_fast_path_planner
 
 class MockToolContext:
     """Mock ToolContext for demonstration - compatible with ADK ToolContext"""
@@ -55,7 +60,10 @@ def format_travel_results(result: Dict[str, Any]):
         print(f"\n💰 BUDGET ANALYSIS")
         print(f"   Flight Cost: ${budget.get('estimated_flight_cost', 0)}")
         print(f"   Hotel Cost/Night: ${budget.get('estimated_hotel_cost_per_night', 0)}")
-        print(f"   Total Estimated: ${budget.get('total_estimated_cost', 0)}")
+        print(f"   Total Estimated: ${budget.get('total_estimated_cost', 0)} ({budget.get('nights', 0)} nights)")
+        if budget.get('budget') is not None:
+            status = "within" if budget.get('within_budget') else "over"
+            print(f"   Budget: ${budget['budget']} ({status} budget)")
     
     if 'recommendations' in result:
         print(f"\n💡 RECOMMENDATIONS")
@@ -64,6 +72,15 @@ def format_travel_results(result: Dict[str, Any]):
     
     print("="*60)
 
+def show_stream(options: Iterable[Dict[str, Any]], icon: str, describe) -> Iterator[Dict[str, Any]]:
+    """Print streamed options as they arrive and pass them on"""
+    start = time.perf_counter()
+    for i, option in enumerate(options):
+        if i == 0:
+            print(f"   {icon} first result after {(time.perf_counter() - start) * 1000:.1f} ms")
+        print(f"      {describe(option)}")
+        yield option
+
 def run_demo(request: str = "Budget travel to Tokyo for 5 days"):
     """
     Run TripCraft AI demonstration
@@ -83,11 +100,22 @@ def run_demo(request: str = "Budget travel to Tokyo for 5 days"):
     context = MockToolContext.create_mock()
     print(f"🔧 Session: {context.session_id}")
     
+    # Fully specified requests skip the agent system (and its LLM calls)
+    planner = get_fast_path_planner()
+    if planner.accepts(parsed):
+        print("\n⚡ Fully specified request: calling the tools directly...")
+        result = planner.plan(request, context, parsed=parsed)
+        print(f"✅ Planned {parsed['depart_date']} -> {parsed['return_date']} in {result['elapsed_ms']:.1f} ms")
+        format_travel_results(result['plan'])
+        stats = planner.stats()
+        print(f"\n⚡ Fast path: {stats['fast_path']}/{stats['requests']} requests")
+        print("\n🎉 TripCraft AI Demo Completed!")
+        return "Demo completed successfully"
+    
     # Try multi-agent system first
     print("\n🤖 Attempting Multi-Agent System...")
     try:
-        agent_system = get_agent_system()
-        response = agent_system["runner"].run(request)
+        response = planner.plan(request, context, parsed=parsed)['agent_response']
         print(f"✅ Multi-Agent Response: {response}")
     except Exception as e:
         print(f"⚠️ Multi-Agent system unavailable: {e}")
@@ -96,33 +124,50 @@ def run_demo(request: str = "Budget travel to Tokyo for 5 days"):
     print("\n🔍 Running Individual Tools...")
     
     try:
-        # Execute travel planning tools
-        flights = search_flights_ultimate(
+        # Pick the cheapest dates around the default departure
+        calendar = search_price_calendar(
+            parsed['destination'],
+            (date.today() + timedelta(days=TRAVEL_DEFAULTS['default_lead_days'])).isoformat(),
+            context,
+            flex_days=TRAVEL_DEFAULTS['default_flex_days'],
+            min_nights=max(1, parsed['duration'] - 1),
+            max_nights=parsed['duration'] + 1,
+            budget=parsed['budget']
+        )
+        best = calendar['cheapest'] or min(calendar['calendar'], key=lambda e: e['total'])
+        print(f"📅 Cheapest dates: {best['depart_date']} -> {best['return_date']} ({best['nights']} nights, ${best['total']})")
+        
+        preferences = save_user_preferences_ultimate(
+            context.user_id,
+            context
+        )
+        
+        # Stream flights and hotels straight into the aggregator, showing
+        # each option as it arrives
+        flights = stream_flights(
             parsed['destination'], 
-            '2024-02-01', 
-            '2024-02-06', 
+            best['depart_date'], 
+            best['return_date'], 
             context
         )
         
-        hotels = find_hotels_ultimate(
+        hotels = stream_hotels(
             parsed['destination'],
-            '2024-02-01',
-            '2024-02-06',
+            best['depart_date'],
+            best['return_date'],
             parsed['budget'] / parsed['duration'],
             2,
             context
         )
         
-        preferences = save_user_preferences_ultimate(
-            context.user_id,
-            context
-        )
-        
         aggregated = aggregate_travel_results_ultimate(
-            flights,
-            hotels,
+            show_stream(flights, "✈️", lambda f: f"{f['airline']} ${f['price']} ({f['duration']}, {f['stops']} stops)"),
+            show_stream(hotels, "🏨", lambda h: f"{h['name']} ${h['price_per_night']}/night ({h['rating']}★)"),
             preferences,
-            context
+            context,
+            budget=parsed['budget'],
+            nights=best['nights'],
+            destination=parsed['destination']
         )
         
         print("✅ All tools executed successfully")
@@ -133,6 +178,8 @@ def run_demo(request: str = "Budget travel to Tokyo for 5 days"):
         # Show memory statistics
         stats = get_memory_stats()
         print(f"\n📊 Memory Stats: {stats['total_keys']} keys, {stats['total_size']} bytes")
+        for name, cache in get_search_cache_stats().items():
+            print(f"🗄️ {name.title()} Cache: {cache['hits']} hits, {cache['misses']} misses, {cache['coalesced']} coalesced")
         
     except Exception as e:
         logger.error(f"Tool execution failed: {e}")
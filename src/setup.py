@@ -13,6 +13,7 @@ setup(
     long_description_content_type="text/markdown",
     author="AI Agent Development Course",
     packages=find_packages(),
+    package_data={"utils": ["data/gazetteer.bin", "data/gazetteer.tsv"]},
     python_requires=">=3.7",
     install_requires=[
         # AI Agent Development Kit
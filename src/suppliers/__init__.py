@@ -0,0 +1,25 @@
+"""Inventory supplier adapters for TripCraft AI
+
+The stand-in supplier server (suppliers.server) and the in-process
+LocalSupplier (suppliers.local) are not imported here, since they depend
+on the tools package.
+"""
+
+from .adapters import HTTPSupplier, get_supplier, set_supplier, run_sync
+from .fanout import FanOutSupplier, LatencyHistogram
+from .http_pool import HTTPConnectionPool, HTTPResponse, HTTPError
+from .retry import RetryPolicy, SupplierError
+
+__all__ = [
+    "HTTPSupplier",
+    "get_supplier",
+    "set_supplier",
+    "run_sync",
+    "FanOutSupplier",
+    "LatencyHistogram",
+    "HTTPConnectionPool",
+    "HTTPResponse",
+    "HTTPError",
+    "RetryPolicy",
+    "SupplierError"
+]
@@ -0,0 +1,161 @@
+"""
+Supplier adapters for TripCraft AI
+
+HTTPSupplier fetches flight and hotel options from a supplier API (http
+or https URLs) over pooled keep-alive connections (one pool per event loop), with a timeout
+per attempt and retries with backoff (RetryPolicy). Async callers await
+the supplier's fetch_flights/fetch_hotels coroutines on their own loop.
+Synchronous callers go through run_sync, which runs coroutines on a
+shared background event loop so pooled connections survive between tool
+calls; it refuses to run on a thread that is already running a loop,
+since waiting there would block every other task on it.
+
+SUPPLIER_CONFIG["supplier_mode"] selects "local" (in-process inventory,
+get_supplier() returns None), "http", or "fanout" (a FanOutSupplier over
+every URL in supplier_provider_urls).
+"""
+import asyncio
+import inspect
+import json
+import threading
+import weakref
+from typing import Dict, Any, Awaitable, List, Optional
+from urllib.parse import urlencode, urlsplit
+
+from config import logger, SUPPLIER_CONFIG
+from .fanout import FanOutSupplier
+from .http_pool import HTTPConnectionPool
+from .retry import RetryPolicy, SupplierError
+
+class HTTPSupplier:
+    """Flight and hotel options from a supplier HTTP API"""
+
+    def __init__(self, base_url: Optional[str] = None, timeout: Optional[float] = None,
+                 pool_size: Optional[int] = None, idle_timeout: Optional[float] = None,
+                 retry: Optional[RetryPolicy] = None, name: Optional[str] = None):
+        url = urlsplit(base_url or SUPPLIER_CONFIG["supplier_base_url"])
+        if url.scheme not in ("http", "https"):
+            raise ValueError(f"unsupported supplier URL scheme {url.scheme!r} in {base_url!r}")
+        self.host = url.hostname or "127.0.0.1"
+        self.ssl = url.scheme == "https"
+        self.port = url.port or (443 if self.ssl else 80)
+        self.name = name or f"{self.host}:{self.port}"
+        self.prefix = url.path.rstrip("/")
+        self.timeout = SUPPLIER_CONFIG["supplier_timeout"] if timeout is None else timeout
+        self.pool_size = pool_size or SUPPLIER_CONFIG["supplier_pool_size"]
+        self.idle_timeout = SUPPLIER_CONFIG["supplier_idle_timeout"] if idle_timeout is None else idle_timeout
+        self.retry = retry or RetryPolicy()
+        self._pools = weakref.WeakKeyDictionary()  # event loop -> HTTPConnectionPool
+
+    def _pool(self) -> HTTPConnectionPool:
+        loop = asyncio.get_running_loop()
+        pool = self._pools.get(loop)
+        if pool is None:
+            pool = self._pools[loop] = HTTPConnectionPool(self.host, self.port, self.pool_size, self.idle_timeout,
+                                                          ssl=self.ssl)
+        return pool
+
+    async def get_json(self, path: str, params: Dict[str, Any]) -> Any:
+        """GET path with query parameters and decode the JSON response
+
+        Raises:
+            SupplierError: Non-retryable status, or retries exhausted on a retryable one
+        """
+        query = urlencode({k: v for k, v in params.items() if v is not None})
+        target = f"{self.prefix}{path}?{query}"
+
+        async def attempt():
+            response = await self._pool().request("GET", target, timeout=self.timeout)
+            if response.status == 429 or response.status >= 500:
+                raise SupplierError(f"{target} returned {response.status}", retryable=True, status=response.status)
+            if response.status >= 400:
+                raise SupplierError(f"{target} returned {response.status}", retryable=False, status=response.status)
+            return json.loads(response.body)
+
+        return await self.retry.run(attempt, name=f"GET {path}")
+
+    async def fetch_flights(self, destination: str, depart_date: str, return_date: str, limit: int) -> Dict[str, Any]:
+        """Cheapest flights for a route: {'flights': [...], 'total_available': n}"""
+        return await self.get_json("/flights", {
+            "destination": destination, "depart_date": depart_date, "return_date": return_date, "limit": limit
+        })
+
+    async def fetch_hotels(self, destination: str, checkin: str, checkout: str, budget_per_night: float,
+                           guests: int, limit: int, min_rating: Optional[float] = None,
+                           amenities: Optional[List[str]] = None, max_distance_km: Optional[float] = None,
+                           sort_by: str = 'price') -> Dict[str, Any]:
+        """Top hotels for a stay: {'hotels': [...], 'total_available': n}"""
+        return await self.get_json("/hotels", {
+            "destination": destination, "checkin": checkin, "checkout": checkout,
+            "budget_per_night": budget_per_night, "guests": guests, "limit": limit,
+            "min_rating": min_rating, "amenities": ",".join(amenities) if amenities else None,
+            "max_distance_km": max_distance_km, "sort_by": sort_by
+        })
+
+    def stats(self) -> Dict[str, Any]:
+        """Connection pool counters summed over event loops"""
+        totals = {"connections_opened": 0, "requests_sent": 0, "idle": 0}
+        for pool in list(self._pools.values()):
+            for name, value in pool.stats().items():
+                totals[name] += value
+        return totals
+
+    async def aclose(self) -> None:
+        """Close the idle connections of the current event loop's pool"""
+        pool = self._pools.pop(asyncio.get_running_loop(), None)
+        if pool is not None:
+            await pool.close()
+
+_SUPPLIER = None
+_SUPPLIER_LOCK = threading.Lock()
+_LOOP = None
+
+def get_supplier() -> Optional[Any]:
+    """Get the configured supplier (None in "local" mode)"""
+    global _SUPPLIER
+    mode = SUPPLIER_CONFIG["supplier_mode"]
+    if _SUPPLIER is None and mode in ("http", "fanout"):
+        with _SUPPLIER_LOCK:
+            if _SUPPLIER is None:
+                if mode == "fanout":
+                    urls = SUPPLIER_CONFIG["supplier_provider_urls"]
+                    _SUPPLIER = FanOutSupplier([HTTPSupplier(url) for url in urls])
+                    logger.info(f"[suppliers] fanning out to {len(urls)} providers")
+                else:
+                    _SUPPLIER = HTTPSupplier()
+                    logger.info(f"[suppliers] using {SUPPLIER_CONFIG['supplier_base_url']}")
+    return _SUPPLIER
+
+def set_supplier(supplier: Optional[Any]) -> None:
+    """Replace the active supplier (None to go back to the configured mode)"""
+    global _SUPPLIER
+    with _SUPPLIER_LOCK:
+        _SUPPLIER = supplier
+
+def _background_loop() -> asyncio.AbstractEventLoop:
+    """Event loop thread shared by synchronous callers"""
+    global _LOOP
+    if _LOOP is None:
+        with _SUPPLIER_LOCK:
+            if _LOOP is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="tripcraft-suppliers", daemon=True).start()
+                _LOOP = loop
+    return _LOOP
+
+def run_sync(awaitable: Awaitable[Any]) -> Any:
+    """Run a coroutine on the shared supplier loop and wait for its result
+
+    For synchronous callers only; code running on an event loop awaits the
+    supplier coroutine instead.
+
+    Raises:
+        RuntimeError: Called from a thread running an event loop
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run_coroutine_threadsafe(awaitable, _background_loop()).result()
+    if inspect.iscoroutine(awaitable):
+        awaitable.close()
+    raise RuntimeError("run_sync would block the running event loop; await the supplier coroutine instead")
@@ -0,0 +1,223 @@
+"""
+Hedged fan-out across several inventory providers for TripCraft AI
+
+FanOutSupplier sends each search to every registered provider at once and
+answers as soon as a quorum of them has responded, or when the deadline
+passes; providers still running are cancelled. Results are merged by
+flight/hotel id, keeping the cheapest offer.
+
+A provider that is slower than usual gets a hedged duplicate request:
+once an attempt has run longer than the provider's p95 latency (from its
+LatencyHistogram), a second identical request is sent and whichever
+answers first wins.
+"""
+import asyncio
+import bisect
+from typing import Dict, Any, Callable, List, Optional, Sequence
+
+from config import logger, SUPPLIER_CONFIG
+from .retry import SupplierError
+
+class LatencyHistogram:
+    """Log-bucketed latency histogram
+
+    Bucket bounds grow by 2 ** (1 / buckets_per_doubling), so quantiles are
+    accurate to about 19% with the default 4 buckets per doubling.
+    """
+
+    def __init__(self, min_seconds: float = 0.001, max_seconds: float = 60.0, buckets_per_doubling: int = 4):
+        ratio = 2 ** (1 / buckets_per_doubling)
+        self.bounds: List[float] = [min_seconds]
+        while self.bounds[-1] < max_seconds:
+            self.bounds.append(self.bounds[-1] * ratio)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+
+    def record(self, seconds: float) -> None:
+        """Add one observed latency"""
+        self.counts[bisect.bisect_left(self.bounds, seconds)] += 1
+        self.count += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-quantile (None if empty)"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and n:
+                return self.bounds[min(i, len(self.bounds) - 1)]
+        return self.bounds[-1]
+
+# Sort order of merged hotels for each sort_by value
+_HOTEL_ORDER: Dict[str, Callable[[Dict[str, Any]], Any]] = {
+    'price': lambda h: h['price_per_night'],
+    'rating': lambda h: -h['rating'],
+    'distance': lambda h: h['distance_to_center_km']
+}
+
+def _merge(responses: List[Dict[str, Any]], field: str, price: str, order: Callable[[Dict[str, Any]], Any],
+           limit: int) -> List[Dict[str, Any]]:
+    """Deduplicate items by id across responses, keeping the cheapest offer"""
+    best: Dict[str, Dict[str, Any]] = {}
+    for response in responses:
+        for item in response[field]:
+            current = best.get(item['id'])
+            if current is None or item[price] < current[price]:
+                best[item['id']] = item
+    return sorted(best.values(), key=order)[:limit]
+
+class FanOutSupplier:
+    """Queries several providers concurrently with quorum, deadline and hedging
+
+    Args:
+        providers: Objects with async fetch_flights/fetch_hotels (HTTPSupplier, LocalSupplier, ...)
+        quorum: Responses to wait for before answering (capped at the number of providers)
+        deadline: Seconds to wait for the quorum before answering with what has arrived
+        hedge_quantile: Latency quantile after which a hedged duplicate request is sent
+        hedge_min_samples: Latencies a provider needs recorded before it is hedged
+    """
+
+    name = "fanout"
+
+    def __init__(self, providers: Sequence[Any], quorum: Optional[int] = None, deadline: Optional[float] = None,
+                 hedge_quantile: Optional[float] = None, hedge_min_samples: Optional[int] = None):
+        if not providers:
+            raise ValueError("FanOutSupplier needs at least one provider")
+        self.providers = list(providers)
+        self.quorum = min(len(self.providers), quorum or SUPPLIER_CONFIG["supplier_quorum"])
+        self.deadline = SUPPLIER_CONFIG["supplier_deadline"] if deadline is None else deadline
+        self.hedge_quantile = hedge_quantile or SUPPLIER_CONFIG["supplier_hedge_quantile"]
+        self.hedge_min_samples = (SUPPLIER_CONFIG["supplier_hedge_min_samples"]
+                                  if hedge_min_samples is None else hedge_min_samples)
+        self.names = [getattr(p, "name", None) or f"provider-{i}" for i, p in enumerate(self.providers)]
+        self.histograms = [LatencyHistogram() for _ in self.providers]
+        self._counters = [
+            {"requests": 0, "responses": 0, "errors": 0, "cancelled": 0, "hedges": 0, "hedge_wins": 0}
+            for _ in self.providers
+        ]
+
+    def hedge_delay(self, index: int) -> Optional[float]:
+        """Seconds after which provider index gets a hedged request (None until enough samples)"""
+        histogram = self.histograms[index]
+        if histogram.count < self.hedge_min_samples:
+            return None
+        return histogram.quantile(self.hedge_quantile)
+
+    async def _attempt(self, index: int, method: str, args: tuple) -> Dict[str, Any]:
+        """One request to one provider, recording its latency
+
+        Cancelled attempts record the time they had run, a lower bound on
+        their latency, so slow providers are not hidden by their cancellations.
+        """
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        try:
+            result = await getattr(self.providers[index], method)(*args)
+        except asyncio.CancelledError:
+            self.histograms[index].record(loop.time() - start)
+            raise
+        self.histograms[index].record(loop.time() - start)
+        return result
+
+    async def _hedged(self, index: int, method: str, args: tuple) -> Dict[str, Any]:
+        """Request from one provider, hedging once the attempt outlasts its p95 latency"""
+        counters = self._counters[index]
+        counters["requests"] += 1
+        primary = asyncio.ensure_future(self._attempt(index, method, args))
+        attempts = {primary}
+        try:
+            delay = self.hedge_delay(index)
+            if delay is not None:
+                done, _ = await asyncio.wait(attempts, timeout=delay)
+                if not done:
+                    counters["hedges"] += 1
+                    attempts.add(asyncio.ensure_future(self._attempt(index, method, args)))
+            error = None
+            while attempts:
+                done, attempts = await asyncio.wait(attempts, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            counters["hedge_wins"] += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in attempts:
+                task.cancel()
+
+    async def _fan_out(self, method: str, args: tuple) -> List[Dict[str, Any]]:
+        """Responses from the first quorum of providers, or whatever arrived by the deadline
+
+        Raises:
+            SupplierError: No provider answered in time
+        """
+        loop = asyncio.get_running_loop()
+        tasks = {asyncio.ensure_future(self._hedged(i, method, args)): i for i in range(len(self.providers))}
+        pending = set(tasks)
+        responses, errors = [], []
+        give_up = loop.time() + self.deadline
+        try:
+            while pending and len(responses) < self.quorum:
+                remaining = give_up - loop.time()
+                if remaining <= 0:
+                    break
+                done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    index = tasks[task]
+                    if task.exception() is None:
+                        self._counters[index]["responses"] += 1
+                        responses.append(task.result())
+                    else:
+                        self._counters[index]["errors"] += 1
+                        errors.append(task.exception())
+                        logger.warning(f"[FanOutSupplier] {self.names[index]} {method} failed: {task.exception()!r}")
+        finally:
+            for task in pending:
+                task.cancel()
+                self._counters[tasks[task]]["cancelled"] += 1
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        if not responses:
+            reason = f"{len(errors)} failed" if errors else f"none answered within {self.deadline}s"
+            raise SupplierError(f"no provider answered {method}: {reason}", retryable=True)
+        return responses
+
+    async def fetch_flights(self, destination: str, depart_date: str, return_date: str, limit: int) -> Dict[str, Any]:
+        """Cheapest flights across providers: {'flights': [...], 'total_available': n, 'providers': n}"""
+        responses = await self._fan_out("fetch_flights", (destination, depart_date, return_date, limit))
+        return {
+            "flights": _merge(responses, "flights", "price", lambda f: f["price"], limit),
+            "total_available": max(r["total_available"] for r in responses),
+            "providers": len(responses)
+        }
+
+    async def fetch_hotels(self, destination: str, checkin: str, checkout: str, budget_per_night: float,
+                           guests: int, limit: int, min_rating: Optional[float] = None,
+                           amenities: Optional[List[str]] = None, max_distance_km: Optional[float] = None,
+                           sort_by: str = 'price') -> Dict[str, Any]:
+        """Top hotels across providers: {'hotels': [...], 'total_available': n, 'providers': n}"""
+        responses = await self._fan_out("fetch_hotels", (
+            destination, checkin, checkout, budget_per_night, guests, limit,
+            min_rating, amenities, max_distance_km, sort_by
+        ))
+        return {
+            "hotels": _merge(responses, "hotels", "price_per_night", _HOTEL_ORDER.get(sort_by, _HOTEL_ORDER['price']), limit),
+            "total_available": max(r["total_available"] for r in responses),
+            "providers": len(responses)
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-provider counters with p50/p95 latency in milliseconds"""
+        stats = {}
+        for name, counters, histogram in zip(self.names, self._counters, self.histograms):
+            p50, p95 = histogram.quantile(0.5), histogram.quantile(0.95)
+            stats[name] = {
+                **counters,
+                "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+                "p95_ms": round(p95 * 1000, 1) if p95 is not None else None
+            }
+        return stats
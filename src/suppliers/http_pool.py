@@ -0,0 +1,151 @@
+"""
+Minimal asyncio HTTP/1.1 client with keep-alive connection pooling
+
+Only what the supplier adapters need: one request per connection at a
+time, Content-Length bodies, and a bounded pool of idle connections that
+are reused across requests. Each pool belongs to the event loop it was
+first used on.
+"""
+import asyncio
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+class HTTPError(ConnectionError):
+    """Malformed response or connection failure"""
+
+class HTTPResponse:
+    """Status, lower-cased headers and body of a response"""
+    __slots__ = ("status", "headers", "body")
+
+    def __init__(self, status: int, headers: Dict[str, str], body: bytes):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+class _Connection:
+    __slots__ = ("reader", "writer", "idle_since")
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.idle_since = time.monotonic()
+
+    def usable(self, idle_timeout: float) -> bool:
+        return (not self.writer.is_closing() and not self.reader.at_eof()
+                and time.monotonic() - self.idle_since < idle_timeout)
+
+    def close(self) -> None:
+        self.writer.close()
+
+class HTTPConnectionPool:
+    """Keep-alive connections to one host:port, over TLS when ssl is set"""
+
+    def __init__(self, host: str, port: int, max_connections: int = 10, idle_timeout: float = 30.0,
+                 ssl: bool = False):
+        self.host = host
+        self.port = port
+        self.ssl = ssl
+        self.idle_timeout = idle_timeout
+        self._idle: List[_Connection] = []
+        self._slots = asyncio.Semaphore(max_connections)
+        self.connections_opened = 0
+        self.requests_sent = 0
+
+    async def _acquire(self, timeout: Optional[float]) -> Tuple[_Connection, bool]:
+        """Reuse the most recently idle connection or open a new one"""
+        while self._idle:
+            connection = self._idle.pop()
+            if connection.usable(self.idle_timeout):
+                return connection, True
+            connection.close()
+        return await self._open(timeout), False
+
+    async def _open(self, timeout: Optional[float]) -> _Connection:
+        # ssl=True verifies the server certificate with the default context;
+        # the timeout also bounds a TLS handshake the server never answers
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port, ssl=self.ssl or None), timeout)
+        self.connections_opened += 1
+        return _Connection(reader, writer)
+
+    async def request(self, method: str, path: str, body: bytes = b"",
+                      headers: Optional[Dict[str, str]] = None, timeout: Optional[float] = None) -> HTTPResponse:
+        """Send one request, reusing a pooled connection when possible
+
+        Args:
+            method: HTTP method
+            path: Path and query string
+            body: Request body
+            headers: Extra request headers
+            timeout: Seconds for opening a connection, and again for the
+                exchange (None for no limit)
+
+        Returns:
+            The response
+        """
+        async with self._slots:
+            connection, reused = await self._acquire(timeout)
+            try:
+                response = await asyncio.wait_for(self._exchange(connection, method, path, body, headers), timeout)
+            except (asyncio.IncompleteReadError, ConnectionError) as e:
+                connection.close()
+                if not reused:
+                    raise HTTPError(f"connection to {self.host}:{self.port} failed: {e}") from e
+                # The server closed an idle keep-alive connection; retry once on a fresh one
+                connection = await self._open(timeout)
+                try:
+                    response = await asyncio.wait_for(self._exchange(connection, method, path, body, headers), timeout)
+                except BaseException:
+                    connection.close()
+                    raise
+            except BaseException:
+                connection.close()
+                raise
+            if response.headers.get("connection", "").lower() == "close":
+                connection.close()
+            else:
+                connection.idle_since = time.monotonic()
+                self._idle.append(connection)
+            return response
+
+    async def _exchange(self, connection: _Connection, method: str, path: str, body: bytes,
+                        headers: Optional[Dict[str, str]]) -> HTTPResponse:
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self.host}:{self.port}",
+                 "Connection: keep-alive", f"Content-Length: {len(body)}"]
+        lines.extend(f"{name}: {value}" for name, value in (headers or {}).items())
+        connection.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+        await connection.writer.drain()
+        self.requests_sent += 1
+
+        status_line = await connection.reader.readuntil(b"\r\n")
+        parts = status_line.decode("latin-1").split(" ", 2)
+        if len(parts) < 2 or not parts[0].startswith("HTTP/"):
+            raise HTTPError(f"bad status line: {status_line!r}")
+        response_headers = {}
+        while True:
+            line = await connection.reader.readuntil(b"\r\n")
+            if line == b"\r\n":
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            response_headers[name.strip().lower()] = value.strip()
+        length = int(response_headers.get("content-length", 0))
+        response_body = await connection.reader.readexactly(length) if length else b""
+        return HTTPResponse(int(parts[1]), response_headers, response_body)
+
+    def stats(self) -> Dict[str, Any]:
+        """Connections opened, requests sent and connections currently idle"""
+        return {
+            "connections_opened": self.connections_opened,
+            "requests_sent": self.requests_sent,
+            "idle": len(self._idle)
+        }
+
+    async def close(self) -> None:
+        """Close every idle connection"""
+        while self._idle:
+            connection = self._idle.pop()
+            connection.close()
+            try:
+                await connection.writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
@@ -0,0 +1,106 @@
+"""
+In-process inventory behind the supplier interface for TripCraft AI
+
+flight_response and hotel_response answer supplier API calls from the
+synthetic inventory; the stand-in server and LocalSupplier both use them.
+LocalSupplier can add latency and a price markup, so fan-out and hedging
+can be exercised against several mock providers without a network.
+
+Not imported by the suppliers package, since it depends on the tools package.
+"""
+import asyncio
+import random
+from typing import Dict, Any, List, Optional
+
+from config import INVENTORY_CONFIG
+from tools.inventory import get_flight_inventory, parse_date, cheapest
+from tools.hotel_index import get_hotel_index, amenity_mask
+
+def flight_response(destination: str, depart_date: str, return_date: str, limit: Optional[int] = None) -> Dict[str, Any]:
+    """Cheapest flights for a route: {'flights': [FlightRecord], 'total_available': n}"""
+    inventory = get_flight_inventory(destination)
+    depart, return_ = parse_date(depart_date), parse_date(return_date)
+    prices = inventory.prices(depart, return_)
+    selected = cheapest(prices, limit or INVENTORY_CONFIG["max_results"])
+    return {
+        "flights": [inventory.record(i, prices[i], depart) for i in selected],
+        "total_available": len(inventory)
+    }
+
+def hotel_response(destination: str, checkin: str, checkout: str, budget_per_night: float, guests: int,
+                   limit: Optional[int] = None, min_rating: Optional[float] = None,
+                   amenities: Optional[List[str]] = None, max_distance_km: Optional[float] = None,
+                   sort_by: str = "price") -> Dict[str, Any]:
+    """Top hotels for a stay: {'hotels': [HotelRecord], 'total_available': n}
+
+    Hotels within 20% of the budget are preferred; if none match, the
+    budget is dropped and the other filters are kept.
+    """
+    index = get_hotel_index(destination)
+    stay = (parse_date(checkin), parse_date(checkout))
+    filters = {
+        "min_rating": min_rating,
+        "amenities": amenity_mask(amenities) if amenities else 0,
+        "max_distance_km": max_distance_km,
+        "sort_by": sort_by,
+        "limit": limit or INVENTORY_CONFIG["max_results"]
+    }
+    selected = index.query(*stay, max_price=budget_per_night * 1.2, **filters) or index.query(*stay, **filters)
+    return {
+        "hotels": [index.hotels.record(i, price, guests) for i, price in selected],
+        "total_available": len(index.hotels)
+    }
+
+class LocalSupplier:
+    """Inventory provider answering in-process, with optional simulated latency
+
+    Args:
+        name: Provider name used in fan-out stats
+        latency: Seconds before each response
+        jitter: Extra random seconds in [0, jitter] per response
+        markup: Price multiplier, for providers selling the same inventory at different prices
+        slow_every: Every n-th response also waits slow_latency seconds (0 to disable)
+        slow_latency: Extra seconds for those responses
+        rng: Random source for the jitter
+    """
+
+    def __init__(self, name: str = "local", latency: float = 0.0, jitter: float = 0.0, markup: float = 1.0,
+                 slow_every: int = 0, slow_latency: float = 0.0, rng: Optional[random.Random] = None):
+        self.name = name
+        self.latency = latency
+        self.jitter = jitter
+        self.markup = markup
+        self.slow_every = slow_every
+        self.slow_latency = slow_latency
+        self.requests = 0
+        self._rng = rng or random.Random()
+
+    async def _respond(self, response: Dict[str, Any]) -> Dict[str, Any]:
+        self.requests += 1
+        delay = self.latency + self._rng.uniform(0, self.jitter)
+        if self.slow_every and self.requests % self.slow_every == 0:
+            delay += self.slow_latency
+        if delay:
+            await asyncio.sleep(delay)
+        return response
+
+    def _price(self, amount: int) -> int:
+        return int(round(amount * self.markup))
+
+    async def fetch_flights(self, destination: str, depart_date: str, return_date: str, limit: int) -> Dict[str, Any]:
+        """Cheapest flights for a route: {'flights': [...], 'total_available': n}"""
+        response = flight_response(destination, depart_date, return_date, limit)
+        if self.markup != 1.0:
+            response["flights"] = [f._replace(price=self._price(f.price)) for f in response["flights"]]
+        return await self._respond(response)
+
+    async def fetch_hotels(self, destination: str, checkin: str, checkout: str, budget_per_night: float,
+                           guests: int, limit: int, min_rating: Optional[float] = None,
+                           amenities: Optional[List[str]] = None, max_distance_km: Optional[float] = None,
+                           sort_by: str = 'price') -> Dict[str, Any]:
+        """Top hotels for a stay: {'hotels': [...], 'total_available': n}"""
+        response = hotel_response(destination, checkin, checkout, budget_per_night, guests, limit,
+                                  min_rating, amenities, max_distance_km, sort_by)
+        if self.markup != 1.0:
+            response["hotels"] = [h._replace(price=self._price(h.price)) for h in response["hotels"]]
+        return await self._respond(response)
@@ -0,0 +1,74 @@
+"""
+Retry with exponential backoff and full jitter for supplier calls
+
+Defaults come from DEFAULT_CONFIG: retry_attempts, initial_delay,
+max_delay and multiplier. Attempt n (from 0) sleeps a random time in
+[0, min(max_delay, initial_delay * multiplier ** n)] before retrying, so
+clients that failed together do not retry together.
+"""
+import asyncio
+import random
+from typing import Any, Awaitable, Callable, Optional, Tuple, Type
+
+from config import logger, DEFAULT_CONFIG
+
+class SupplierError(Exception):
+    """A supplier call failed
+
+    Attributes:
+        retryable: Whether trying again may succeed (5xx, 429, timeouts, connection errors)
+        status: HTTP status code, if the supplier answered
+    """
+
+    def __init__(self, message: str, retryable: bool = True, status: Optional[int] = None):
+        super().__init__(message)
+        self.retryable = retryable
+        self.status = status
+
+# Exceptions that are always worth retrying
+RETRYABLE_ERRORS: Tuple[Type[BaseException], ...] = (asyncio.TimeoutError, ConnectionError, OSError, EOFError)
+
+class RetryPolicy:
+    """Exponential backoff with full jitter"""
+
+    def __init__(self, attempts: Optional[int] = None, initial_delay: Optional[float] = None,
+                 max_delay: Optional[float] = None, multiplier: Optional[float] = None,
+                 rng: Optional[random.Random] = None):
+        self.attempts = max(1, DEFAULT_CONFIG["retry_attempts"] if attempts is None else attempts)
+        self.initial_delay = DEFAULT_CONFIG["initial_delay"] if initial_delay is None else initial_delay
+        self.max_delay = DEFAULT_CONFIG["max_delay"] if max_delay is None else max_delay
+        self.multiplier = DEFAULT_CONFIG["multiplier"] if multiplier is None else multiplier
+        self._rng = rng or random.Random()
+
+    def delay(self, attempt: int) -> float:
+        """Sleep before retry number attempt + 1"""
+        ceiling = min(self.max_delay, self.initial_delay * self.multiplier ** attempt)
+        return self._rng.uniform(0, ceiling)
+
+    async def run(self, call: Callable[[], Awaitable[Any]], name: str = "call") -> Any:
+        """Await call(), retrying retryable failures
+
+        Args:
+            call: Creates a fresh awaitable for each attempt
+            name: Label for log messages
+
+        Returns:
+            The first successful result
+
+        Raises:
+            The last error once attempts are exhausted, or a non-retryable error
+        """
+        for attempt in range(self.attempts):
+            try:
+                return await call()
+            except SupplierError as e:
+                if not e.retryable or attempt == self.attempts - 1:
+                    raise
+                error = e
+            except RETRYABLE_ERRORS as e:
+                if attempt == self.attempts - 1:
+                    raise
+                error = e
+            delay = self.delay(attempt)
+            logger.warning(f"[retry] {name} attempt {attempt + 1}/{self.attempts} failed ({error!r}), retrying in {delay:.2f}s")
+            await asyncio.sleep(delay)
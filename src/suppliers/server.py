@@ -0,0 +1,190 @@
+"""
+Local stand-in supplier API for TripCraft AI
+
+Serves flight and hotel options from the synthetic inventory over
+HTTP/1.1 with keep-alive, in the format HTTPSupplier expects:
+
+    GET /flights?destination=&depart_date=&return_date=&limit=
+    GET /hotels?destination=&checkin=&checkout=&budget_per_night=&guests=&limit=
+               [&min_rating=&amenities=Pool,Gym&max_distance_km=&sort_by=]
+    GET /health
+
+latency and fail_first simulate a slow or flaky supplier in tests.
+
+Run standalone (from src/): python -m suppliers.server --port 8765
+"""
+import argparse
+import asyncio
+import json
+import threading
+from typing import Dict, Any, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+from config import logger, INVENTORY_CONFIG
+from utils.records import json_default
+from .local import flight_response, hotel_response
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 503: "Service Unavailable"}
+
+def _flights(params: Dict[str, str]) -> Dict[str, Any]:
+    return flight_response(params["destination"], params["depart_date"], params["return_date"],
+                           int(params.get("limit", INVENTORY_CONFIG["max_results"])))
+
+def _hotels(params: Dict[str, str]) -> Dict[str, Any]:
+    return hotel_response(
+        params["destination"], params["checkin"], params["checkout"],
+        float(params["budget_per_night"]), int(params.get("guests", 1)),
+        limit=int(params.get("limit", INVENTORY_CONFIG["max_results"])),
+        min_rating=float(params["min_rating"]) if "min_rating" in params else None,
+        amenities=params["amenities"].split(",") if params.get("amenities") else None,
+        max_distance_km=float(params["max_distance_km"]) if "max_distance_km" in params else None,
+        sort_by=params.get("sort_by", "price")
+    )
+
+ROUTES = {
+    "/flights": _flights,
+    "/hotels": _hotels,
+    "/health": lambda params: {"status": "ok"}
+}
+
+class SupplierServer:
+    """asyncio HTTP server answering supplier API requests from the inventory"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0, fail_first: int = 0):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.fail_first = fail_first
+        self.connections = 0
+        self.requests = 0
+        self._server = None
+        self._handlers = set()
+        self._loop = None
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self) -> None:
+        """Start listening on the current event loop (port 0 picks a free port)"""
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"[SupplierServer] listening on {self.base_url}")
+
+    async def stop(self) -> None:
+        """Stop listening and close open keep-alive connections"""
+        if self._server is not None:
+            self._server.close()
+            for handler in list(self._handlers):
+                handler.cancel()
+            await asyncio.gather(*self._handlers, return_exceptions=True)
+            await self._server.wait_closed()
+            self._server = None
+
+    def start_in_thread(self) -> "SupplierServer":
+        """Run the server on its own event loop thread (for tests and scripts)"""
+        ready = threading.Event()
+        self._loop = asyncio.new_event_loop()
+
+        def serve():
+            asyncio.set_event_loop(self._loop)
+            self._loop.run_until_complete(self.start())
+            ready.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=serve, name="supplier-server", daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self
+
+    def stop_thread(self) -> None:
+        """Stop a server started with start_in_thread"""
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self.stop(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve requests on one keep-alive connection until the client closes it"""
+        self.connections += 1
+        handler = asyncio.current_task()
+        self._handlers.add(handler)
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                path, params, keep_alive = request
+                status, payload = await self._respond(path, params)
+                body = json.dumps(payload, default=json_default).encode("utf-8")
+                head = (f"HTTP/1.1 {status} {_REASONS.get(status, 'Error')}\r\n"
+                        f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+                        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+                writer.write(head.encode("latin-1") + body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass
+        finally:
+            self._handlers.discard(handler)
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[Tuple[str, Dict[str, str], bool]]:
+        try:
+            request_line = await reader.readuntil(b"\r\n")
+        except asyncio.IncompleteReadError:
+            return None
+        headers = {}
+        while True:
+            line = await reader.readuntil(b"\r\n")
+            if line == b"\r\n":
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        length = int(headers.get("content-length", 0))
+        if length:
+            await reader.readexactly(length)
+        _, target, version = request_line.decode("latin-1").split(" ", 2)
+        url = urlsplit(target)
+        keep_alive = headers.get("connection", "").lower() != "close" and version.strip() == "HTTP/1.1"
+        return url.path, dict(parse_qsl(url.query)), keep_alive
+
+    async def _respond(self, path: str, params: Dict[str, str]) -> Tuple[int, Any]:
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.fail_first > 0:
+            self.fail_first -= 1
+            return 503, {"error": "supplier temporarily unavailable"}
+        route = ROUTES.get(path)
+        if route is None:
+            return 404, {"error": f"unknown path {path}"}
+        try:
+            return 200, route(params)
+        except (KeyError, ValueError) as e:
+            return 400, {"error": f"bad request: {e}"}
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local stand-in supplier API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    args = parser.parse_args()
+
+    async def serve():
+        server = SupplierServer(args.host, args.port, args.latency)
+        await server.start()
+        await asyncio.Event().wait()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,14 @@
 from .travel_tools import (
     search_flights_ultimate,
     find_hotels_ultimate,
+    find_hotels_near,
+    find_attractions,
+    stream_flights,
+    stream_hotels,
+    astream_flights,
+    astream_hotels,
+    search_travel_batch,
+    search_price_calendar,
     save_user_preferences_ultimate,
     aggregate_travel_results_ultimate
 )
@@ -10,6 +18,14 @@ from .travel_tools import (
 __all__ = [
     "search_flights_ultimate",
     "find_hotels_ultimate", 
+    "find_hotels_near",
+    "find_attractions",
+    "stream_flights",
+    "stream_hotels",
+    "astream_flights",
+    "astream_hotels",
+    "search_travel_batch",
+    "search_price_calendar",
     "save_user_preferences_ultimate",
     "aggregate_travel_results_ultimate"
 ]
\ No newline at end of file
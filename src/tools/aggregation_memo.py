@@ -0,0 +1,85 @@
+"""
+Per-session memo of aggregation stages for TripCraft AI
+
+The aggregator splits its work into stages (flight summary, hotel
+summary, bundles and budget analysis, user preferences, saving the plan).
+Each stage result is kept per session together with a fingerprint of its
+inputs; a stage is recomputed only when its fingerprint changes, so
+refining one input (say the hotel budget) leaves the other stages alone.
+"""
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Callable, Hashable, Optional, Tuple
+
+from config import AGGREGATION_CONFIG
+
+class AggregationMemo:
+    """Thread-safe LRU of sessions, each mapping stage -> (fingerprint, value)"""
+
+    def __init__(self, max_sessions: Optional[int] = None):
+        self.max_sessions = max_sessions or AGGREGATION_CONFIG["aggregation_max_sessions"]
+        self._sessions: "OrderedDict[Hashable, Dict[str, Tuple[Any, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _session(self, session: Hashable) -> Dict[str, Tuple[Any, Any]]:
+        """Stages of a session, marked most recently used (lock held)"""
+        stages = self._sessions.get(session)
+        if stages is None:
+            stages = self._sessions[session] = {}
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        else:
+            self._sessions.move_to_end(session)
+        return stages
+
+    def stage(self, session: Hashable, name: str, fingerprint: Any, compute: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Get a stage result, recomputing it if its inputs changed
+
+        Args:
+            session: Session key, e.g. (user_id, session_id)
+            name: Stage name
+            fingerprint: Comparable summary of the stage inputs
+            compute: Called without arguments when the fingerprint changed
+
+        Returns:
+            Tuple of (stage result, whether it was recomputed)
+        """
+        with self._lock:
+            cached = self._session(session).get(name)
+            if cached is not None and cached[0] == fingerprint:
+                self.hits += 1
+                return cached[1], False
+            self.misses += 1
+        value = compute()
+        with self._lock:
+            self._session(session)[name] = (fingerprint, value)
+        return value, True
+
+    def invalidate(self, session: Optional[Hashable] = None, name: Optional[str] = None) -> None:
+        """Forget one stage of a session, a whole session, or everything"""
+        with self._lock:
+            if session is None:
+                self._sessions.clear()
+            elif name is None:
+                self._sessions.pop(session, None)
+            elif session in self._sessions:
+                self._sessions[session].pop(name, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Sessions held and stage hit/miss counters"""
+        with self._lock:
+            return {"sessions": len(self._sessions), "hits": self.hits, "misses": self.misses}
+
+_MEMO: Optional[AggregationMemo] = None
+_MEMO_LOCK = threading.Lock()
+
+def get_aggregation_memo() -> AggregationMemo:
+    """Get the shared aggregation memo, creating it on first use"""
+    global _MEMO
+    if _MEMO is None:
+        with _MEMO_LOCK:
+            if _MEMO is None:
+                _MEMO = AggregationMemo()
+    return _MEMO
@@ -0,0 +1,131 @@
+"""
+Flight + hotel bundle optimizer for TripCraft AI
+
+Finds the top-k (flight, hotel, nights) bundles under a budget by a
+weighted utility score (BUNDLE_CONFIG["weights"]). The utility separates
+into a flight part and a hotel part for each trip length, so both sides
+are sorted by their part once. The search then walks flights best-first
+and stops early using two bounds. A flight is skipped when even the
+best hotel it can afford (a prefix maximum over hotels sorted by price)
+cannot beat the current k-th bundle. The walk over a flight's hotels
+stops as soon as the hotels left cannot beat it either.
+"""
+import heapq
+import re
+from typing import Dict, Any, List, Optional, Sequence
+
+import numpy as np
+
+from config import BUNDLE_CONFIG
+
+_DURATION = re.compile(r'(?:(\d+)\s*h)?\s*(?:(\d+)\s*m)?')
+
+def duration_minutes(duration: Any) -> Optional[int]:
+    """Minutes in a flight duration like "12h 5m" (None if unknown)"""
+    if isinstance(duration, (int, float)):
+        return int(duration)
+    match = _DURATION.fullmatch(str(duration or '').strip())
+    if not match or not any(match.groups()):
+        return None
+    hours, minutes = match.groups()
+    return int(hours or 0) * 60 + int(minutes or 0)
+
+def _flight_quality(flight: Dict[str, Any], weights: Dict[str, float]) -> float:
+    """Price-independent part of a flight's utility"""
+    score = weights.get('stops', 0) * (1.0 - min(flight.get('stops', 0), 2) / 2.0)
+    minutes = duration_minutes(flight.get('duration_min', flight.get('duration')))
+    if minutes is not None:
+        score += weights.get('duration', 0) * (1.0 - min(minutes, 24 * 60) / (24 * 60))
+    return score
+
+def _hotel_quality(hotel: Dict[str, Any], weights: Dict[str, float]) -> float:
+    """Price-independent part of a hotel's utility"""
+    score = 0.0
+    if hotel.get('rating') is not None:
+        score += weights.get('rating', 0) * min(max((hotel['rating'] - 3.5) / 1.5, 0.0), 1.0)
+    if hotel.get('distance_to_center_km') is not None:
+        score += weights.get('distance', 0) * (1.0 - min(hotel['distance_to_center_km'], 10.0) / 10.0)
+    return score
+
+def optimize_bundles(flights: Sequence[Dict[str, Any]], hotels: Sequence[Dict[str, Any]],
+                     nights: Sequence[int], budget: Optional[float] = None, k: Optional[int] = None,
+                     weights: Optional[Dict[str, float]] = None) -> List[Dict[str, Any]]:
+    """Find the top-k flight + hotel + nights bundles within a budget
+
+    Utility = price weight * (1 - total cost / budget) + stops, duration,
+    rating and distance terms, each scaled to [0, weight].
+
+    Args:
+        flights: Flight dicts with 'price' and optionally 'stops' and 'duration'
+        hotels: Hotel dicts with 'price_per_night' and optionally 'rating' and 'distance_to_center_km'
+        nights: Trip lengths to consider
+        budget: Maximum total cost (None for no limit)
+        k: Number of bundles (defaults to BUNDLE_CONFIG["top_k"])
+        weights: Utility weights (defaults to BUNDLE_CONFIG["weights"])
+
+    Returns:
+        Bundles sorted by utility, best first
+    """
+    k = BUNDLE_CONFIG["top_k"] if k is None else k
+    weights = {**BUNDLE_CONFIG["weights"], **(weights or {})}
+    nights = sorted({max(1, int(n)) for n in nights})
+    if k <= 0 or not flights or not hotels or not nights:
+        return []
+
+    flight_price = np.array([f.get('price', 0) for f in flights], dtype=np.float64)
+    hotel_price = np.array([h.get('price_per_night', 0) for h in hotels], dtype=np.float64)
+    # Cost is scored relative to the budget, or to the dearest bundle without one
+    scale = budget if budget else flight_price.max() + hotel_price.max() * nights[-1]
+    scale = max(float(scale), 1.0)
+    limit = float('inf') if budget is None else float(budget)
+    price_weight = weights.get('price', 0) / scale
+
+    flight_value = np.array([_flight_quality(f, weights) for f in flights]) - price_weight * flight_price
+    flight_order = np.argsort(-flight_value, kind='stable')
+    hotel_quality = np.array([_hotel_quality(h, weights) for h in hotels])
+    # Hotels sorted by price with the best value seen so far, for the bound
+    by_price = np.argsort(hotel_price, kind='stable')
+    sorted_hotel_price = hotel_price[by_price]
+
+    best: List[tuple] = []  # min-heap of (utility, -flight, -hotel, -nights)
+    for n in nights:
+        hotel_value = hotel_quality - price_weight * n * hotel_price
+        hotel_order = np.argsort(-hotel_value, kind='stable')
+        prefix_best = np.maximum.accumulate(hotel_value[by_price])
+        for f in flight_order:
+            f_value = flight_value[f]
+            affordable = int(np.searchsorted(sorted_hotel_price, (limit - flight_price[f]) / n, 'right'))
+            if affordable == 0:
+                continue
+            bound = f_value + prefix_best[affordable - 1]
+            if len(best) == k and bound <= best[0][0]:
+                # Flights are sorted by value, but a cheaper flight can afford
+                # better hotels, so only this flight is pruned
+                if f_value + prefix_best[-1] <= best[0][0]:
+                    break
+                continue
+            for h in hotel_order:
+                utility = f_value + hotel_value[h]
+                if len(best) == k and utility <= best[0][0]:
+                    break
+                if flight_price[f] + hotel_price[h] * n > limit:
+                    continue
+                # Equal utilities are ordered by flight, hotel and nights
+                item = (utility, -int(f), -int(h), -n)
+                if len(best) < k:
+                    heapq.heappush(best, item)
+                else:
+                    heapq.heapreplace(best, item)
+
+    bundles = []
+    for utility, f, h, n in sorted(best, reverse=True):
+        f, h, n = -f, -h, -n
+        total = int(flight_price[f] + hotel_price[h] * n)
+        bundles.append({
+            'flight': flights[f],
+            'hotel': hotels[h],
+            'nights': n,
+            'total_cost': total,
+            'utility': round(float(utility + weights.get('price', 0)), 4)
+        })
+    return bundles
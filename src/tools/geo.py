@@ -0,0 +1,291 @@
+"""
+Geospatial index for hotels and points of interest in TripCraft AI
+
+Hotels carry a latitude/longitude, and every city has a catalog of points
+of interest (landmarks, museums, parks, stations, shopping, dining): a few
+real landmarks for catalog cities plus a seeded synthetic set. Both are
+indexed by GridIndex, a uniform grid over the points projected to
+kilometres around the city, which answers radius and k-nearest queries by
+only measuring points in nearby cells. Distances are great-circle
+(haversine) and computed with NumPy over whole candidate sets, and
+proximity_scores scores every hotel against several attractions at once in
+bounded chunks.
+"""
+import threading
+import zlib
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config import logger, INVENTORY_CONFIG, GEO_CONFIG
+from .inventory import HotelInventory, KM_PER_DEGREE, LRUCache, city_center, destination_key, get_hotel_inventory
+
+EARTH_RADIUS_KM = 6371.0088
+
+POI_CATEGORIES = ['landmark', 'museum', 'park', 'station', 'shopping', 'dining']
+
+# Well-known places of the catalog cities: (name, category, lat, lon)
+LANDMARKS = {
+    'tokyo': [
+        ('Senso-ji', 'landmark', 35.7148, 139.7967), ('Shibuya Crossing', 'landmark', 35.6595, 139.7005),
+        ('Meiji Jingu', 'park', 35.6764, 139.6993), ('Tokyo Tower', 'landmark', 35.6586, 139.7454),
+        ('Tokyo Station', 'station', 35.6812, 139.7671)
+    ],
+    'paris': [
+        ('Eiffel Tower', 'landmark', 48.8584, 2.2945), ('Louvre Museum', 'museum', 48.8606, 2.3376),
+        ('Notre-Dame', 'landmark', 48.8530, 2.3499), ('Sacre-Coeur', 'landmark', 48.8867, 2.3431),
+        ('Gare du Nord', 'station', 48.8809, 2.3553)
+    ],
+    'london': [
+        ('British Museum', 'museum', 51.5194, -0.1270), ('Tower of London', 'landmark', 51.5081, -0.0759),
+        ('Big Ben', 'landmark', 51.5007, -0.1246), ("King's Cross", 'station', 51.5308, -0.1238),
+        ('Hyde Park', 'park', 51.5073, -0.1657)
+    ],
+    'bangkok': [
+        ('Grand Palace', 'landmark', 13.7500, 100.4913), ('Wat Arun', 'landmark', 13.7437, 100.4889),
+        ('Chatuchak Market', 'shopping', 13.7999, 100.5500), ('Lumphini Park', 'park', 13.7314, 100.5414),
+        ('Hua Lamphong', 'station', 13.7396, 100.5170)
+    ],
+    'singapore': [
+        ('Gardens by the Bay', 'park', 1.2816, 103.8636), ('Marina Bay Sands', 'landmark', 1.2834, 103.8607),
+        ('Merlion Park', 'landmark', 1.2868, 103.8545), ('Chinatown', 'shopping', 1.2836, 103.8444),
+        ('Sentosa', 'park', 1.2494, 103.8303)
+    ],
+    'sydney': [
+        ('Sydney Opera House', 'landmark', -33.8568, 151.2153), ('Harbour Bridge', 'landmark', -33.8523, 151.2108),
+        ('Bondi Beach', 'park', -33.8908, 151.2743), ('Central Station', 'station', -33.8832, 151.2061),
+        ('Darling Harbour', 'shopping', -33.8748, 151.2008)
+    ],
+    'dubai': [
+        ('Burj Khalifa', 'landmark', 25.1972, 55.2744), ('Dubai Mall', 'shopping', 25.1985, 55.2796),
+        ('Gold Souk', 'shopping', 25.2697, 55.2962), ('Dubai Creek', 'landmark', 25.2637, 55.3128),
+        ('Palm Jumeirah', 'landmark', 25.1124, 55.1390)
+    ],
+    'mumbai': [
+        ('Gateway of India', 'landmark', 18.9220, 72.8347), ('Chhatrapati Shivaji Terminus', 'station', 18.9398, 72.8355),
+        ('Marine Drive', 'landmark', 18.9432, 72.8235), ('Juhu Beach', 'park', 19.0988, 72.8267),
+        ('Colaba Causeway', 'shopping', 18.9150, 72.8258)
+    ]
+}
+
+def haversine_km(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """Great-circle distance in km; arguments broadcast like NumPy arrays"""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=np.float64)) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+class GridIndex:
+    """Uniform grid over points for radius and k-nearest queries
+
+    Points are projected to kilometres around their mean position and
+    bucketed into square cells of cell_km, sorted by cell so each column
+    of cells is one contiguous slice. A query only measures the points in
+    the cells its circle overlaps.
+    """
+
+    def __init__(self, lat: np.ndarray, lon: np.ndarray, cell_km: Optional[float] = None):
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lon = np.asarray(lon, dtype=np.float64)
+        self.cell_km = cell_km or GEO_CONFIG["geo_grid_cell_km"]
+        self.ref_lat = float(self.lat.mean()) if len(self.lat) else 0.0
+        self.ref_lon = float(self.lon.mean()) if len(self.lon) else 0.0
+        self._lon_km = KM_PER_DEGREE * np.cos(np.radians(self.ref_lat))
+        x, y = self._project(self.lat, self.lon)
+        cx, cy = self._cell(x), self._cell(y)
+        self.min_cx, self.min_cy = (int(cx.min()), int(cy.min())) if len(x) else (0, 0)
+        self.max_cx, self.max_cy = (int(cx.max()), int(cy.max())) if len(x) else (-1, -1)
+        self._rows = self.max_cy - self.min_cy + 1
+        keys = (cx - self.min_cx) * self._rows + (cy - self.min_cy)
+        self.order = np.argsort(keys, kind='stable')
+        self.sorted_keys = keys[self.order]
+
+    def __len__(self) -> int:
+        return len(self.lat)
+
+    def _project(self, lat, lon) -> Tuple[np.ndarray, np.ndarray]:
+        return (np.asarray(lon) - self.ref_lon) * self._lon_km, (np.asarray(lat) - self.ref_lat) * KM_PER_DEGREE
+
+    def _cell(self, km) -> np.ndarray:
+        return np.floor(np.asarray(km) / self.cell_km).astype(np.int64)
+
+    def _candidates(self, lat: float, lon: float, radius_km: float) -> np.ndarray:
+        """Points in the cells overlapping the circle (a superset of the answer)"""
+        # The projection stretches distances slightly away from the reference point
+        reach = radius_km * 1.02 + 0.01
+        x, y = self._project(lat, lon)
+        x0, x1 = max(int(self._cell(x - reach)), self.min_cx), min(int(self._cell(x + reach)), self.max_cx)
+        y0, y1 = max(int(self._cell(y - reach)), self.min_cy), min(int(self._cell(y + reach)), self.max_cy)
+        if x0 > x1 or y0 > y1:
+            return self.order[:0]
+        columns = np.arange(x0, x1 + 1) - self.min_cx
+        low = np.searchsorted(self.sorted_keys, columns * self._rows + (y0 - self.min_cy), side='left')
+        high = np.searchsorted(self.sorted_keys, columns * self._rows + (y1 - self.min_cy), side='right')
+        return np.concatenate([self.order[a:b] for a, b in zip(low, high)]) if len(columns) else self.order[:0]
+
+    def within(self, lat: float, lon: float, radius_km: float,
+               mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Points within radius_km, closest first
+
+        Args:
+            lat: Query latitude
+            lon: Query longitude
+            radius_km: Search radius
+            mask: Boolean array selecting the points that may match
+
+        Returns:
+            Tuple of (point positions, distances in km)
+        """
+        candidates = self._candidates(lat, lon, radius_km)
+        if mask is not None:
+            candidates = candidates[mask[candidates]]
+        distances = haversine_km(lat, lon, self.lat[candidates], self.lon[candidates])
+        keep = distances <= radius_km
+        candidates, distances = candidates[keep], distances[keep]
+        order = np.argsort(distances, kind='stable')
+        return candidates[order], distances[order]
+
+    def nearest(self, lat: float, lon: float, k: int,
+                mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """The k closest points, closest first
+
+        Searches a circle that doubles until it holds k points; every point
+        inside it is measured, so the k closest are exact.
+        """
+        if k <= 0 or not len(self):
+            return self.order[:0], np.zeros(0)
+        x, y = self._project(lat, lon)
+        corners_x = np.array([self.min_cx, self.max_cx + 1]) * self.cell_km
+        corners_y = np.array([self.min_cy, self.max_cy + 1]) * self.cell_km
+        # Beyond this radius the circle covers the whole grid
+        farthest = float(np.hypot(np.abs(corners_x - x).max(), np.abs(corners_y - y).max())) * 1.02 + self.cell_km
+        radius = self.cell_km
+        while True:
+            positions, distances = self.within(lat, lon, radius, mask)
+            if len(positions) >= k or radius >= farthest:
+                return positions[:k], distances[:k]
+            radius *= 2
+
+def proximity_scores(lat: np.ndarray, lon: np.ndarray, poi_lat: Sequence[float], poi_lon: Sequence[float],
+                     weights: Optional[Sequence[float]] = None,
+                     chunk: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Distance of every point (hotel) to every chosen attraction
+
+    Computes the points x attractions distance matrix in chunks of rows,
+    so memory stays bounded for large inventories.
+
+    Args:
+        lat: Latitudes of the points to score
+        lon: Longitudes of the points to score
+        poi_lat: Latitudes of the attractions
+        poi_lon: Longitudes of the attractions
+        weights: Relative importance of each attraction (equal if None)
+        chunk: Rows per chunk (defaults to GEO_CONFIG["geo_score_chunk"])
+
+    Returns:
+        Tuple of (weighted mean distance in km per point, points x attractions distances)
+    """
+    lat, lon = np.asarray(lat, dtype=np.float64), np.asarray(lon, dtype=np.float64)
+    poi_lat, poi_lon = np.asarray(poi_lat, dtype=np.float64), np.asarray(poi_lon, dtype=np.float64)
+    weights = np.ones(len(poi_lat)) if weights is None else np.asarray(weights, dtype=np.float64)
+    weights = weights / weights.sum()
+    chunk = chunk or GEO_CONFIG["geo_score_chunk"]
+    distances = np.empty((len(lat), len(poi_lat)))
+    for start in range(0, len(lat), chunk):
+        stop = start + chunk
+        distances[start:stop] = haversine_km(lat[start:stop, None], lon[start:stop, None], poi_lat[None, :], poi_lon[None, :])
+    return distances @ weights, distances
+
+class PointsOfInterest:
+    """Points of interest of one city with a grid index"""
+
+    def __init__(self, destination: str, names: List[str], categories: np.ndarray, lat: np.ndarray, lon: np.ndarray):
+        self.destination = destination
+        self.names = names
+        self.categories = categories
+        self.lat = lat
+        self.lon = lon
+        self.index = GridIndex(lat, lon)
+        self._by_name = {name.lower(): i for i, name in enumerate(names)}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def find(self, name: str) -> Optional[int]:
+        """Position of the point named name (exact, then substring match; case-insensitive)"""
+        key = " ".join(name.split()).lower()
+        found = self._by_name.get(key)
+        if found is None:
+            found = next((i for n, i in self._by_name.items() if key and key in n), None)
+        return found
+
+    def category_mask(self, category: Optional[str]) -> Optional[np.ndarray]:
+        """Boolean mask of one category (None for every point)"""
+        if category is None:
+            return None
+        if category not in POI_CATEGORIES:
+            raise ValueError(f"unknown category {category!r}, expected one of {POI_CATEGORIES}")
+        return self.categories == POI_CATEGORIES.index(category)
+
+    def to_dict(self, i: int, distance_km: Optional[float] = None) -> Dict[str, Any]:
+        """One point of interest in the tool result format"""
+        poi = {
+            'name': self.names[i],
+            'category': POI_CATEGORIES[self.categories[i]],
+            'location': {'lat': round(float(self.lat[i]), 5), 'lon': round(float(self.lon[i]), 5)}
+        }
+        if distance_km is not None:
+            poi['distance_km'] = round(float(distance_km), 2)
+        return poi
+
+def _build_catalog(destination: str) -> PointsOfInterest:
+    """Real landmarks plus seeded synthetic points around the city center"""
+    seed = INVENTORY_CONFIG["seed"] + zlib.crc32(("poi|" + destination_key(destination)).encode("utf-8"))
+    rng = np.random.default_rng(seed)
+    n = GEO_CONFIG["geo_pois_per_city"]
+    center_lat, center_lon = city_center(destination)
+    distance = rng.gamma(2.0, 1.8, size=n)
+    bearing = rng.uniform(0.0, 2 * np.pi, size=n)
+    categories = rng.integers(0, len(POI_CATEGORIES), size=n).astype(np.int8)
+    lat = center_lat + distance * np.cos(bearing) / KM_PER_DEGREE
+    lon = center_lon + distance * np.sin(bearing) / (KM_PER_DEGREE * np.cos(np.radians(center_lat)))
+    counts = {c: 0 for c in POI_CATEGORIES}
+    names = []
+    for c in categories:
+        category = POI_CATEGORIES[c]
+        counts[category] += 1
+        names.append(f"{destination} {category.title()} {counts[category]}")
+
+    landmarks = LANDMARKS.get(destination_key(destination), [])
+    names = [name for name, _, _, _ in landmarks] + names
+    categories = np.concatenate([np.array([POI_CATEGORIES.index(c) for _, c, _, _ in landmarks], dtype=np.int8), categories])
+    lat = np.concatenate([[la for _, _, la, _ in landmarks], lat])
+    lon = np.concatenate([[lo for _, _, _, lo in landmarks], lon])
+    return PointsOfInterest(destination, names, categories, lat, lon)
+
+_CATALOGS = LRUCache(INVENTORY_CONFIG["cached_destinations"])
+_HOTEL_INDEXES = LRUCache(INVENTORY_CONFIG["cached_destinations"])
+_GEO_LOCK = threading.Lock()
+
+def get_poi_catalog(destination: str) -> PointsOfInterest:
+    """Get a city's points of interest, building them on first use"""
+    key = destination_key(destination)
+    catalog = _CATALOGS.get(key)
+    if catalog is None:
+        with _GEO_LOCK:
+            catalog = _CATALOGS.get(key)
+            if catalog is None:
+                catalog = _CATALOGS.put(key, _build_catalog(destination.strip()))
+                logger.info(f"[geo] built {len(catalog)} points of interest for {destination}")
+    return catalog
+
+def get_hotel_geo_index(destination: str) -> Tuple[HotelInventory, GridIndex]:
+    """Get a city's hotels and their grid index (rebuilt if the inventory was regenerated)"""
+    hotels = get_hotel_inventory(destination)
+    key = destination_key(destination)
+    cached = _HOTEL_INDEXES.get(key)
+    if cached is None or cached[0] is not hotels:
+        with _GEO_LOCK:
+            cached = _HOTEL_INDEXES.get(key)
+            if cached is None or cached[0] is not hotels:
+                cached = _HOTEL_INDEXES.put(key, (hotels, GridIndex(hotels.lat, hotels.lon)))
+    return cached
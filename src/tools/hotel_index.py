@@ -0,0 +1,169 @@
+"""
+Hotel index for TripCraft AI
+
+Per-city index over the hotel inventory: hotel positions sorted by base
+price, rating and distance, with amenities as bitsets. A query walks the
+order of its sort key in chunks, filters each chunk and stops as soon as
+the top results are settled, so its cost grows with the size of the result
+rather than the size of the city's inventory.
+"""
+import heapq
+import threading
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from config import logger, INVENTORY_CONFIG
+from .inventory import HotelInventory, HOTEL_AMENITIES, LRUCache, destination_key, get_hotel_inventory, season_factor
+
+SORT_KEYS = ('price', 'rating', 'distance')
+
+# Float tolerance for rating/distance bounds (columns are float32)
+_EPSILON = 1e-4
+
+def amenity_mask(amenities: Optional[Iterable[str]]) -> int:
+    """Bitset of the given amenity names (unknown names are ignored)"""
+    mask = 0
+    lookup = {name.lower(): bit for bit, name in enumerate(HOTEL_AMENITIES)}
+    for name in amenities or ():
+        bit = lookup.get(name.strip().lower())
+        if bit is None:
+            logger.warning(f"[amenity_mask] unknown amenity {name!r} ignored")
+            continue
+        mask |= 1 << bit
+    return mask
+
+class HotelIndex:
+    """Sorted views and bitsets over one city's HotelInventory"""
+
+    def __init__(self, hotels: HotelInventory):
+        self.hotels = hotels
+        self.by_price = np.argsort(hotels.base_price, kind='stable')
+        self.sorted_price = hotels.base_price[self.by_price]
+        # Descending rating, stored negated so searchsorted works on ascending values
+        self.by_rating = np.argsort(-hotels.rating, kind='stable')
+        self.sorted_neg_rating = -hotels.rating[self.by_rating]
+        self.by_distance = np.argsort(hotels.distance_km, kind='stable')
+        self.sorted_distance = hotels.distance_km[self.by_distance]
+        self.sensitivity_range = (float(hotels.price_sensitivity.min()), float(hotels.price_sensitivity.max()))
+
+    def _price_bounds(self, factor: float) -> Tuple[float, float]:
+        """Smallest and largest price/base_price ratio for a season factor"""
+        low, high = self.sensitivity_range
+        if factor < 0:
+            low, high = high, low
+        return 1.0 + low * factor, 1.0 + high * factor
+
+    def query(self, checkin: np.datetime64, checkout: np.datetime64,
+              max_price: Optional[float] = None, min_rating: Optional[float] = None,
+              amenities: int = 0, max_distance_km: Optional[float] = None,
+              sort_by: str = 'price', limit: int = 10) -> List[Tuple[int, int]]:
+        """Find the top hotels matching every filter
+
+        Args:
+            checkin: Check-in date
+            checkout: Check-out date
+            max_price: Maximum average nightly price for the stay
+            min_rating: Minimum rating
+            amenities: Bitset of required amenities (see amenity_mask)
+            max_distance_km: Maximum distance to the city center
+            sort_by: 'price' (cheapest first), 'rating' (best first) or 'distance' (closest first)
+            limit: Number of hotels to return
+
+        Returns:
+            List of (hotel position, nightly price) in ranking order
+        """
+        return list(self.iter_query(checkin, checkout, max_price, min_rating, amenities, max_distance_km, sort_by, limit))
+
+    def iter_query(self, checkin: np.datetime64, checkout: np.datetime64,
+                   max_price: Optional[float] = None, min_rating: Optional[float] = None,
+                   amenities: int = 0, max_distance_km: Optional[float] = None,
+                   sort_by: str = 'price', limit: int = 10) -> Iterator[Tuple[int, int]]:
+        """Yield the results of query as soon as their rank is settled
+
+        Rating and distance results are final as they are found. Price
+        results are final once no remaining hotel can be cheaper.
+        """
+        if sort_by not in SORT_KEYS:
+            raise ValueError(f"sort_by must be one of {SORT_KEYS}, got {sort_by!r}")
+        if limit <= 0:
+            return
+        hotels = self.hotels
+        nights = max(1, int((checkout - checkin).astype(np.int64)))
+        factor = float(np.mean(season_factor(checkin + np.arange(nights))))
+        low_ratio, _ = self._price_bounds(factor)
+
+        # Each sorted view bounds the candidates for its own filter; walk
+        # the view of the sort key, cut short by its filter when it has one
+        if sort_by == 'price':
+            order = self.by_price
+            end = len(order) if max_price is None else int(np.searchsorted(self.sorted_price, (max_price + 0.5) / low_ratio, 'right'))
+        elif sort_by == 'rating':
+            order = self.by_rating
+            end = len(order) if min_rating is None else int(np.searchsorted(self.sorted_neg_rating, -min_rating + _EPSILON, 'right'))
+        else:
+            order = self.by_distance
+            end = len(order) if max_distance_km is None else int(np.searchsorted(self.sorted_distance, max_distance_km + _EPSILON, 'right'))
+
+        chunk = max(64, 4 * limit)
+        remaining = limit
+        found: List[Tuple[int, int]] = []  # sort_by='price': max-heap of (-price, -position)
+        for start in range(0, end, chunk):
+            positions = order[start:min(end, start + chunk)]
+            if sort_by == 'price' and found:
+                # Every remaining hotel costs at least base * low_ratio (before
+                # rounding), so cheaper results found so far are final; once
+                # the heap is full and all of it is below the floor, this
+                # settles the last results and ends the walk
+                floor = self.sorted_price[start] * low_ratio - 0.5
+                settled = sorted(item for item in found if -item[0] < floor)
+                for neg_price, neg_position in reversed(settled):
+                    yield -neg_position, -neg_price
+                remaining -= len(settled)
+                if remaining == 0:
+                    return
+                if settled:
+                    found = [item for item in found if -item[0] >= floor]
+                    heapq.heapify(found)
+            prices = np.rint(hotels.base_price[positions] * (1.0 + hotels.price_sensitivity[positions] * factor)).astype(np.int64)
+            mask = np.ones(len(positions), dtype=bool)
+            if max_price is not None:
+                mask &= prices <= max_price
+            if min_rating is not None:
+                mask &= hotels.rating[positions] >= min_rating - _EPSILON
+            if max_distance_km is not None:
+                mask &= hotels.distance_km[positions] <= max_distance_km + _EPSILON
+            if amenities:
+                mask &= (hotels.amenities[positions] & amenities) == amenities
+            matched = np.flatnonzero(mask)
+            if sort_by == 'price':
+                for j in matched:
+                    item = (-int(prices[j]), -int(positions[j]))
+                    if len(found) < remaining:
+                        heapq.heappush(found, item)
+                    elif item > found[0]:
+                        heapq.heapreplace(found, item)
+            else:
+                for j in matched[:remaining]:
+                    yield int(positions[j]), int(prices[j])
+                remaining -= min(len(matched), remaining)
+                if remaining == 0:
+                    return
+
+        for neg_price, neg_position in sorted(found, reverse=True):
+            yield -neg_position, -neg_price
+
+_INDEXES = LRUCache(INVENTORY_CONFIG["cached_destinations"])
+_INDEX_LOCK = threading.Lock()
+
+def get_hotel_index(destination: str) -> HotelIndex:
+    """Get the index for a city, (re)building it when its inventory changes"""
+    hotels = get_hotel_inventory(destination)
+    key = destination_key(destination)
+    index = _INDEXES.get(key)
+    if index is None or index.hotels is not hotels:
+        with _INDEX_LOCK:
+            index = _INDEXES.get(key)
+            if index is None or index.hotels is not hotels:
+                index = _INDEXES.put(key, HotelIndex(hotels))
+    return index
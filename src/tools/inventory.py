@@ -0,0 +1,329 @@
+"""
+Synthetic travel inventory for TripCraft AI
+
+Builds a columnar (NumPy) dataset of flights per route and hotels per city
+so the search tools query a realistic, production-sized inventory instead
+of inventing a couple of dicts per call. Each destination's columns are
+generated with NumPy from its own seed, so a destination always gets the
+same inventory; catalog destinations are built together on first use,
+others when first asked for.
+Prices vary by date through a seasonal/weekday factor, so the same dataset
+answers any date range.
+"""
+import threading
+import zlib
+from collections import OrderedDict
+from datetime import date
+from typing import Dict, Any, Hashable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from config import logger, INVENTORY_CONFIG
+from utils.gazetteer import get_gazetteer
+from .records import FlightRecord, HotelRecord, names_for, interned_label
+
+# Destination catalog: typical round-trip fare, nightly hotel rate and region
+DESTINATIONS = {
+    'tokyo': {'name': 'Tokyo', 'flight_base': 800, 'hotel_base': 120, 'region': 'Asia', 'lat': 35.6812, 'lon': 139.7671},
+    'paris': {'name': 'Paris', 'flight_base': 650, 'hotel_base': 95, 'region': 'Europe', 'lat': 48.8566, 'lon': 2.3522},
+    'london': {'name': 'London', 'flight_base': 600, 'hotel_base': 110, 'region': 'Europe', 'lat': 51.5074, 'lon': -0.1278},
+    'bangkok': {'name': 'Bangkok', 'flight_base': 450, 'hotel_base': 25, 'region': 'Asia', 'lat': 13.7563, 'lon': 100.5018},
+    'singapore': {'name': 'Singapore', 'flight_base': 500, 'hotel_base': 80, 'region': 'Asia', 'lat': 1.2868, 'lon': 103.8545},
+    'sydney': {'name': 'Sydney', 'flight_base': 900, 'hotel_base': 130, 'region': 'Oceania', 'lat': -33.8688, 'lon': 151.2093},
+    'dubai': {'name': 'Dubai', 'flight_base': 550, 'hotel_base': 90, 'region': 'Middle East', 'lat': 25.2048, 'lon': 55.2708},
+    'mumbai': {'name': 'Mumbai', 'flight_base': 400, 'hotel_base': 35, 'region': 'Asia', 'lat': 18.9400, 'lon': 72.8350}
+}
+# Base rates of destinations outside the catalog
+DEFAULT_FLIGHT_BASE = 600
+DEFAULT_HOTEL_BASE = 100
+
+AIRLINES = ['Emirates', 'Singapore Airlines', 'Qatar Airways', 'Lufthansa', 'British Airways']
+AIRCRAFT = ['Boeing 777', 'Airbus A350', 'Boeing 787']
+FLIGHT_AMENITIES = ['WiFi', 'Meals', 'Entertainment', 'Power']
+HOTEL_CHAINS = ['Marriott', 'Hilton', 'Hyatt', 'InterContinental', 'Sheraton']
+HOTEL_AMENITIES = [
+    'WiFi', 'Pool', 'Gym', 'Spa', 'Restaurant', 'Bar',
+    'Room Service', 'Concierge', 'Business Center'
+]
+
+# Kilometres per degree of latitude (and of longitude at the equator)
+KM_PER_DEGREE = 111.32
+
+def destination_key(destination: str) -> str:
+    """Cache key form of a destination name ("  New  York " -> "new york")"""
+    return " ".join(destination.split()).lower()
+
+class LRUCache:
+    """Thread-safe mapping bounded to max_entries, least recently used dropped first"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value: Any) -> Any:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > max(1, self.max_entries):
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def __iter__(self) -> Iterator[Hashable]:
+        with self._lock:
+            return iter(list(self._entries))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+def city_center(destination: str) -> Tuple[float, float]:
+    """Latitude and longitude of a city center
+
+    Destinations outside the catalog are looked up in the gazetteer;
+    places it does not know get a stable made-up position.
+    """
+    known = DESTINATIONS.get(destination_key(destination))
+    if known is not None:
+        return known['lat'], known['lon']
+    place = get_gazetteer().lookup(destination)
+    if place is not None:
+        return place.lat, place.lon
+    code = zlib.crc32(destination.lower().encode("utf-8"))
+    return (code % 11000) / 100.0 - 50.0, (code // 11000 % 36000) / 100.0 - 180.0
+
+def expand_destination(destination: str) -> List[str]:
+    """Expand a region ("Asia") or "anywhere" into catalog destination names
+
+    Other names are returned unchanged as a single destination.
+    """
+    key = destination_key(destination)
+    if key in ('anywhere', 'everywhere', 'any'):
+        return [d['name'] for d in DESTINATIONS.values()]
+    in_region = [d['name'] for d in DESTINATIONS.values() if d['region'].lower() == key]
+    return in_region or [destination]
+
+def parse_date(value: str) -> np.datetime64:
+    """Parse a YYYY-MM-DD date, falling back to today for unparseable input"""
+    try:
+        return np.datetime64(str(value)[:10], 'D')
+    except ValueError:
+        logger.warning(f"[inventory] could not parse date {value!r}, using today")
+        return np.datetime64(date.today(), 'D')
+
+def season_factor(days: np.ndarray) -> np.ndarray:
+    """Relative price change for each date: yearly season plus weekend premium"""
+    days = np.asarray(days, dtype='datetime64[D]')
+    day_of_year = (days - days.astype('datetime64[Y]')).astype(np.int64)
+    # 1970-01-01 was a Thursday; weekday 0 = Monday
+    weekday = (days.astype(np.int64) + 3) % 7
+    seasonal = 0.15 * np.sin(2 * np.pi * (day_of_year - 80) / 365.0)
+    weekend = np.where(weekday >= 4, 0.08, 0.0)
+    return seasonal + weekend
+
+def mask_to_names(mask: int, names: List[str]) -> List[str]:
+    """Names of the bits set in mask"""
+    return [name for bit, name in enumerate(names) if mask >> bit & 1]
+
+def _random_masks(rng: np.random.Generator, shape, n_names: int, n_set: int) -> np.ndarray:
+    """Bitmasks with exactly n_set of n_names bits set"""
+    order = np.argsort(rng.random(shape + (n_names,)), axis=-1)[..., :n_set]
+    return np.sum(np.left_shift(1, order), axis=-1).astype(np.int32)
+
+def cheapest(prices: np.ndarray, limit: int, mask: Optional[np.ndarray] = None) -> np.ndarray:
+    """Indices of the limit cheapest entries (optionally among mask), sorted by price"""
+    candidates = np.flatnonzero(mask) if mask is not None else np.arange(len(prices))
+    if limit <= 0:
+        return candidates[:0]
+    if len(candidates) > limit:
+        candidates = candidates[np.argpartition(prices[candidates], limit - 1)[:limit]]
+    return candidates[np.argsort(prices[candidates], kind='stable')]
+
+class FlightInventory:
+    """Columnar flights for one route (origin -> destination)"""
+
+    def __init__(self, destination: str, columns: Dict[str, np.ndarray]):
+        self.destination = destination
+        self.airline = columns['airline']
+        self.aircraft = columns['aircraft']
+        self.base_price = columns['base_price']
+        self.price_sensitivity = columns['price_sensitivity']
+        self.duration_min = columns['duration_min']
+        self.stops = columns['stops']
+        self.depart_hour = columns['depart_hour']
+        self.refundable = columns['refundable']
+        self.amenities = columns['amenities']
+
+    def __len__(self) -> int:
+        return len(self.base_price)
+
+    def prices(self, depart: np.datetime64, return_: np.datetime64) -> np.ndarray:
+        """Round-trip fare of every flight for the given dates"""
+        factor = (season_factor(depart) + season_factor(return_)) / 2.0
+        return np.rint(self.base_price * (1.0 + self.price_sensitivity * factor)).astype(np.int64)
+
+    def record(self, i: int, price: int, depart: np.datetime64) -> FlightRecord:
+        """One flight in the tool result format, as a compact record"""
+        departure = int(depart.astype('datetime64[m]').astype(np.int64)) + int(self.depart_hour[i]) * 60
+        return FlightRecord(
+            self.destination, int(i), AIRLINES[self.airline[i]], AIRCRAFT[self.aircraft[i]], int(price),
+            int(self.duration_min[i]), int(self.stops[i]), departure, bool(self.refundable[i]),
+            names_for(int(self.amenities[i]), FLIGHT_AMENITIES)
+        )
+
+class HotelInventory:
+    """Columnar hotels for one city"""
+
+    def __init__(self, destination: str, columns: Dict[str, np.ndarray]):
+        self.destination = destination
+        self.chain = columns['chain']
+        self.rating = columns['rating']
+        self.base_price = columns['base_price']
+        self.price_sensitivity = columns['price_sensitivity']
+        self.distance_km = columns['distance_km']
+        self.district = columns['district']
+        self.amenities = columns['amenities']
+        self.beds = columns['beds']
+        self.size_sqm = columns['size_sqm']
+        self.pets = columns['pets']
+        self.lat = columns['lat']
+        self.lon = columns['lon']
+
+    def __len__(self) -> int:
+        return len(self.base_price)
+
+    def nightly_prices(self, checkin: np.datetime64, checkout: np.datetime64) -> np.ndarray:
+        """Average nightly rate of every hotel for the stay"""
+        nights = max(1, int((checkout - checkin).astype(np.int64)))
+        factor = float(np.mean(season_factor(checkin + np.arange(nights))))
+        return np.rint(self.base_price * (1.0 + self.price_sensitivity * factor)).astype(np.int64)
+
+    def record(self, i: int, price: int, guests: int) -> HotelRecord:
+        """One hotel in the tool result format, as a compact record"""
+        return HotelRecord(
+            self.destination, int(i), interned_label(HOTEL_CHAINS[self.chain[i]], self.destination),
+            round(float(self.rating[i]), 1), int(price), round(float(self.distance_km[i]), 1),
+            int(self.district[i]), names_for(int(self.amenities[i]), HOTEL_AMENITIES),
+            int(self.beds[i]), int(self.size_sqm[i]), bool(self.pets[i]), guests,
+            round(float(self.lat[i]), 5), round(float(self.lon[i]), 5)
+        )
+
+def _generate(rng: np.random.Generator, flight_bases: np.ndarray, hotel_bases: np.ndarray, centers: np.ndarray,
+              n_flights: int, n_hotels: int) -> List[Dict[str, Dict[str, np.ndarray]]]:
+    """Generate flight and hotel columns for several destinations in one pass"""
+    n_dest = len(flight_bases)
+    f_shape = (n_dest, n_flights)
+    stops = rng.choice([0, 1, 2], size=f_shape, p=[0.45, 0.45, 0.10]).astype(np.int8)
+    duration = (rng.integers(8 * 60, 16 * 60, size=f_shape) + stops * rng.integers(60, 240, size=f_shape)).astype(np.int32)
+    # Non-stop and shorter flights cost more
+    flight_price = flight_bases[:, None] * rng.uniform(0.85, 1.3, size=f_shape) * (1.0 + 0.08 * (stops == 0))
+    flights = {
+        'airline': rng.integers(0, len(AIRLINES), size=f_shape).astype(np.int8),
+        'aircraft': rng.integers(0, len(AIRCRAFT), size=f_shape).astype(np.int8),
+        'base_price': flight_price.astype(np.float32),
+        'price_sensitivity': rng.uniform(0.5, 1.5, size=f_shape).astype(np.float32),
+        'duration_min': duration,
+        'stops': stops,
+        'depart_hour': rng.integers(6, 24, size=f_shape).astype(np.int8),
+        'refundable': rng.random(f_shape) < 0.5,
+        'amenities': _random_masks(rng, f_shape, len(FLIGHT_AMENITIES), 3)
+    }
+
+    h_shape = (n_dest, n_hotels)
+    rating = np.round(3.5 + rng.random(h_shape) * 1.5, 1)
+    distance = np.round(rng.gamma(2.0, 1.5, size=h_shape) + 0.2, 1)
+    # Better rated, central hotels cost more
+    spread = np.clip(rng.lognormal(0.0, 0.25, size=h_shape), 0.6, 2.5)
+    hotel_price = hotel_bases[:, None] * spread * (0.85 + 0.2 * (rating - 3.5)) * (1.1 - 0.03 * np.minimum(distance, 5))
+    hotels = {
+        'chain': rng.integers(0, len(HOTEL_CHAINS), size=h_shape).astype(np.int8),
+        'rating': rating.astype(np.float32),
+        'base_price': np.maximum(hotel_price, 20).astype(np.float32),
+        'price_sensitivity': rng.uniform(0.5, 1.5, size=h_shape).astype(np.float32),
+        'distance_km': distance.astype(np.float32),
+        'district': (np.minimum(distance, 9.9) // 1.5 + 1).astype(np.int8),
+        'amenities': _random_masks(rng, h_shape, len(HOTEL_AMENITIES), 5),
+        'beds': rng.integers(1, 3, size=h_shape).astype(np.int8),
+        'size_sqm': rng.integers(25, 41, size=h_shape).astype(np.int16),
+        'pets': rng.random(h_shape) < 0.5
+    }
+    # Place each hotel at its distance from the center in a random direction
+    bearing = rng.uniform(0.0, 2 * np.pi, size=h_shape)
+    center_lat, center_lon = centers[:, 0:1], centers[:, 1:2]
+    hotels['lat'] = center_lat + distance * np.cos(bearing) / KM_PER_DEGREE
+    hotels['lon'] = center_lon + distance * np.sin(bearing) / (KM_PER_DEGREE * np.cos(np.radians(center_lat)))
+    return [
+        {'flights': {k: v[d] for k, v in flights.items()}, 'hotels': {k: v[d] for k, v in hotels.items()}}
+        for d in range(n_dest)
+    ]
+
+# Inventories per destination_key, the least recently used dropped past the bound
+_FLIGHTS = LRUCache(INVENTORY_CONFIG["cached_destinations"])
+_HOTELS = LRUCache(INVENTORY_CONFIG["cached_destinations"])
+_INVENTORY_LOCK = threading.Lock()
+
+def build_inventory(destinations: Optional[List[str]] = None) -> None:
+    """Generate inventory for several destinations
+
+    Every destination has its own generator, seeded from the destination
+    key, so it gets the same inventory whether it is built alone or with
+    others, and again after being evicted.
+
+    Args:
+        destinations: Destination names (defaults to the whole catalog)
+    """
+    names = destinations or [d['name'] for d in DESTINATIONS.values()]
+    for name in names:
+        key = destination_key(name)
+        known = DESTINATIONS.get(key, {})
+        rng = np.random.default_rng(INVENTORY_CONFIG["seed"] + zlib.crc32(key.encode("utf-8")))
+        columns = _generate(rng, np.array([known.get('flight_base', DEFAULT_FLIGHT_BASE)], dtype=np.float64),
+                            np.array([known.get('hotel_base', DEFAULT_HOTEL_BASE)], dtype=np.float64),
+                            np.array([city_center(name)], dtype=np.float64),
+                            INVENTORY_CONFIG["flights_per_route"], INVENTORY_CONFIG["hotels_per_city"])[0]
+        _FLIGHTS.put(key, FlightInventory(name, columns['flights']))
+        _HOTELS.put(key, HotelInventory(name, columns['hotels']))
+    logger.info(f"[inventory] built {len(names)} destinations ({INVENTORY_CONFIG['flights_per_route']} flights, {INVENTORY_CONFIG['hotels_per_city']} hotels each)")
+
+def _ensure(destination: str) -> Tuple[FlightInventory, HotelInventory]:
+    key = destination_key(destination)
+    flights, hotels = _FLIGHTS.get(key), _HOTELS.get(key)
+    if flights is not None and hotels is not None:
+        return flights, hotels
+    with _INVENTORY_LOCK:
+        if not _FLIGHTS:
+            build_inventory()
+        flights, hotels = _FLIGHTS.get(key), _HOTELS.get(key)
+        if flights is None or hotels is None:
+            build_inventory([destination.strip()])
+            flights, hotels = _FLIGHTS.get(key), _HOTELS.get(key)
+    return flights, hotels
+
+def get_flight_inventory(destination: str) -> FlightInventory:
+    """Get the flight inventory for a destination, building it on first use"""
+    return _ensure(destination)[0]
+
+def get_hotel_inventory(destination: str) -> HotelInventory:
+    """Get the hotel inventory for a city, building it on first use"""
+    return _ensure(destination)[1]
+
+def reset_inventory() -> None:
+    """Drop all generated inventory (rebuilt lazily on next use)"""
+    with _INVENTORY_LOCK:
+        _FLIGHTS.clear()
+        _HOTELS.clear()
@@ -0,0 +1,94 @@
+"""
+Flexible-date price calendar for TripCraft AI
+
+Computes the cheapest flight, hotel and total for every departure date in
+a window and every trip length in a range in one vectorized pass. Both
+flight and average nightly hotel prices have the form
+base * (1 + sensitivity * factor), where the factor depends only on the
+dates, so each grid cell only needs that factor: the flight factor is the
+mean of the departure and return day factors, and the hotel factor is a
+difference of cumulative sums over the nights of the stay.
+"""
+from typing import Dict, Any, Optional, Tuple
+
+import numpy as np
+
+from .inventory import FlightInventory, HotelInventory, season_factor
+
+# Inventory rows priced at once; bounds temporary memory to rows x cells
+_ROW_CHUNK = 2048
+
+def lowest_prices(base: np.ndarray, sensitivity: np.ndarray, factors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Lowest rounded price and its row for every factor in a grid
+
+    Args:
+        base: Base price per inventory row
+        sensitivity: Price sensitivity per inventory row
+        factors: Grid of date factors
+
+    Returns:
+        (lowest price, inventory row) arrays shaped like factors
+    """
+    flat = factors.ravel()
+    best = np.full(flat.shape, np.inf)
+    best_row = np.zeros(flat.shape, dtype=np.int64)
+    columns = np.arange(len(flat))
+    for start in range(0, len(base), _ROW_CHUNK):
+        prices = base[start:start + _ROW_CHUNK, None] * (1.0 + sensitivity[start:start + _ROW_CHUNK, None] * flat[None, :])
+        rows = prices.argmin(axis=0)
+        values = prices[rows, columns]
+        better = values < best
+        best[better] = values[better]
+        best_row[better] = rows[better] + start
+    return np.rint(best).astype(np.int64).reshape(factors.shape), best_row.reshape(factors.shape)
+
+def build_price_calendar(flights: FlightInventory, hotels: HotelInventory, depart: np.datetime64,
+                         flex_days: int, min_nights: int, max_nights: int,
+                         min_rating: Optional[float] = None) -> Dict[str, np.ndarray]:
+    """Price every (departure date, trip length) pair
+
+    Args:
+        flights: Flight inventory for the route
+        hotels: Hotel inventory for the city
+        depart: Center of the departure window
+        flex_days: Departures from depart - flex_days to depart + flex_days
+        min_nights: Shortest trip length
+        max_nights: Longest trip length
+        min_rating: Only consider hotels with at least this rating
+
+    Returns:
+        Dictionary of arrays: departures (D,), nights (L,) and, shaped (D, L),
+        flight_price, flight_row, hotel_price (per night), hotel_row and total
+    """
+    departures = depart + np.arange(-flex_days, flex_days + 1)
+    nights = np.arange(max(1, min_nights), max(1, min_nights, max_nights) + 1)
+    # Day factors from the first departure to the last possible return
+    days = season_factor(departures[0] + np.arange(len(departures) + nights[-1]))
+    cumulative = np.concatenate(([0.0], np.cumsum(days)))
+    start = np.arange(len(departures))[:, None]
+    end = start + nights[None, :]
+
+    flight_factors = (days[start] + days[end]) / 2.0
+    hotel_factors = (cumulative[end] - cumulative[start]) / nights[None, :]
+
+    flight_price, flight_row = lowest_prices(flights.base_price, flights.price_sensitivity, flight_factors)
+    if min_rating is not None:
+        candidates = np.flatnonzero(hotels.rating >= min_rating - 1e-4)
+    else:
+        candidates = np.arange(len(hotels))
+    if len(candidates):
+        hotel_price, hotel_row = lowest_prices(hotels.base_price[candidates], hotels.price_sensitivity[candidates], hotel_factors)
+        hotel_row = candidates[hotel_row]
+    else:
+        hotel_price = np.zeros(hotel_factors.shape, dtype=np.int64)
+        hotel_row = np.full(hotel_factors.shape, -1, dtype=np.int64)
+
+    return {
+        'departures': departures,
+        'nights': nights,
+        'flight_price': flight_price,
+        'flight_row': flight_row,
+        'hotel_price': hotel_price,
+        'hotel_row': hotel_row,
+        'total': flight_price + hotel_price * nights[None, :]
+    }
@@ -0,0 +1,97 @@
+"""
+Flight and hotel result records for TripCraft AI
+
+FlightRecord and HotelRecord hold one search result in a few slots: the
+airline, chain and amenity strings are shared across every record, and
+times are stored as minutes. They read like the tool result dicts (see
+utils.records.Record); dates, the "12h 5m" duration text, addresses and
+the nested fare/room/policy parts are only built when read.
+"""
+import sys
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Tuple
+
+from utils.records import Record
+
+_EPOCH = datetime(1970, 1, 1)
+_NAMES: Dict[Tuple[int, int], Tuple[str, ...]] = {}
+_LABELS: Dict[Tuple[str, str], str] = {}
+
+def names_for(mask: int, names: List[str]) -> Tuple[str, ...]:
+    """Shared tuple of the names of the bits set in mask"""
+    key = (id(names), mask)
+    found = _NAMES.get(key)
+    if found is None:
+        found = _NAMES[key] = tuple(name for bit, name in enumerate(names) if mask >> bit & 1)
+    return found
+
+def interned_label(*parts: str) -> str:
+    """Shared string for a label built from parts, e.g. a hotel name"""
+    found = _LABELS.get(parts)
+    if found is None:
+        found = _LABELS[parts] = sys.intern(" ".join(parts))
+    return found
+
+def format_duration(minutes: int) -> str:
+    """Duration text like "12h 5m" """
+    return f"{minutes // 60}h {minutes % 60}m"
+
+def _timestamp(minutes: int) -> str:
+    return (_EPOCH + timedelta(minutes=minutes)).isoformat()
+
+class FlightRecord(Record):
+    """One priced flight
+
+    departure_min is the departure time in minutes since 1970-01-01.
+    """
+    __slots__ = ('destination', 'index', 'airline', 'aircraft', 'price', 'duration_min',
+                 'stops', 'departure_min', 'refundable', 'amenities')
+
+    @property
+    def id(self) -> str:
+        return f'FL-{self.destination.upper()}-{self.index + 1}'
+
+    KEYS = {
+        'id': lambda r: r.id,
+        'airline': lambda r: r.airline,
+        'price': lambda r: r.price,
+        'duration': lambda r: format_duration(r.duration_min),
+        'duration_min': lambda r: r.duration_min,
+        'aircraft': lambda r: r.aircraft,
+        'departure': lambda r: {'airport': 'Origin Airport', 'datetime': _timestamp(r.departure_min)},
+        'arrival': lambda r: {'airport': f'{r.destination} International',
+                              'datetime': _timestamp(r.departure_min + r.duration_min)},
+        'stops': lambda r: r.stops,
+        'cabin': lambda r: 'economy',
+        'fare': lambda r: {'amount': r.price, 'currency': 'USD', 'refundable': r.refundable, 'baggage': '1x23kg'},
+        'amenities': lambda r: r.amenities
+    }
+
+class HotelRecord(Record):
+    """One priced hotel for a stay"""
+    __slots__ = ('destination', 'index', 'name', 'rating', 'price', 'distance_km', 'district',
+                 'amenities', 'beds', 'size_sqm', 'pets', 'guests', 'lat', 'lon')
+
+    @property
+    def id(self) -> str:
+        return f'HT-{self.destination.upper()}-{self.index + 1}'
+
+    KEYS = {
+        'id': lambda r: r.id,
+        'name': lambda r: r.name,
+        'rating': lambda r: r.rating,
+        'price_per_night': lambda r: r.price,
+        'currency': lambda r: 'USD',
+        'address': lambda r: f'{r.destination} City Center, District {r.district}',
+        'distance_to_center_km': lambda r: r.distance_km,
+        'location': lambda r: {'lat': r.lat, 'lon': r.lon},
+        'amenities': lambda r: r.amenities,
+        'room_types': lambda r: [
+            {'type': 'Standard Room', 'beds': r.beds, 'max_guests': r.guests, 'size_sqm': r.size_sqm}
+        ],
+        'policies': lambda r: {
+            'cancellation': 'Free cancellation until 24h before check-in',
+            'payment': 'Pay at hotel or online',
+            'pets': 'Allowed' if r.pets else 'Not allowed'
+        }
+    }
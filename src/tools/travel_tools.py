@@ -10,13 +10,232 @@ except ImportError:
     # Fallback for development without ADK
     pass
 
-import random
+import asyncio
+import functools
+import hashlib
 from datetime import datetime
-from typing import Dict, Any, List
-from config import logger
+from typing import Dict, Any, AsyncIterator, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from config import logger, INVENTORY_CONFIG, TRAVEL_DEFAULTS, BUNDLE_CONFIG, AGGREGATION_CONFIG, GEO_CONFIG
 from utils.memory import save_memory, load_memory
+from utils.memory_store import FrozenDict, snapshot
+from utils.records import Record
+from utils.search_cache import cached_search, cache_lookup, cache_store
+from suppliers import get_supplier, run_sync
+from .inventory import (
+    DESTINATIONS, HOTEL_AMENITIES, get_flight_inventory, get_hotel_inventory, parse_date, cheapest,
+    expand_destination, mask_to_names, city_center, destination_key
+)
+from .price_calendar import build_price_calendar
+from .bundles import optimize_bundles
+from .aggregation_memo import AggregationMemo, get_aggregation_memo
+from .hotel_index import get_hotel_index, amenity_mask
+from .geo import get_poi_catalog, get_hotel_geo_index, proximity_scores
+
+def _public(value: Any) -> Any:
+    """API form of a tool result: records become plain dicts
+
+    Records stay internal (search cache, memory, aggregation memo), so
+    what the tools return is plain JSON-serializable data.
+    """
+    if isinstance(value, Record):
+        return value.to_dict()
+    if isinstance(value, dict):
+        return {key: _public(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(_public(item) for item in value)
+    return value
+
+def _normalize_destination(destination: str) -> str:
+    """Cache key form of a destination name"""
+    return destination_key(destination)
+
+async def _in_executor(func, *args, **kwargs):
+    """Run CPU-bound work in the default executor instead of on the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, functools.partial(func, *args, **kwargs))
+
+def _flight_source(destination: str, depart_date: str, return_date: str,
+                   limit: Optional[int]) -> Tuple[Iterator[Dict[str, Any]], int]:
+    """Cheapest flights for the search and the size of the route's inventory
+
+    Synchronous callers only (see _aflight_source). Flights come from the
+    supplier API in "http"/"fanout" supplier mode, otherwise the whole
+    local route is priced and flights are yielded cheapest first as
+    FlightRecords. Either way they are read-only, since they are shared
+    through the search cache.
+    """
+    count = limit or INVENTORY_CONFIG["max_results"]
+    supplier = get_supplier()
+    if supplier is not None:
+        return _supplier_options(run_sync(supplier.fetch_flights(destination, depart_date, return_date, count)), 'flights')
+    return _local_flights(destination, depart_date, return_date, count)
+
+async def _aflight_source(destination: str, depart_date: str, return_date: str,
+                          limit: Optional[int]) -> Tuple[Iterator[Dict[str, Any]], int]:
+    """Async variant of _flight_source for callers on an event loop
+
+    The supplier request is awaited on the caller's loop and local pricing
+    runs in the default executor, so the loop is never blocked.
+    """
+    count = limit or INVENTORY_CONFIG["max_results"]
+    supplier = get_supplier()
+    if supplier is not None:
+        return _supplier_options(await supplier.fetch_flights(destination, depart_date, return_date, count), 'flights')
+    return await _in_executor(_local_flights, destination, depart_date, return_date, count)
+
+def _supplier_options(response: Dict[str, Any], field: str) -> Tuple[Iterator[Dict[str, Any]], int]:
+    """Read-only options of a supplier response and its total_available"""
+    return (snapshot(option)[0] for option in response[field]), response['total_available']
+
+def _local_flights(destination: str, depart_date: str, return_date: str,
+                   count: int) -> Tuple[Iterator[Dict[str, Any]], int]:
+    """Price the whole local route and yield its cheapest flights"""
+    inventory = get_flight_inventory(destination)
+    depart, return_ = parse_date(depart_date), parse_date(return_date)
+    prices = inventory.prices(depart, return_)
+    flights = (inventory.record(i, prices[i], depart) for i in cheapest(prices, count))
+    return flights, len(inventory)
 
-def search_flights_ultimate(destination: str, depart_date: str, return_date: str, context) -> Dict[str, Any]:
+def _flight_options(destination: str, depart_date: str, return_date: str, limit: Optional[int]) -> Dict[str, Any]:
+    """All flight options for the search, as a read-only snapshot"""
+    flights, total_available = _flight_source(destination, depart_date, return_date, limit)
+    return FrozenDict({'flights': tuple(flights), 'total_available': total_available})
+
+def _hotel_source(destination: str, checkin: str, checkout: str, budget_per_night: float, guests: int,
+                  limit: Optional[int], min_rating: Optional[float], amenities: int,
+                  max_distance_km: Optional[float], sort_by: str) -> Tuple[Iterator[Dict[str, Any]], int]:
+    """Top hotels for the search and the size of the city's inventory
+
+    Hotels come from the supplier API in "http" supplier mode, otherwise
+    from the city's hotel index as their rank is settled. Hotels within
+    20% of the budget are preferred; if none match, the budget is dropped
+    and the other filters are kept.
+    """
+    count = limit or INVENTORY_CONFIG["max_results"]
+    supplier = get_supplier()
+    if supplier is not None:
+        response = run_sync(supplier.fetch_hotels(
+            destination, checkin, checkout, budget_per_night, guests, count,
+            min_rating, mask_to_names(amenities, HOTEL_AMENITIES), max_distance_km, sort_by
+        ))
+        return _supplier_options(response, 'hotels')
+    return _local_hotels(destination, checkin, checkout, budget_per_night, guests, count,
+                         min_rating, amenities, max_distance_km, sort_by)
+
+async def _ahotel_source(destination: str, checkin: str, checkout: str, budget_per_night: float, guests: int,
+                         limit: Optional[int], min_rating: Optional[float], amenities: int,
+                         max_distance_km: Optional[float], sort_by: str) -> Tuple[Iterator[Dict[str, Any]], int]:
+    """Async variant of _hotel_source, without blocking the event loop"""
+    count = limit or INVENTORY_CONFIG["max_results"]
+    supplier = get_supplier()
+    if supplier is not None:
+        response = await supplier.fetch_hotels(
+            destination, checkin, checkout, budget_per_night, guests, count,
+            min_rating, mask_to_names(amenities, HOTEL_AMENITIES), max_distance_km, sort_by
+        )
+        return _supplier_options(response, 'hotels')
+    return await _in_executor(_local_hotels, destination, checkin, checkout, budget_per_night, guests, count,
+                              min_rating, amenities, max_distance_km, sort_by)
+
+def _local_hotels(destination: str, checkin: str, checkout: str, budget_per_night: float, guests: int,
+                  count: int, min_rating: Optional[float], amenities: int,
+                  max_distance_km: Optional[float], sort_by: str) -> Tuple[Iterator[Dict[str, Any]], int]:
+    """Hotels of the city's index, yielded as their rank is settled"""
+    index = get_hotel_index(destination)
+    stay = (parse_date(checkin), parse_date(checkout))
+    filters = {'min_rating': min_rating, 'amenities': amenities, 'max_distance_km': max_distance_km,
+               'sort_by': sort_by, 'limit': count}
+
+    def ranked():
+        found = False
+        for i, price in index.iter_query(*stay, max_price=budget_per_night * 1.2, **filters):
+            found = True
+            yield index.hotels.record(i, price, guests)
+        if not found:
+            for i, price in index.iter_query(*stay, **filters):
+                yield index.hotels.record(i, price, guests)
+
+    return ranked(), len(index.hotels)
+
+def _hotel_options(destination: str, checkin: str, checkout: str, budget_per_night: float, guests: int,
+                   limit: Optional[int], min_rating: Optional[float], amenities: int,
+                   max_distance_km: Optional[float], sort_by: str) -> Dict[str, Any]:
+    """All hotel options for the search, as a read-only snapshot"""
+    hotels, total_available = _hotel_source(destination, checkin, checkout, budget_per_night, guests,
+                                            limit, min_rating, amenities, max_distance_km, sort_by)
+    return FrozenDict({'hotels': tuple(hotels), 'total_available': total_available})
+
+def _flight_key(destination: str, depart_date: str, return_date: str, limit: Optional[int]) -> tuple:
+    """Normalized flight search parameters"""
+    return (_normalize_destination(destination), str(parse_date(depart_date)), str(parse_date(return_date)),
+            limit or INVENTORY_CONFIG["max_results"])
+
+def _hotel_key(destination: str, checkin: str, checkout: str, budget_per_night: float, guests: int,
+               limit: Optional[int], min_rating: Optional[float], amenities: int,
+               max_distance_km: Optional[float], sort_by: str) -> tuple:
+    """Normalized hotel search parameters"""
+    return (_normalize_destination(destination), str(parse_date(checkin)), str(parse_date(checkout)),
+            round(float(budget_per_night), 2), int(guests), limit or INVENTORY_CONFIG["max_results"],
+            min_rating, amenities, max_distance_km, sort_by)
+
+def _search_flights(destination: str, depart_date: str, return_date: str, limit: Optional[int]) -> Dict[str, Any]:
+    """Flight options through the search cache"""
+    return cached_search(
+        'flights',
+        _flight_key(destination, depart_date, return_date, limit),
+        lambda: _flight_options(destination, depart_date, return_date, limit)
+    )
+
+def _search_hotels(destination: str, checkin: str, checkout: str, budget_per_night: float, guests: int,
+                   limit: Optional[int] = None, min_rating: Optional[float] = None, amenities: int = 0,
+                   max_distance_km: Optional[float] = None, sort_by: str = 'price') -> Dict[str, Any]:
+    """Hotel options through the search cache"""
+    args = (destination, checkin, checkout, budget_per_night, guests, limit, min_rating, amenities, max_distance_km, sort_by)
+    return cached_search('hotels', _hotel_key(*args), lambda: _hotel_options(*args))
+
+def _flight_result(destination: str, flights: List[Dict[str, Any]], total_available: int, context) -> Dict[str, Any]:
+    """Flight tool result for one search"""
+    return {
+        'status': 'success',
+        'destination': destination,
+        'flights': flights,
+        'total_available': total_available,
+        'search_context': {
+            'user_id': getattr(context, 'user_id', 'anonymous'),
+            'session_id': getattr(context, 'session_id', 'default'),
+            'timestamp': datetime.now().isoformat(),
+            'search_type': 'flight_search'
+        }
+    }
+
+def _hotel_result(destination: str, hotels: List[Dict[str, Any]], total_available: int, context,
+                  budget_per_night: float, guests: int, min_rating: Optional[float],
+                  amenities: Optional[List[str]], max_distance_km: Optional[float], sort_by: str) -> Dict[str, Any]:
+    """Hotel tool result for one search"""
+    return {
+        'status': 'success',
+        'destination': destination,
+        'hotels': hotels,
+        'total_available': total_available,
+        'search_context': {
+            'user_id': getattr(context, 'user_id', 'anonymous'),
+            'budget_per_night': budget_per_night,
+            'guests': guests,
+            'filters': {
+                'min_rating': min_rating,
+                'amenities': list(amenities or []),
+                'max_distance_km': max_distance_km,
+                'sort_by': sort_by
+            },
+            'timestamp': datetime.now().isoformat(),
+            'search_type': 'hotel_search'
+        }
+    }
+
+def search_flights_ultimate(destination: str, depart_date: str, return_date: str, context, limit: Optional[int] = None) -> Dict[str, Any]:
     """
     Advanced flight search with multi-parameter filtering
     
@@ -25,6 +244,7 @@ def search_flights_ultimate(destination: str, depart_date: str, return_date: str
         depart_date: Departure date
         return_date: Return date
         context: Tool context with user information
+        limit: Maximum number of flights (defaults to INVENTORY_CONFIG["max_results"])
         
     Returns:
         Dictionary with flight search results
@@ -32,62 +252,18 @@ def search_flights_ultimate(destination: str, depart_date: str, return_date: str
     user_id = getattr(context, 'user_id', 'anonymous')
     logger.info(f"[search_flights_ultimate] user={user_id} {destination}->{depart_date} {return_date} passengers=1")
     
-    # Mock flight data with realistic pricing
-    base_prices = {
-        'tokyo': 800, 'paris': 650, 'london': 600, 'bangkok': 450,
-        'singapore': 500, 'sydney': 900, 'dubai': 550, 'mumbai': 400
-    }
-    
-    base_price = base_prices.get(destination.lower(), 600)
-    
-    flights = []
-    airlines = ['Emirates', 'Singapore Airlines', 'Qatar Airways', 'Lufthansa', 'British Airways']
-    
-    for i in range(2):
-        price = base_price + random.randint(-100, 200)
-        flights.append({
-            'id': f'FL-{destination.upper()}-{i+1}',
-            'airline': random.choice(airlines),
-            'price': price,
-            'duration': f"{random.randint(8, 16)}h {random.randint(0, 59)}m",
-            'aircraft': random.choice(['Boeing 777', 'Airbus A350', 'Boeing 787']),
-            'departure': {
-                'airport': 'Origin Airport',
-                'datetime': f'{depart_date}T{random.randint(6, 23):02d}:00:00'
-            },
-            'arrival': {
-                'airport': f'{destination} International',
-                'datetime': f'{depart_date}T{random.randint(6, 23):02d}:00:00'
-            },
-            'stops': random.choice([0, 1]),
-            'cabin': 'economy',
-            'fare': {
-                'amount': price,
-                'currency': 'USD',
-                'refundable': random.choice([True, False]),
-                'baggage': '1x23kg'
-            },
-            'amenities': random.sample(['WiFi', 'Meals', 'Entertainment', 'Power'], 3)
-        })
-    
-    result = {
-        'status': 'success',
-        'destination': destination,
-        'flights': flights,
-        'search_context': {
-            'user_id': user_id,
-            'session_id': getattr(context, 'session_id', 'default'),
-            'timestamp': datetime.now().isoformat(),
-            'search_type': 'flight_search'
-        }
-    }
+    options = _search_flights(destination, depart_date, return_date, limit)
+    result = _flight_result(destination, list(options['flights']), options['total_available'], context)
     
     # Save to memory
     save_memory(f"flight_search_{destination}", result, user_id)
     
-    return result
+    return _public(result)
 
-def find_hotels_ultimate(destination: str, checkin: str, checkout: str, budget_per_night: float, guests: int, context) -> Dict[str, Any]:
+def find_hotels_ultimate(destination: str, checkin: str, checkout: str, budget_per_night: float, guests: int, context,
+                         limit: Optional[int] = None, min_rating: Optional[float] = None,
+                         amenities: Optional[List[str]] = None, max_distance_km: Optional[float] = None,
+                         sort_by: str = 'price') -> Dict[str, Any]:
     """
     Intelligent accommodation discovery with budget optimization
     
@@ -98,6 +274,11 @@ def find_hotels_ultimate(destination: str, checkin: str, checkout: str, budget_p
         budget_per_night: Budget per night
         guests: Number of guests
         context: Tool context
+        limit: Maximum number of hotels (defaults to INVENTORY_CONFIG["max_results"])
+        min_rating: Minimum hotel rating
+        amenities: Amenities every hotel must have, e.g. ['Pool', 'Gym']
+        max_distance_km: Maximum distance to the city center
+        sort_by: 'price' (cheapest first), 'rating' (best first) or 'distance' (closest first)
         
     Returns:
         Dictionary with hotel search results
@@ -105,64 +286,496 @@ def find_hotels_ultimate(destination: str, checkin: str, checkout: str, budget_p
     user_id = getattr(context, 'user_id', 'anonymous')
     logger.info(f"[find_hotels_ultimate] user={user_id} destination={destination} {checkin}->{checkout} budget={budget_per_night}")
     
-    # Mock hotel data with location-based pricing
-    base_prices = {
-        'tokyo': 120, 'paris': 95, 'london': 110, 'bangkok': 25,
-        'singapore': 80, 'sydney': 130, 'dubai': 90, 'mumbai': 35
+    options = _search_hotels(destination, checkin, checkout, budget_per_night, guests, limit,
+                             min_rating, amenity_mask(amenities), max_distance_km, sort_by)
+    result = _hotel_result(destination, list(options['hotels']), options['total_available'], context,
+                           budget_per_night, guests, min_rating, amenities, max_distance_km, sort_by)
+    
+    # Save to memory
+    save_memory(f"hotel_search_{destination}", result, user_id)
+
+    return _public(result)
+
+def _reference_points(destination: str, attractions: Optional[List[str]]) -> Tuple[Tuple[Tuple[str, float, float], ...], List[str]]:
+    """Resolve attraction names to (name, lat, lon), falling back to the city center
+
+    Returns:
+        Tuple of (reference points, names not found in the city's catalog)
+    """
+    catalog = get_poi_catalog(destination)
+    points, unknown = [], []
+    for name in attractions or ():
+        i = catalog.find(name)
+        if i is None:
+            unknown.append(name)
+        elif catalog.names[i] not in [p[0] for p in points]:
+            points.append((catalog.names[i], float(catalog.lat[i]), float(catalog.lon[i])))
+    if not points:
+        points.append(('City center', *city_center(destination)))
+    return tuple(points), unknown
+
+def _proximity_options(destination: str, checkin: str, checkout: str, budget_per_night: float, guests: int,
+                       points: Tuple[Tuple[str, float, float], ...], radius_km: Optional[float],
+                       limit: Optional[int]) -> Dict[str, Any]:
+    """Hotels closest on average to the reference points, as a read-only snapshot
+
+    With a radius only hotels within radius_km of at least one point are
+    considered (looked up in the hotel grid index), otherwise all of the
+    city's hotels. Hotels within 20% of the budget are preferred; if none
+    match, the budget is dropped. Ties in distance go to the cheaper hotel.
+    """
+    count = limit or INVENTORY_CONFIG["max_results"]
+    hotels, index = get_hotel_geo_index(destination)
+    names = [name for name, _, _ in points]
+    point_lat = np.array([lat for _, lat, _ in points])
+    point_lon = np.array([lon for _, _, lon in points])
+    if radius_km is None:
+        candidates = np.arange(len(hotels))
+    else:
+        candidates = np.unique(np.concatenate([
+            index.within(lat, lon, radius_km)[0] for lat, lon in zip(point_lat, point_lon)
+        ]))
+    prices = hotels.nightly_prices(parse_date(checkin), parse_date(checkout))[candidates]
+    affordable = prices <= budget_per_night * 1.2
+    if affordable.any():
+        candidates, prices = candidates[affordable], prices[affordable]
+    mean_km, distances = proximity_scores(hotels.lat[candidates], hotels.lon[candidates], point_lat, point_lon)
+
+    results, proximity = [], []
+    for j in np.lexsort((prices, mean_km))[:count]:
+        record = hotels.record(int(candidates[j]), int(prices[j]), guests)
+        results.append(record)
+        proximity.append({
+            'hotel_id': record['id'],
+            'mean_distance_km': round(float(mean_km[j]), 2),
+            'distances_km': {name: round(float(d), 2) for name, d in zip(names, distances[j])}
+        })
+    return snapshot({
+        'hotels': tuple(results),
+        'proximity': tuple(proximity),
+        'candidates': len(candidates),
+        'total_available': len(hotels)
+    })[0]
+
+def find_hotels_near(destination: str, checkin: str, checkout: str, budget_per_night: float, guests: int, context,
+                     attractions: Optional[List[str]] = None, radius_km: Optional[float] = None,
+                     limit: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Hotels closest to the attractions the traveller wants to visit
+
+    Hotels are ranked by their average great-circle distance to the
+    attractions (the city center if none are known). Proximity search
+    always uses the local inventory and its geospatial index.
+
+    Args:
+        destination: Travel destination
+        checkin: Check-in date
+        checkout: Check-out date
+        budget_per_night: Budget per night
+        guests: Number of guests
+        context: Tool context
+        attractions: Attraction names, e.g. ['Senso-ji', 'Tokyo Tower'] (see find_attractions)
+        radius_km: Only consider hotels within this distance of an attraction
+        limit: Maximum number of hotels (defaults to INVENTORY_CONFIG["max_results"])
+
+    Returns:
+        Dictionary with hotels, their distance to every attraction and unknown attraction names
+    """
+    user_id = getattr(context, 'user_id', 'anonymous')
+    logger.info(f"[find_hotels_near] user={user_id} destination={destination} {checkin}->{checkout} attractions={attractions} radius={radius_km}")
+
+    points, unknown = _reference_points(destination, attractions)
+    if unknown:
+        logger.warning(f"[find_hotels_near] unknown attractions in {destination}: {unknown}")
+    key = (_normalize_destination(destination), str(parse_date(checkin)), str(parse_date(checkout)),
+           round(float(budget_per_night), 2), int(guests), points, radius_km, limit or INVENTORY_CONFIG["max_results"])
+    options = cached_search(
+        'hotels_near', key,
+        lambda: _proximity_options(destination, checkin, checkout, budget_per_night, guests, points, radius_km, limit)
+    )
+
+    result = {
+        'status': 'success',
+        'destination': destination,
+        'hotels': list(options['hotels']),
+        'proximity': list(options['proximity']),
+        'attractions': [{'name': name, 'location': {'lat': round(lat, 5), 'lon': round(lon, 5)}} for name, lat, lon in points],
+        'unknown_attractions': unknown,
+        'total_available': options['total_available'],
+        'search_context': {
+            'user_id': user_id,
+            'budget_per_night': budget_per_night,
+            'guests': guests,
+            'radius_km': radius_km,
+            'candidates': options['candidates'],
+            'timestamp': datetime.now().isoformat(),
+            'search_type': 'hotel_proximity_search'
+        }
     }
+
+    # Save to memory
+    save_memory(f"hotel_proximity_search_{destination}", result, user_id)
+
+    return _public(result)
+
+def find_attractions(destination: str, context, near: Optional[str] = None, radius_km: Optional[float] = None,
+                     k: Optional[int] = None, category: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Points of interest around a place in the destination
+
+    Args:
+        destination: Travel destination
+        context: Tool context
+        near: Attraction name or hotel id to search around (the city center if None)
+        radius_km: Return every attraction within this distance (closest first)
+        k: Without a radius, return the k closest attractions (defaults to GEO_CONFIG["geo_default_k"])
+        category: Only this category, one of landmark, museum, park, station, shopping, dining
+
+    Returns:
+        Dictionary with attractions closest first, each with its distance in km
+    """
+    user_id = getattr(context, 'user_id', 'anonymous')
+    logger.info(f"[find_attractions] user={user_id} destination={destination} near={near} radius={radius_km} category={category}")
+
+    catalog = get_poi_catalog(destination)
+    origin = None
+    if near is not None:
+        hotel = near.strip().upper()
+        prefix = f"HT-{destination.strip().upper()}-"
+        if hotel.startswith(prefix) and hotel[len(prefix):].isdigit():
+            hotels = get_hotel_inventory(destination)
+            i = int(hotel[len(prefix):]) - 1
+            if 0 <= i < len(hotels):
+                origin = (near, float(hotels.lat[i]), float(hotels.lon[i]))
+        else:
+            i = catalog.find(near)
+            if i is not None:
+                origin = (catalog.names[i], float(catalog.lat[i]), float(catalog.lon[i]))
+        if origin is None:
+            logger.warning(f"[find_attractions] unknown place {near!r} in {destination}, using the city center")
+    if origin is None:
+        origin = ('City center', *city_center(destination))
+
+    mask = catalog.category_mask(category)
+    if radius_km is not None:
+        positions, distances = catalog.index.within(origin[1], origin[2], radius_km, mask)
+    else:
+        positions, distances = catalog.index.nearest(origin[1], origin[2], k or GEO_CONFIG["geo_default_k"], mask)
+
+    return {
+        'status': 'success',
+        'destination': destination,
+        'origin': {'name': origin[0], 'location': {'lat': round(origin[1], 5), 'lon': round(origin[2], 5)}},
+        'attractions': [catalog.to_dict(i, d) for i, d in zip(positions, distances)],
+        'total_available': len(catalog),
+        'search_context': {
+            'user_id': user_id,
+            'radius_km': radius_km,
+            'category': category,
+            'timestamp': datetime.now().isoformat(),
+            'search_type': 'attraction_search'
+        }
+    }
+
+def stream_flights(destination: str, depart_date: str, return_date: str, context,
+                   limit: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Streaming variant of search_flights_ultimate: yield flights cheapest first
+    
+    Each flight is yielded as soon as it is priced. Once the stream is
+    exhausted the full result is cached and saved to memory exactly like
+    search_flights_ultimate; a stream closed early saves nothing.
+    
+    Args:
+        destination: Travel destination
+        depart_date: Departure date
+        return_date: Return date
+        context: Tool context with user information
+        limit: Maximum number of flights (defaults to INVENTORY_CONFIG["max_results"])
+        
+    Yields:
+        Flight dictionaries
+    """
+    user_id = getattr(context, 'user_id', 'anonymous')
+    logger.info(f"[stream_flights] user={user_id} {destination}->{depart_date} {return_date} passengers=1")
+    
+    key = _flight_key(destination, depart_date, return_date, limit)
+    cached = cache_lookup('flights', key)
+    if cached is not None:
+        source, total_available = cached['flights'], cached['total_available']
+    else:
+        source, total_available = _flight_source(destination, depart_date, return_date, limit)
+    flights = []
+    for flight in source:
+        flights.append(flight)
+        yield _public(flight)
     
-    base_price = base_prices.get(destination.lower(), budget_per_night)
+    if cached is None:
+        cache_store('flights', key, FrozenDict({'flights': tuple(flights), 'total_available': total_available}))
+    save_memory(f"flight_search_{destination}", _flight_result(destination, flights, total_available, context), user_id)
+
+def stream_hotels(destination: str, checkin: str, checkout: str, budget_per_night: float, guests: int, context,
+                  limit: Optional[int] = None, min_rating: Optional[float] = None,
+                  amenities: Optional[List[str]] = None, max_distance_km: Optional[float] = None,
+                  sort_by: str = 'price') -> Iterator[Dict[str, Any]]:
+    """
+    Streaming variant of find_hotels_ultimate: yield hotels in ranking order
     
+    Each hotel is yielded as soon as its rank is settled. The full result
+    is cached and saved to memory once the stream is exhausted.
+    
+    Args:
+        See find_hotels_ultimate
+        
+    Yields:
+        Hotel dictionaries
+    """
+    user_id = getattr(context, 'user_id', 'anonymous')
+    logger.info(f"[stream_hotels] user={user_id} destination={destination} {checkin}->{checkout} budget={budget_per_night}")
+    
+    args = (destination, checkin, checkout, budget_per_night, guests, limit,
+            min_rating, amenity_mask(amenities), max_distance_km, sort_by)
+    key = _hotel_key(*args)
+    cached = cache_lookup('hotels', key)
+    if cached is not None:
+        source, total_available = cached['hotels'], cached['total_available']
+    else:
+        source, total_available = _hotel_source(*args)
     hotels = []
-    hotel_chains = ['Marriott', 'Hilton', 'Hyatt', 'InterContinental', 'Sheraton']
-    
-    for i in range(2):
-        price = max(20, min(budget_per_night * 1.2, base_price + random.randint(-20, 40)))
-        hotels.append({
-            'id': f'HT-{destination.upper()}-{i+1}',
-            'name': f'{random.choice(hotel_chains)} {destination}',
-            'rating': round(3.5 + random.random() * 1.5, 1),
-            'price_per_night': int(price),
-            'currency': 'USD',
-            'address': f'{destination} City Center, District {i+1}',
-            'distance_to_center_km': round(0.5 + i * 1.5, 1),
-            'amenities': random.sample([
-                'WiFi', 'Pool', 'Gym', 'Spa', 'Restaurant', 'Bar', 
-                'Room Service', 'Concierge', 'Business Center'
-            ], 5),
-            'room_types': [
-                {
-                    'type': 'Standard Room',
-                    'beds': random.choice([1, 2]),
-                    'max_guests': guests,
-                    'size_sqm': random.randint(25, 40)
-                }
-            ],
-            'policies': {
-                'cancellation': 'Free cancellation until 24h before check-in',
-                'payment': 'Pay at hotel or online',
-                'pets': random.choice(['Allowed', 'Not allowed'])
-            }
-        })
+    for hotel in source:
+        hotels.append(hotel)
+        yield _public(hotel)
+    
+    if cached is None:
+        cache_store('hotels', key, FrozenDict({'hotels': tuple(hotels), 'total_available': total_available}))
+    result = _hotel_result(destination, hotels, total_available, context,
+                           budget_per_night, guests, min_rating, amenities, max_distance_km, sort_by)
+    save_memory(f"hotel_search_{destination}", result, user_id)
+
+_END = object()
+
+async def _aiterate(source: Iterator[Any]) -> AsyncIterator[Any]:
+    """Pull items of a lazily computed iterator in the executor, one at a time"""
+    while True:
+        item = await _in_executor(next, source, _END)
+        if item is _END:
+            return
+        yield item
+
+async def astream_flights(destination: str, depart_date: str, return_date: str, context,
+                          limit: Optional[int] = None) -> AsyncIterator[Dict[str, Any]]:
+    """Async iterator variant of stream_flights (same arguments)
+
+    Supplier requests are awaited on the caller's event loop and local
+    pricing runs in the default executor, so the loop is never blocked;
+    other tasks (e.g. a hotel stream) progress while flights arrive.
+    """
+    user_id = getattr(context, 'user_id', 'anonymous')
+    logger.info(f"[astream_flights] user={user_id} {destination}->{depart_date} {return_date} passengers=1")
+
+    key = _flight_key(destination, depart_date, return_date, limit)
+    cached = cache_lookup('flights', key)
+    if cached is not None:
+        source, total_available = iter(cached['flights']), cached['total_available']
+    else:
+        source, total_available = await _aflight_source(destination, depart_date, return_date, limit)
+    flights = []
+    async for flight in _aiterate(source):
+        flights.append(flight)
+        yield _public(flight)
+
+    if cached is None:
+        cache_store('flights', key, FrozenDict({'flights': tuple(flights), 'total_available': total_available}))
+    result = _flight_result(destination, flights, total_available, context)
+    await _in_executor(save_memory, f"flight_search_{destination}", result, user_id)
+
+async def astream_hotels(destination: str, checkin: str, checkout: str, budget_per_night: float, guests: int, context,
+                         limit: Optional[int] = None, min_rating: Optional[float] = None,
+                         amenities: Optional[List[str]] = None, max_distance_km: Optional[float] = None,
+                         sort_by: str = 'price') -> AsyncIterator[Dict[str, Any]]:
+    """Async iterator variant of stream_hotels (same arguments), without blocking the event loop"""
+    user_id = getattr(context, 'user_id', 'anonymous')
+    logger.info(f"[astream_hotels] user={user_id} destination={destination} {checkin}->{checkout} budget={budget_per_night}")
+
+    args = (destination, checkin, checkout, budget_per_night, guests, limit,
+            min_rating, amenity_mask(amenities), max_distance_km, sort_by)
+    key = _hotel_key(*args)
+    cached = cache_lookup('hotels', key)
+    if cached is not None:
+        source, total_available = iter(cached['hotels']), cached['total_available']
+    else:
+        source, total_available = await _ahotel_source(*args)
+    hotels = []
+    async for hotel in _aiterate(source):
+        hotels.append(hotel)
+        yield _public(hotel)
+
+    if cached is None:
+        cache_store('hotels', key, FrozenDict({'hotels': tuple(hotels), 'total_available': total_available}))
+    result = _hotel_result(destination, hotels, total_available, context,
+                           budget_per_night, guests, min_rating, amenities, max_distance_km, sort_by)
+    await _in_executor(save_memory, f"hotel_search_{destination}", result, user_id)
+
+def _calendar_options(destination: str, depart_date: str, flex_days: int, min_nights: int, max_nights: int,
+                      min_rating: Optional[float]) -> Dict[str, Any]:
+    """Cheapest flight and hotel for every date pair in the window, as a read-only snapshot"""
+    flights = get_flight_inventory(destination)
+    hotels = get_hotel_inventory(destination)
+    grid = build_price_calendar(flights, hotels, parse_date(depart_date), flex_days, min_nights, max_nights, min_rating)
+    calendar = []
+    for d, depart in enumerate(grid['departures']):
+        for n, nights in enumerate(grid['nights']):
+            hotel_row = int(grid['hotel_row'][d, n])
+            calendar.append({
+                'depart_date': str(depart),
+                'return_date': str(depart + int(nights)),
+                'nights': int(nights),
+                'flight_price': int(grid['flight_price'][d, n]),
+                'flight_id': f'FL-{flights.destination.upper()}-{int(grid["flight_row"][d, n]) + 1}',
+                'hotel_price_per_night': int(grid['hotel_price'][d, n]) if hotel_row >= 0 else None,
+                'hotel_id': f'HT-{hotels.destination.upper()}-{hotel_row + 1}' if hotel_row >= 0 else None,
+                'total': int(grid['total'][d, n])
+            })
+    return snapshot({'calendar': calendar})[0]
+
+def search_price_calendar(destination: str, depart_date: str, context, flex_days: int = 3,
+                          min_nights: int = 3, max_nights: int = 7, budget: Optional[float] = None,
+                          min_rating: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Flexible-date search: cheapest trip for every departure date and trip length
+    
+    Args:
+        destination: Travel destination
+        depart_date: Preferred departure date (center of the window)
+        context: Tool context with user information
+        flex_days: Search departures up to this many days before and after
+        min_nights: Shortest trip length
+        max_nights: Longest trip length
+        budget: Total budget; cells above it get within_budget=False
+        min_rating: Only consider hotels with at least this rating
+        
+    Returns:
+        Dictionary with one calendar entry per (departure, nights) pair and the cheapest entry
+    """
+    user_id = getattr(context, 'user_id', 'anonymous')
+    logger.info(f"[search_price_calendar] user={user_id} destination={destination} {depart_date}±{flex_days}d nights={min_nights}-{max_nights}")
+    
+    options = cached_search(
+        'calendar',
+        (_normalize_destination(destination), str(parse_date(depart_date)), flex_days, min_nights, max_nights, min_rating),
+        lambda: _calendar_options(destination, depart_date, flex_days, min_nights, max_nights, min_rating)
+    )
+    calendar = [
+        {**entry, 'within_budget': budget is None or entry['total'] <= budget}
+        for entry in options['calendar']
+    ]
+    affordable = [entry for entry in calendar if entry['within_budget']]
     
     result = {
         'status': 'success',
         'destination': destination,
-        'hotels': hotels,
+        'calendar': calendar,
+        'cheapest': min(affordable, key=lambda e: e['total']) if affordable else None,
         'search_context': {
             'user_id': user_id,
-            'budget_per_night': budget_per_night,
-            'guests': guests,
+            'session_id': getattr(context, 'session_id', 'default'),
+            'budget': budget,
             'timestamp': datetime.now().isoformat(),
-            'search_type': 'hotel_search'
+            'search_type': 'price_calendar'
         }
     }
     
     # Save to memory
-    save_memory(f"hotel_search_{destination}", result, user_id)
+    save_memory(f"price_calendar_{destination}", result, user_id)
     
     return result
 
+def _batch_query(query) -> Dict[str, Any]:
+    """Normalize a batch query given as a dict or a (destination, depart, return[, budget]) tuple"""
+    if not isinstance(query, dict):
+        query = dict(zip(('destination', 'depart_date', 'return_date', 'budget'), query))
+    return {
+        'destination': query['destination'],
+        'depart_date': query['depart_date'],
+        'return_date': query['return_date'],
+        'budget': query.get('budget'),
+        'budget_per_night': query.get('budget_per_night'),
+        'guests': query.get('guests', 1)
+    }
+
+def search_travel_batch(queries: List[Any], context, limit: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Search flights and hotels for many destinations and date windows in one call
+    
+    A destination can be a region ("Asia") or "anywhere", which expands to
+    every catalog destination in it. Destinations whose cheapest flight plus
+    hotel stay exceeds the query's total budget are left out and listed
+    under 'over_budget'. The whole batch is saved to memory once.
+    
+    Args:
+        queries: Dicts with destination, depart_date, return_date and optional
+            budget (total), budget_per_night and guests; or tuples of
+            (destination, depart_date, return_date[, budget])
+        context: Tool context with user information
+        limit: Maximum number of flights and hotels per destination
+        
+    Returns:
+        Dictionary with per-destination results, cheapest first
+    """
+    user_id = getattr(context, 'user_id', 'anonymous')
+    logger.info(f"[search_travel_batch] user={user_id} queries={len(queries)}")
+    
+    results = []
+    over_budget = []
+    for query in map(_batch_query, queries):
+        depart, return_ = parse_date(query['depart_date']), parse_date(query['return_date'])
+        nights = max(1, int((return_ - depart).astype(int)))
+        for destination in expand_destination(query['destination']):
+            flights = _search_flights(destination, query['depart_date'], query['return_date'], limit)
+            min_flight = flights['flights'][0]['price'] if flights['flights'] else 0
+            budget = query['budget']
+            budget_per_night = query['budget_per_night']
+            if budget_per_night is None:
+                # Whatever the cheapest flight leaves of the budget, per night
+                budget_per_night = max(20, (budget - min_flight) / nights) if budget else TRAVEL_DEFAULTS['default_budget'] / nights
+            hotels = _search_hotels(destination, query['depart_date'], query['return_date'], budget_per_night, query['guests'], limit)
+            min_hotel = min((h['price_per_night'] for h in hotels['hotels']), default=0)
+            cheapest_total = min_flight + min_hotel * nights
+            if budget and cheapest_total > budget:
+                over_budget.append(destination)
+                continue
+            results.append({
+                'destination': destination,
+                'region': DESTINATIONS.get(destination.lower(), {}).get('region'),
+                'depart_date': query['depart_date'],
+                'return_date': query['return_date'],
+                'nights': nights,
+                'budget': budget,
+                'flights': list(flights['flights']),
+                'hotels': list(hotels['hotels']),
+                'cheapest_total': cheapest_total
+            })
+    results.sort(key=lambda r: r['cheapest_total'])
+    
+    result = {
+        'status': 'success',
+        'queries': len(queries),
+        'results': results,
+        'over_budget': over_budget,
+        'search_context': {
+            'user_id': user_id,
+            'session_id': getattr(context, 'session_id', 'default'),
+            'timestamp': datetime.now().isoformat(),
+            'search_type': 'batch_search'
+        }
+    }
+    
+    # One memory write for the whole batch
+    save_memory('batch_search', result, user_id)
+    
+    logger.info(f"[search_travel_batch] {len(results)} destinations within budget, {len(over_budget)} over budget")
+    return _public(result)
+
 def save_user_preferences_ultimate(user_id: str, context) -> Dict[str, Any]:
     """
     Save user preferences with intelligent categorization
@@ -199,54 +812,137 @@ def save_user_preferences_ultimate(user_id: str, context) -> Dict[str, Any]:
         'categories': list(preferences.keys())
     }
 
-def aggregate_travel_results_ultimate(flights: Dict, hotels: Dict, preferences: Dict, context) -> Dict[str, Any]:
+def _consume(options: Iterable[Dict[str, Any]], price_field: str) -> Tuple[List[Dict[str, Any]], Optional[Tuple[int, int]]]:
+    """Collect options from a list or stream, tracking the price range as they arrive"""
+    collected = []
+    low = high = None
+    for option in options:
+        collected.append(option)
+        price = option.get(price_field, 0)
+        low = price if low is None else min(low, price)
+        high = price if high is None else max(high, price)
+    return collected, (low, high) if collected else None
+
+def _fingerprint(options: List[Dict[str, Any]]) -> str:
+    """Digest of the full content of every option, to tell whether a result set changed
+
+    Ids and prices are not enough: a search for more guests can return the
+    same hotels at the same prices with other rooms (max_guests).
+    """
+    return hashlib.blake2b(repr(options).encode("utf-8"), digest_size=16).hexdigest()
+
+def _plan_fingerprint(*parts: Any) -> str:
+    """Stable digest of a plan's inputs, stored with the saved plan"""
+    return hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=16).hexdigest()
+
+def _summary(options: List[Dict[str, Any]], price_range: Optional[Tuple[int, int]]) -> Dict[str, Any]:
+    return {
+        'total_options': len(options),
+        'price_range': f"${price_range[0]}-${price_range[1]}" if price_range else "N/A"
+    }
+
+def _budget_analysis(flight_options: List[Dict[str, Any]], hotel_options: List[Dict[str, Any]],
+                     budget: Optional[float], nights: int) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """Best bundles and the budget analysis of the best one
+
+    Bundles within the budget are preferred; if nothing fits, the best
+    bundles regardless of budget are returned.
+    """
+    bundles = optimize_bundles(flight_options, hotel_options, [nights], budget)
+    within_budget = bool(bundles) or budget is None
+    if not bundles:
+        bundles = optimize_bundles(flight_options, hotel_options, [nights])
+    best = bundles[0] if bundles else None
+    analysis = {
+        'budget': budget,
+        'nights': nights,
+        'estimated_flight_cost': best['flight'].get('price', 0) if best else 0,
+        'estimated_hotel_cost_per_night': best['hotel'].get('price_per_night', 0) if best else 0,
+        'total_estimated_cost': best['total_cost'] if best else 0,
+        'within_budget': within_budget
+    }
+    return bundles, analysis
+
+def aggregate_travel_results_ultimate(flights: Union[Dict, Iterable[Dict]], hotels: Union[Dict, Iterable[Dict]],
+                                      preferences: Dict, context, budget: Optional[float] = None,
+                                      nights: Optional[int] = None, destination: Optional[str] = None,
+                                      incremental: Optional[bool] = None) -> Dict[str, Any]:
     """
     Context-aware result compilation and optimization
     
+    In incremental mode the flight summary, hotel summary, and bundles and
+    budget analysis are memoized per session by a fingerprint of their inputs, so refining one input only recomputes the
+    parts that depend on it. The plan is saved unless the plan stored under
+    aggregated_results already has the same inputs.
+    
     Args:
-        flights: Flight search results
-        hotels: Hotel search results
+        flights: Flight search results, or a stream of flights (stream_flights)
+        hotels: Hotel search results, or a stream of hotels (stream_hotels)
         preferences: User preferences
         context: Tool context
+        budget: Total trip budget (None for no limit)
+        nights: Number of nights (defaults to TRAVEL_DEFAULTS["default_duration"])
+        destination: Destination name when flights is a stream
+        incremental: Reuse unchanged parts of the session's previous aggregation
+            (defaults to AGGREGATION_CONFIG["aggregation_incremental"])
         
     Returns:
-        Aggregated travel plan with recommendations
+        Aggregated travel plan with recommendations; 'aggregation' lists
+        the recomputed and reused parts
     """
     user_id = getattr(context, 'user_id', 'anonymous')
+    session_id = getattr(context, 'session_id', 'default')
     logger.info(f"[aggregate_travel_results_ultimate] Aggregating results from sub-agents")
     
-    # Load user preferences from memory
-    saved_prefs = load_memory('travel_preferences', user_id)
+    if incremental is None:
+        incremental = AGGREGATION_CONFIG["aggregation_incremental"]
+    # A fresh memo recomputes every stage
+    memo = get_aggregation_memo() if incremental else AggregationMemo(max_sessions=1)
+    session = (user_id, session_id)
+    recomputed = []
+    
+    def stage(name, fingerprint, compute):
+        value, fresh = memo.stage(session, name, fingerprint, compute)
+        if fresh:
+            recomputed.append(name)
+        return value
     
-    # Calculate total budget
-    flight_costs = [f.get('price', 0) for f in flights.get('flights', [])]
-    hotel_costs = [h.get('price_per_night', 0) for h in hotels.get('hotels', [])]
+    if isinstance(flights, dict):
+        destination = flights.get('destination', destination)
+        flights = flights.get('flights', [])
+    if isinstance(hotels, dict):
+        hotels = hotels.get('hotels', [])
+    flight_options, flight_range = _consume(flights, 'price')
+    hotel_options, hotel_range = _consume(hotels, 'price_per_night')
+    nights = nights or TRAVEL_DEFAULTS['default_duration']
+    flight_key = _fingerprint(flight_options)
+    hotel_key = _fingerprint(hotel_options)
+    # Whatever wrote or expired the stored preferences, the loaded value tells
+    stored_prefs = load_memory('travel_preferences', user_id)
     
-    min_flight = min(flight_costs) if flight_costs else 0
-    min_hotel = min(hotel_costs) if hotel_costs else 0
+    # Each part is only recomputed when its inputs changed since the
+    # session's previous aggregation. Memoized parts are read-only
+    # snapshots, since later plans share them
+    flight_summary = stage('flights', flight_key, lambda: _summary(flight_options, flight_range))
+    hotel_summary = stage('hotels', hotel_key, lambda: _summary(hotel_options, hotel_range))
+    bundles, budget_analysis = stage(
+        'budget_analysis',
+        (flight_key, hotel_key, budget, nights, BUNDLE_CONFIG["top_k"], tuple(sorted(BUNDLE_CONFIG["weights"].items()))),
+        lambda: snapshot(_budget_analysis(flight_options, hotel_options, budget, nights))[0]
+    )
+    best = bundles[0] if bundles else None
     
     # Create aggregated plan
     aggregated_plan = {
-        'destination': flights.get('destination', 'Unknown'),
+        'destination': destination or 'Unknown',
         'user_id': user_id,
-        'session_id': getattr(context, 'session_id', 'default'),
+        'session_id': session_id,
         'timestamp': datetime.now().isoformat(),
-        'flights': {
-            'total_options': len(flights.get('flights', [])),
-            'price_range': f"${min(flight_costs)}-${max(flight_costs)}" if flight_costs else "N/A",
-            'recommended': flights.get('flights', [])[0] if flights.get('flights') else None
-        },
-        'hotels': {
-            'total_options': len(hotels.get('hotels', [])),
-            'price_range': f"${min(hotel_costs)}-${max(hotel_costs)}" if hotel_costs else "N/A",
-            'recommended': hotels.get('hotels', [])[0] if hotels.get('hotels') else None
-        },
-        'budget_analysis': {
-            'estimated_flight_cost': min_flight,
-            'estimated_hotel_cost_per_night': min_hotel,
-            'total_estimated_cost': min_flight + (min_hotel * 5)  # Assuming 5 nights
-        },
-        'user_preferences': saved_prefs,
+        'flights': {**flight_summary, 'recommended': best['flight'] if best else None},
+        'hotels': {**hotel_summary, 'recommended': best['hotel'] if best else None},
+        'budget_analysis': budget_analysis,
+        'bundles': bundles,
+        'user_preferences': stored_prefs,
         'recommendations': [
             "Book flights early for better prices",
             "Consider hotels with free breakfast",
@@ -254,9 +950,21 @@ def aggregate_travel_results_ultimate(flights: Dict, hotels: Dict, preferences:
         ]
     }
     
-    # Save aggregated results
-    save_memory('aggregated_results', aggregated_plan, user_id)
+    # Save aggregated results, unless the stored plan (shared by the user's
+    # sessions, and subject to expiry and eviction) already is this one
+    fingerprint = _plan_fingerprint(session_id, destination, flight_key, hotel_key, budget, nights, stored_prefs)
+    aggregated_plan['plan_fingerprint'] = fingerprint
+    stored_plan = load_memory('aggregated_results', user_id) if incremental else None
+    if stored_plan is None or stored_plan.get('plan_fingerprint') != fingerprint:
+        save_memory('aggregated_results', aggregated_plan, user_id)
+        recomputed.append('saved')
+    aggregated_plan['aggregation'] = {
+        'incremental': incremental,
+        'recomputed': recomputed,
+        'reused': [name for name in ('flights', 'hotels', 'budget_analysis', 'saved')
+                   if name not in recomputed]
+    }
     
-    logger.info(f"[aggregate_travel_results_ultimate] Aggregation complete and saved to memory key=aggregated_results_{user_id}")
+    logger.info(f"[aggregate_travel_results_ultimate] Aggregation complete (recomputed: {', '.join(recomputed) or 'nothing'}) key=aggregated_results_{user_id}")
     
-    return aggregated_plan
\ No newline at end of file
+    return _public(aggregated_plan)
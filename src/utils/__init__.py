@@ -1,12 +1,39 @@
 """Utility modules for TripCraft AI"""
 
-from .memory import save_memory, load_memory, search_memory, get_memory_stats
+from .memory import (
+    save_memory, load_memory, search_memory, get_memory_stats, export_memory,
+    delete_memory, clear_memory, flush_memory, get_memory_backend, set_memory_backend,
+    asave_memory, aload_memory, asearch_memory, aget_memory_stats,
+    get_user_memory_stats, list_memory_keys, iter_memory_keys
+)
+from .write_behind import WriteBehindStore
+from .search_cache import SearchCache, get_search_cache, get_search_cache_stats, clear_search_cache
 from .parser import parse_travel_request
+from .bulk import parse_request_file
 
 __all__ = [
     "save_memory", 
     "load_memory", 
     "search_memory", 
     "get_memory_stats",
-    "parse_travel_request"
+    "export_memory",
+    "delete_memory",
+    "clear_memory",
+    "flush_memory",
+    "get_memory_backend",
+    "set_memory_backend",
+    "asave_memory",
+    "aload_memory",
+    "asearch_memory",
+    "aget_memory_stats",
+    "get_user_memory_stats",
+    "list_memory_keys",
+    "iter_memory_keys",
+    "WriteBehindStore",
+    "SearchCache",
+    "get_search_cache",
+    "get_search_cache_stats",
+    "clear_search_cache",
+    "parse_travel_request",
+    "parse_request_file"
 ]
\ No newline at end of file
@@ -0,0 +1,271 @@
+"""
+Bulk parsing of travel request logs for TripCraft AI
+
+Streams requests from a JSONL file (one JSON string, or one object with
+the request under a field, per line) or a CSV file (the request in a
+column), parses them in chunks across a process pool and writes the
+results in input order, either as JSONL or as a columnar .npz archive.
+
+Memory stays bounded: the reader only runs ahead of the writer by a fixed
+number of chunks per worker, and columnar output is appended to one
+temporary file per column and copied into the archive at the end.
+Destinations and styles are stored as codes into name arrays, interests
+as a bitmask over interest names and dates as datetime64 (NaT when the
+request names none). Dates without a year resolve against one reference
+date for the whole file (--today, default: the day the run starts), so a
+log parses the same way in every chunk and on every rerun.
+
+Usage:
+    python -m utils.bulk INPUT OUTPUT [--workers N] [--chunk-size N] [--field request] [--today YYYY-MM-DD]
+"""
+import argparse
+import csv
+import json
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from config import logger, PARSER_CONFIG
+from .gazetteer import get_gazetteer
+from .parser import INTEREST_KEYWORDS, parse_travel_request
+
+# Columns of the .npz output and their (little-endian) dtypes
+COLUMNS = {
+    'line': '<i8',
+    'destination': '<i4',
+    'budget': '<i8',
+    'duration': '<i4',
+    'depart_date': '<M8[D]',
+    'return_date': '<M8[D]',
+    'style': '<i2',
+    'interests': '<u8'
+}
+
+def iter_requests(path: str, field: str = 'request') -> Iterator[Tuple[int, str, bool]]:
+    """Requests of a JSONL or CSV file (by extension), without parsing them
+
+    Yields:
+        Tuples of (line number, payload, payload is JSON). JSONL lines are
+        passed on undecoded so the workers decode them.
+    """
+    if path.lower().endswith('.csv'):
+        with open(path, newline='', encoding='utf-8') as source:
+            reader = csv.DictReader(source)
+            if field not in (reader.fieldnames or []):
+                raise ValueError(f"{path} has no column {field!r}")
+            for row in reader:
+                yield reader.line_num, row[field] or '', False
+    else:
+        with open(path, encoding='utf-8') as source:
+            for number, line in enumerate(source, 1):
+                if line.strip():
+                    yield number, line, True
+
+def _chunks(rows: Iterable, size: int) -> Iterator[List]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _request_text(payload: str, is_json: bool, field: str) -> Optional[str]:
+    """Request text of a row, or None if the row holds no request"""
+    if is_json:
+        try:
+            value = json.loads(payload)
+        except ValueError:
+            return None
+        if isinstance(value, dict):
+            value = value.get(field)
+        payload = value if isinstance(value, str) else None
+    return payload if payload and payload.strip() else None
+
+def _parse_chunk(rows: List[Tuple[int, str, bool]], field: str, columnar: bool, today: date) -> Tuple[Any, int, int]:
+    """Parse one chunk (runs in the worker processes)
+
+    Returns:
+        Tuple of (output, parsed, skipped): JSONL text, or columns as lists
+        with destination/style names and interest tuples
+    """
+    lines, parsed = [], []
+    skipped = 0
+    for number, payload, is_json in rows:
+        text = _request_text(payload, is_json, field)
+        if text is None:
+            skipped += 1
+            continue
+        lines.append(number)
+        parsed.append(parse_travel_request(text, today))
+    if not columnar:
+        output = ''.join(json.dumps({'line': number, **result}, ensure_ascii=False) + '\n'
+                         for number, result in zip(lines, parsed))
+    else:
+        output = (lines, [r['destination'] for r in parsed], [r['budget'] for r in parsed],
+                  [r['duration'] for r in parsed], [r['depart_date'] for r in parsed],
+                  [r['return_date'] for r in parsed], [r['style'] for r in parsed],
+                  [tuple(r['interests']) for r in parsed])
+    return output, len(parsed), skipped
+
+def _init_worker() -> None:
+    get_gazetteer()
+
+class _ColumnWriter:
+    """Appends chunks of columns to temporary files and packs them into an .npz"""
+
+    def __init__(self, output: str):
+        self.output = output
+        self.directory = tempfile.mkdtemp(prefix='.bulk-', dir=os.path.dirname(os.path.abspath(output)))
+        self.files = {name: open(os.path.join(self.directory, name), 'wb') for name in COLUMNS}
+        self.rows = 0
+        self.destinations: Dict[str, int] = {}
+        self.styles: Dict[str, int] = {}
+        self.interests: Dict[str, int] = {name: bit for bit, name in enumerate(INTEREST_KEYWORDS)}
+
+    @staticmethod
+    def _codes(values: List[str], names: Dict[str, int]) -> List[int]:
+        return [names.setdefault(value, len(names)) for value in values]
+
+    def write(self, columns: Tuple[List, ...]) -> None:
+        lines, destinations, budgets, durations, departs, returns, styles, interests = columns
+        masks = []
+        for found in interests:
+            mask = 0
+            for name in found:
+                mask |= 1 << self.interests.setdefault(name, len(self.interests))
+            masks.append(mask)
+        values = {
+            'line': lines,
+            'destination': self._codes(destinations, self.destinations),
+            'budget': budgets,
+            'duration': durations,
+            'depart_date': departs,
+            'return_date': returns,
+            'style': self._codes(styles, self.styles),
+            'interests': masks
+        }
+        for name, dtype in COLUMNS.items():
+            np.asarray(values[name], dtype=dtype).tofile(self.files[name])
+        self.rows += len(lines)
+
+    def close(self) -> None:
+        """Write the archive and remove the temporary files"""
+        names = {
+            'destination_names': list(self.destinations),
+            'style_names': list(self.styles),
+            'interest_names': list(self.interests)
+        }
+        try:
+            with zipfile.ZipFile(self.output, 'w', zipfile.ZIP_STORED, allowZip64=True) as archive:
+                for name, dtype in COLUMNS.items():
+                    self.files[name].close()
+                    header = {'descr': dtype, 'fortran_order': False, 'shape': (self.rows,)}
+                    with archive.open(name + '.npy', 'w', force_zip64=True) as entry:
+                        np.lib.format.write_array_header_1_0(entry, header)
+                        with open(os.path.join(self.directory, name), 'rb') as column:
+                            shutil.copyfileobj(column, entry, 1 << 20)
+                for name, values in names.items():
+                    with archive.open(name + '.npy', 'w') as entry:
+                        np.lib.format.write_array(entry, np.array(values, dtype=str))
+        finally:
+            for column in self.files.values():
+                column.close()
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+def parse_request_file(source: str, output: str, columnar: Optional[bool] = None, field: str = 'request',
+                       workers: Optional[int] = None, chunk_size: Optional[int] = None,
+                       today: Optional[date] = None) -> Dict[str, Any]:
+    """
+    Parse every request of a JSONL/CSV file into a JSONL or .npz file
+
+    Args:
+        source: Input file (.csv, otherwise JSONL)
+        output: Output file
+        columnar: Write an .npz archive (default: if output ends in .npz)
+        field: JSON field / CSV column holding the request
+        workers: Worker processes (PARSER_CONFIG default; 1 parses in this process)
+        chunk_size: Requests per chunk sent to a worker
+        today: Reference date for dates without a year (default: the day
+            the run starts, used for every request)
+
+    Returns:
+        Stats: requests parsed, rows skipped, chunks, workers, seconds and
+        requests per second
+    """
+    columnar = output.lower().endswith('.npz') if columnar is None else columnar
+    workers = workers or PARSER_CONFIG["parser_bulk_workers"] or os.cpu_count() or 1
+    chunk_size = chunk_size or PARSER_CONFIG["parser_bulk_chunk_size"]
+    today = today or date.today()
+    max_pending = workers * PARSER_CONFIG["parser_bulk_pending_chunks"]
+    start = time.perf_counter()
+    parsed = skipped = chunks = 0
+
+    writer = _ColumnWriter(output) if columnar else open(output, 'w', encoding='utf-8')
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) if workers > 1 else None
+    try:
+        pending = deque()
+
+        def drain(limit: int) -> None:
+            # Results are written in input order, oldest chunk first
+            nonlocal parsed, skipped
+            while len(pending) > limit:
+                result, count, missing = pending.popleft().result()
+                writer.write(result)
+                parsed += count
+                skipped += missing
+
+        for chunk in _chunks(iter_requests(source, field), chunk_size):
+            chunks += 1
+            if pool is None:
+                result, count, missing = _parse_chunk(chunk, field, columnar, today)
+                writer.write(result)
+                parsed += count
+                skipped += missing
+                continue
+            pending.append(pool.submit(_parse_chunk, chunk, field, columnar, today))
+            drain(max_pending)
+        drain(0)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+        writer.close()
+
+    seconds = time.perf_counter() - start
+    stats = {
+        'requests': parsed,
+        'skipped': skipped,
+        'chunks': chunks,
+        'workers': workers,
+        'seconds': round(seconds, 3),
+        'requests_per_second': round(parsed / seconds, 1) if seconds > 0 else 0.0
+    }
+    logger.info(f"[parse_request_file] {parsed} requests ({skipped} skipped) from {source} to {output} "
+                f"in {seconds:.2f}s, {stats['requests_per_second']:.0f}/s with {workers} workers")
+    return stats
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Parse a JSONL/CSV log of travel requests")
+    parser.add_argument("source", help="JSONL or .csv file of requests")
+    parser.add_argument("output", help="JSONL file, or .npz for columnar output")
+    parser.add_argument("--field", default="request", help="JSON field / CSV column holding the request")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (1 = no pool)")
+    parser.add_argument("--chunk-size", type=int, default=None, help="requests per chunk")
+    parser.add_argument("--today", type=date.fromisoformat, default=None,
+                        help="reference date YYYY-MM-DD for dates without a year (default: today)")
+    args = parser.parse_args()
+    stats = parse_request_file(args.source, args.output, field=args.field,
+                               workers=args.workers, chunk_size=args.chunk_size, today=args.today)
+    print(json.dumps(stats))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Serialization codecs for TripCraft AI memory payloads
+
+Each namespace can pick a codec and a compression method through
+MEMORY_CONFIG["namespace_codecs"]. Encoded payloads start with a two byte
+header (codec tag, compression tag) so they can always be decoded, even
+after the configuration changes.
+
+Codecs: "json", "pickle" (protocol 5) and "msgpack" (when installed).
+Pickle payloads execute code when decoded, so only use it for SQLite files
+you trust.
+Compression: None, "zlib" and "lz4" (when installed); it is only applied to
+payloads of at least MEMORY_CONFIG["compression_threshold"] bytes.
+"""
+import json
+import pickle
+import zlib
+from typing import Any, Dict, Optional
+from config import MEMORY_CONFIG
+from .records import json_default
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+try:
+    import lz4.frame
+    LZ4_AVAILABLE = True
+except ImportError:
+    LZ4_AVAILABLE = False
+
+def _json_encode(data: Any) -> bytes:
+    return json.dumps(data, separators=(",", ":"), default=json_default).encode("utf-8")
+
+def _json_decode(payload: bytes) -> Any:
+    return json.loads(payload)
+
+def _pickle_encode(data: Any) -> bytes:
+    return pickle.dumps(data, protocol=5)
+
+def _msgpack_encode(data: Any) -> bytes:
+    return msgpack.packb(data, default=json_default)
+
+def _msgpack_decode(payload: bytes) -> Any:
+    return msgpack.unpackb(payload)
+
+# name -> (header tag, encode, decode)
+CODECS = {
+    "json": (b"j", _json_encode, _json_decode),
+    "pickle": (b"p", _pickle_encode, pickle.loads)
+}
+if MSGPACK_AVAILABLE:
+    CODECS["msgpack"] = (b"m", _msgpack_encode, _msgpack_decode)
+
+COMPRESSORS = {
+    None: (b"-", None, None),
+    "zlib": (b"z", zlib.compress, zlib.decompress)
+}
+if LZ4_AVAILABLE:
+    COMPRESSORS["lz4"] = (b"l", lz4.frame.compress, lz4.frame.decompress)
+
+_DECODERS = {tag: decode for tag, _, decode in CODECS.values()}
+_DECOMPRESSORS = {tag: decompress for tag, _, decompress in COMPRESSORS.values()}
+
+class EncodedValue(bytes):
+    """Encoded payload kept by the in-process store instead of a native object"""
+
+def codec_for(namespace: str) -> Optional[Dict[str, Any]]:
+    """Get the codec settings configured for a namespace (None = keep native objects)"""
+    return MEMORY_CONFIG["namespace_codecs"].get(namespace)
+
+def encode(data: Any, codec: str = "json", compression: Optional[str] = None, threshold: Optional[int] = None) -> EncodedValue:
+    """Encode data with a codec, compressing it when it reaches the threshold
+
+    Args:
+        data: Value to encode
+        codec: Name from CODECS
+        compression: Name from COMPRESSORS (None for no compression)
+        threshold: Minimum payload size to compress (defaults to MEMORY_CONFIG)
+
+    Returns:
+        Header-prefixed payload
+    """
+    if codec not in CODECS:
+        raise ValueError(f"unknown or unavailable codec: {codec}")
+    if compression not in COMPRESSORS:
+        raise ValueError(f"unknown or unavailable compression: {compression}")
+    codec_tag, encoder, _ = CODECS[codec]
+    payload = encoder(data)
+    if threshold is None:
+        threshold = MEMORY_CONFIG["compression_threshold"]
+    if compression is not None and len(payload) >= threshold:
+        compression_tag, compressor, _ = COMPRESSORS[compression]
+        payload = compressor(payload)
+    else:
+        compression_tag = COMPRESSORS[None][0]
+    return EncodedValue(codec_tag + compression_tag + payload)
+
+def decode(payload: bytes) -> Any:
+    """Decode a payload produced by encode"""
+    codec_tag, compression_tag = payload[:1], payload[1:2]
+    body = memoryview(payload)[2:]
+    decompress = _DECOMPRESSORS[compression_tag]
+    if decompress is not None:
+        body = decompress(body)
+    return _DECODERS[codec_tag](bytes(body))
+
+def encode_for(namespace: str, data: Any, default_codec: str = "json") -> EncodedValue:
+    """Encode data with the namespace's configured codec"""
+    settings = codec_for(namespace) or {"codec": default_codec}
+    return encode(data, settings.get("codec", default_codec), settings.get("compression"))
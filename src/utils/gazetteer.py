@@ -0,0 +1,340 @@
+"""
+Gazetteer of cities, aliases and airport codes for TripCraft AI
+
+Places come from the seed TSV (utils/data/gazetteer.tsv) and, optionally,
+a GeoNames cities dump (e.g. cities15000.txt, about 26k cities with their
+alternate names). build_gazetteer compiles them into a binary file that
+loads without parsing: a header, the coordinates, key -> place and head
+tables as packed arrays, and the place, key and head strings as
+newline-separated blobs.
+
+The bundled utils/data/gazetteer.bin is compiled from the seed alone
+(about 380 cities and their airports); GeoNames dumps are not bundled, so
+a gazetteer of tens of thousands of places is built from a downloaded
+dump (see USAGE.md). benchmarks/bench_parser.py --places measures lookups
+against one of that size.
+
+Lookup keys are normalized names (lowercase, accents stripped, words
+joined by single spaces) and exact-case codes (IATA codes and all-caps
+aliases such as "NYC"), kept in one sorted list. Walking that list with
+binary search works like a trie: longest_match extends a key one word at
+a time while some key still starts with it, and returns the longest key
+that matched. The heads table maps each word that starts a key to the
+place of the one-word key and whether longer keys follow, so most words
+of a text are rejected, and one-word places found, with one dict lookup.
+
+Usage:
+    python -m utils.gazetteer build [SOURCE ...] [--output PATH]
+"""
+import argparse
+import bisect
+import os
+import re
+import struct
+import sys
+import threading
+import time
+import unicodedata
+from array import array
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from config import logger, PARSER_CONFIG
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+SEED_PATH = os.path.join(DATA_DIR, "gazetteer.tsv")
+DEFAULT_PATH = os.path.join(DATA_DIR, "gazetteer.bin")
+
+MAGIC = b"TCGZ"
+VERSION = 2
+# magic, version, longest key in words, places, keys, heads, place blob bytes,
+# key blob bytes, head blob bytes
+HEADER = struct.Struct("<4sHHIIIIII")
+
+WORD_PATTERN = re.compile(r"[^\W_]+")
+
+# Columns of a GeoNames dump: name, ascii name, alternate names, lat, lon, country, population
+_GEONAMES_COLUMNS = 19
+
+class Place(NamedTuple):
+    """One gazetteer entry"""
+    name: str
+    country: str
+    region: str
+    iata: str
+    lat: float
+    lon: float
+
+def strip_accents(text: str) -> str:
+    """Text with combining accents removed ("Zürich" -> "Zurich")"""
+    if text.isascii():
+        return text
+    return "".join(c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c))
+
+def normalize(name: str) -> str:
+    """Lookup key of a name: lowercase words without accents, single-spaced"""
+    return " ".join(WORD_PATTERN.findall(strip_accents(name).lower()))
+
+def _keys(name: str, codes: Sequence[str], aliases: Sequence[str]) -> Iterator[str]:
+    """Lookup keys of a place (all-caps aliases and codes keep their case)"""
+    yield normalize(name)
+    for alias in aliases:
+        yield alias if alias.isupper() else normalize(alias)
+    for code in codes:
+        yield code.upper()
+
+def _split(field: str) -> List[str]:
+    return [item.strip() for item in field.split(",") if item.strip()]
+
+def read_seed(path: str) -> Iterator[Tuple[Place, List[str]]]:
+    """Places and their keys from a seed TSV (name, country, region, lat, lon, codes, aliases)"""
+    with open(path, encoding="utf-8") as source:
+        for line in source:
+            if not line.strip() or line.startswith("#"):
+                continue
+            name, country, region, lat, lon, codes, aliases = line.rstrip("\n").split("\t")
+            codes = _split(codes)
+            place = Place(name, country, region, codes[0] if codes else "", float(lat), float(lon))
+            yield place, list(_keys(name, codes, _split(aliases)))
+
+def read_geonames(path: str, regions: Dict[str, str]) -> Iterator[Tuple[Place, List[str]]]:
+    """Places and their keys from a GeoNames dump, most populous first
+
+    Args:
+        path: GeoNames file (tab-separated, 19 columns)
+        regions: Country code -> region, for the region column
+    """
+    rows = []
+    with open(path, encoding="utf-8") as source:
+        for line in source:
+            columns = line.rstrip("\n").split("\t")
+            if len(columns) != _GEONAMES_COLUMNS:
+                continue
+            population = int(columns[14] or 0)
+            rows.append((population, columns))
+    rows.sort(key=lambda row: -row[0])
+    for _, columns in rows:
+        name, country = columns[1], columns[8]
+        aliases = [columns[2]] + columns[3].split(",")
+        # Short all-caps alternate names are mostly codes of other things
+        aliases = [alias for alias in aliases if alias and not (alias.isupper() and len(alias) <= 3)]
+        place = Place(name, country, regions.get(country, ""), "", float(columns[4]), float(columns[5]))
+        yield place, list(_keys(name, [], aliases))
+
+def _clean(text: str) -> str:
+    return " ".join(text.split())
+
+def build_gazetteer(sources: Sequence[str], output: str = DEFAULT_PATH) -> Tuple[int, int]:
+    """Compile sources into a binary gazetteer
+
+    Earlier sources and earlier places win keys shared by several places.
+    GeoNames dumps are recognized by their column count.
+
+    Args:
+        sources: Seed TSV and/or GeoNames files
+        output: Binary file to write
+
+    Returns:
+        Tuple of (places, keys) written
+    """
+    places: List[Place] = []
+    keys: Dict[str, int] = {}
+    regions: Dict[str, str] = {}
+    for path in sources:
+        with open(path, encoding="utf-8") as source:
+            first = next((line for line in source if line.strip() and not line.startswith("#")), "")
+        rows = read_geonames(path, regions) if first.count("\t") + 1 == _GEONAMES_COLUMNS else read_seed(path)
+        for place, place_keys in rows:
+            index = len(places)
+            places.append(place)
+            if place.region:
+                regions.setdefault(place.country, place.region)
+            for key in place_keys:
+                if key:
+                    keys.setdefault(key, index)
+
+    sorted_keys = sorted(keys)
+    coords = array("f", [value for place in places for value in (place.lat, place.lon)])
+    place_ids = array("I", [keys[key] for key in sorted_keys])
+    if sys.byteorder == "big":
+        coords.byteswap()
+        place_ids.byteswap()
+    place_blob = "\n".join(
+        "\t".join(_clean(field) for field in (p.name, p.country, p.region, p.iata)) for p in places
+    ).encode("utf-8")
+    key_blob = "\n".join(sorted_keys).encode("utf-8")
+    max_words = max((key.count(" ") + 1 for key in sorted_keys), default=1)
+
+    # First word of each key -> [place of the one-word key or -1, longer keys follow]
+    heads: Dict[str, List[int]] = {}
+    for key in sorted_keys:
+        head, space, _ = key.partition(" ")
+        entry = heads.setdefault(head, [-1, 0])
+        if space:
+            entry[1] = 1
+        else:
+            entry[0] = keys[key]
+    head_places = array("i", [entry[0] for entry in heads.values()])
+    if sys.byteorder == "big":
+        head_places.byteswap()
+    head_longer = bytes(entry[1] for entry in heads.values())
+    head_blob = "\n".join(heads).encode("utf-8")
+
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "wb") as target:
+        target.write(HEADER.pack(MAGIC, VERSION, max_words, len(places), len(sorted_keys), len(heads),
+                                 len(place_blob), len(key_blob), len(head_blob)))
+        target.write(coords.tobytes())
+        target.write(place_ids.tobytes())
+        target.write(head_places.tobytes())
+        target.write(head_longer)
+        target.write(place_blob)
+        target.write(key_blob)
+        target.write(head_blob)
+    logger.info(f"[build_gazetteer] wrote {len(places)} places, {len(sorted_keys)} keys to {output}")
+    return len(places), len(sorted_keys)
+
+class Gazetteer:
+    """Sorted lookup keys over a table of places"""
+
+    def __init__(self, keys: List[str], place_ids: Sequence[int], places: List[str],
+                 coords: Sequence[float], max_words: int, heads: Dict[str, Tuple[int, int]]):
+        self.keys = keys
+        self.place_ids = place_ids
+        self._places = places
+        self._coords = coords
+        self.max_words = max_words
+        # Word that can start a key -> (place of the one-word key or -1, 1 if longer keys start with it)
+        self.heads = heads
+
+    @classmethod
+    def load(cls, path: str) -> "Gazetteer":
+        """Load a binary gazetteer written by build_gazetteer"""
+        with open(path, "rb") as source:
+            data = source.read()
+        (magic, version, max_words, n_places, n_keys, n_heads,
+         place_bytes, key_bytes, head_bytes) = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} gazetteer")
+        offset = HEADER.size
+        coords = array("f")
+        coords.frombytes(data[offset:offset + 8 * n_places])
+        offset += 8 * n_places
+        place_ids = array("I")
+        place_ids.frombytes(data[offset:offset + 4 * n_keys])
+        offset += 4 * n_keys
+        head_places = array("i")
+        head_places.frombytes(data[offset:offset + 4 * n_heads])
+        offset += 4 * n_heads
+        head_longer = data[offset:offset + n_heads]
+        offset += n_heads
+        if sys.byteorder == "big":
+            coords.byteswap()
+            place_ids.byteswap()
+            head_places.byteswap()
+        places = data[offset:offset + place_bytes].decode("utf-8").split("\n")
+        offset += place_bytes
+        keys = data[offset:offset + key_bytes].decode("utf-8").split("\n") if n_keys else []
+        offset += key_bytes
+        head_words = data[offset:offset + head_bytes].decode("utf-8").split("\n") if n_heads else []
+        heads = dict(zip(head_words, zip(head_places, head_longer)))
+        return cls(keys, place_ids, places, coords, max_words, heads)
+
+    def __len__(self) -> int:
+        return len(self._places)
+
+    def place(self, index: int) -> Place:
+        """Place at a table position"""
+        name, country, region, iata = self._places[index].split("\t")
+        return Place(name, country, region, iata, round(self._coords[2 * index], 5), round(self._coords[2 * index + 1], 5))
+
+    def name(self, index: int) -> str:
+        """Name of the place at a table position"""
+        return self._places[index].partition("\t")[0]
+
+    def _find(self, key: str) -> Optional[int]:
+        """Place position of an exact key"""
+        i = bisect.bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            return self.place_ids[i]
+        return None
+
+    def lookup(self, name: str) -> Optional[Place]:
+        """Place for a name, alias or code (codes and all-caps aliases are case-sensitive)"""
+        index = self._find(name.strip()) if name.strip().isupper() else None
+        if index is None:
+            index = self._find(normalize(name))
+        return self.place(index) if index is not None else None
+
+    def code(self, word: str) -> Optional[int]:
+        """Place position of an all-caps code or alias, e.g. "NRT" or "NYC" """
+        return self._find(word) if word.isupper() else None
+
+    def longest_match(self, words: Sequence[str], start: int) -> Optional[Tuple[int, int]]:
+        """Longest key made of normalized words from words[start:]
+
+        Returns:
+            Tuple of (place position, number of words matched), or None
+        """
+        head = self.heads.get(words[start])
+        if head is None:
+            return None
+        place_id, longer = head
+        best = (place_id, 1) if place_id >= 0 else None
+        if not longer:
+            return best
+        keys = self.keys
+        n = len(keys)
+        prefix = words[start]
+        low = 0
+        for end in range(start + 1, min(start + self.max_words, len(words))):
+            prefix = prefix + " " + words[end]
+            low = bisect.bisect_left(keys, prefix, low)
+            if low == n:
+                break
+            if keys[low] == prefix:
+                best = (self.place_ids[low], end - start + 1)
+                low += 1
+            # Keys continuing with another word sort right after the key itself
+            if low == n or not keys[low].startswith(prefix + " "):
+                break
+        return best
+
+_GAZETTEER: Optional[Gazetteer] = None
+_GAZETTEER_LOCK = threading.Lock()
+
+def get_gazetteer() -> Gazetteer:
+    """Get the shared gazetteer, loading it on first use
+
+    Loads PARSER_CONFIG["parser_gazetteer_path"] (the bundled file if None);
+    if it is missing or unreadable, the seed TSV is compiled instead.
+    """
+    global _GAZETTEER
+    if _GAZETTEER is None:
+        with _GAZETTEER_LOCK:
+            if _GAZETTEER is None:
+                path = PARSER_CONFIG["parser_gazetteer_path"] or DEFAULT_PATH
+                start = time.perf_counter()
+                try:
+                    _GAZETTEER = Gazetteer.load(path)
+                except (OSError, ValueError, struct.error) as e:
+                    logger.error(f"[get_gazetteer] cannot load {path}: {e}; compiling {SEED_PATH}")
+                    fallback = os.path.join(DATA_DIR, ".gazetteer.seed.bin")
+                    build_gazetteer([SEED_PATH], fallback)
+                    _GAZETTEER = Gazetteer.load(fallback)
+                logger.info(f"[get_gazetteer] loaded {len(_GAZETTEER)} places, {len(_GAZETTEER.keys)} keys in {(time.perf_counter() - start) * 1000:.1f}ms")
+    return _GAZETTEER
+
+def set_gazetteer(gazetteer: Optional[Gazetteer]) -> None:
+    """Replace the shared gazetteer (None reloads it on next use)"""
+    global _GAZETTEER
+    with _GAZETTEER_LOCK:
+        _GAZETTEER = gazetteer
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compile the TripCraft AI gazetteer")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="compile seed TSV and GeoNames files into a binary gazetteer")
+    build.add_argument("sources", nargs="*", default=[SEED_PATH], help="seed TSV and/or GeoNames dumps (earlier sources win)")
+    build.add_argument("--output", default=DEFAULT_PATH, help="binary file to write")
+    args = parser.parse_args()
+    build_gazetteer(args.sources, args.output)
@@ -1,68 +1,229 @@
 """
 Memory management utilities for TripCraft AI
+
+save_memory/load_memory/search_memory work against a pluggable backend
+selected by MEMORY_CONFIG["backend"]:
+
+- "memory": bounded in-process store of native objects (utils.memory_store)
+- "sqlite": durable SQLite store in WAL mode with group commit (utils.sqlite_store)
+
+Serialization only happens when data leaves the process (export_memory,
+search previews, or the SQLite file).
+
+With MEMORY_CONFIG["write_behind"], the configured backend is wrapped in a
+WriteBehindStore (utils.write_behind): saves return immediately and are
+applied in batches by a background worker, while load_memory still sees
+writes that are queued.
+
+Every function is thread-safe. The asave_memory/aload_memory/asearch_memory/
+aget_memory_stats coroutines give asyncio code the same API; they run inline
+for the in-process backend and in the default executor for blocking ones.
 """
+import asyncio
+import functools
 import json
-from typing import Dict, Any, List, Optional
+import threading
+from typing import Dict, Any, Iterator, List, Optional
 from datetime import datetime
-from config import logger
+from config import logger, MEMORY_CONFIG
+from .memory_store import InMemoryStore, MemoryKey, FrozenDict, make_key
+from .records import json_default
+from .sqlite_store import SQLiteStore
+from .write_behind import WriteBehindStore
+
+MEMORY_BACKENDS = {
+    "memory": InMemoryStore,
+    "sqlite": SQLiteStore
+}
+
+_BACKEND = None
+_BACKEND_LOCK = threading.Lock()
+
+def _create_backend(name: str):
+    """Build a named backend, behind a write-behind queue if configured"""
+    backend = MEMORY_BACKENDS[name]()
+    return WriteBehindStore(backend) if MEMORY_CONFIG["write_behind"] else backend
+
+def get_memory_backend():
+    """Get the active memory backend, creating it from MEMORY_CONFIG on first use"""
+    global _BACKEND
+    if _BACKEND is None:
+        with _BACKEND_LOCK:
+            if _BACKEND is None:
+                _BACKEND = _create_backend(MEMORY_CONFIG["backend"])
+                write_behind = " (write-behind)" if isinstance(_BACKEND, WriteBehindStore) else ""
+                logger.info(f"[memory] using {_BACKEND.name} backend{write_behind}")
+    return _BACKEND
 
-# In-memory database for session persistence
-_MEMORY_DB: Dict[str, str] = {}
+def set_memory_backend(backend) -> None:
+    """Replace the active memory backend, closing the previous one
+
+    Args:
+        backend: Backend instance (e.g. SQLiteStore(path) or WriteBehindStore(SQLiteStore(path)))
+            or a name from MEMORY_BACKENDS (wrapped per MEMORY_CONFIG["write_behind"])
+    """
+    global _BACKEND
+    if isinstance(backend, str):
+        backend = _create_backend(backend)
+    with _BACKEND_LOCK:
+        previous, _BACKEND = _BACKEND, backend
+    if previous is not None and previous is not backend:
+        previous.close()
+    logger.info(f"[memory] switched to {backend.name} backend")
+
+def _dumps(data: Any) -> str:
+    """Serialize data for use outside the process"""
+    return data if isinstance(data, str) else json.dumps(data, default=json_default)
 
 def save_memory(key: str, data: Any, user_id: str = "default") -> bool:
-    """Save data to memory with user-specific key"""
+    """Save data to memory with user-specific key
+
+    With a write-behind backend the write is only queued; it is applied
+    shortly after, and load_memory sees it immediately.
+    """
     try:
-        memory_key = f"{key}_{user_id}"
-        serialized_data = json.dumps(data) if not isinstance(data, str) else data
-        _MEMORY_DB[memory_key] = serialized_data
-        logger.info(f"[save_memory] saved key={memory_key} (size={len(serialized_data)} chars)")
+        memory_key = make_key(key, user_id)
+        size = get_memory_backend().save(memory_key, data)
+        if size is not None:
+            logger.info(f"[save_memory] saved key={memory_key} (size={size} chars)")
         return True
     except Exception as e:
         logger.error(f"[save_memory] error saving {key}: {e}")
         return False
 
 def load_memory(key: str, user_id: str = "default") -> Optional[Any]:
-    """Load data from memory with user-specific key"""
+    """Load data from memory with user-specific key
+
+    With the in-process backend this returns the stored snapshot directly
+    (isolation="snapshot"), a mutable copy (isolation="copy") or the original
+    object (isolation="reference").
+    """
     try:
-        memory_key = f"{key}_{user_id}"
-        if memory_key in _MEMORY_DB:
-            data = _MEMORY_DB[memory_key]
-            try:
-                return json.loads(data)
-            except json.JSONDecodeError:
-                return data
-        return None
+        return get_memory_backend().load(make_key(key, user_id))
     except Exception as e:
         logger.error(f"[load_memory] error loading {key}: {e}")
         return None
 
-def search_memory(query: str, user_id: str = "default", limit: int = 10) -> Dict[str, Any]:
-    """Search memory for keys matching query"""
+def delete_memory(key: str, user_id: str = "default") -> bool:
+    """Delete a key from memory, returning whether it existed"""
+    return get_memory_backend().delete(make_key(key, user_id))
+
+def clear_memory() -> None:
+    """Remove every key from memory (counters are kept)"""
+    get_memory_backend().clear()
+
+def flush_memory() -> None:
+    """Wait until queued and buffered writes are applied and durable"""
+    get_memory_backend().flush()
+
+def search_memory(query: str, user_id: str = "default", limit: int = 10, cursor: Optional[str] = None) -> Dict[str, Any]:
+    """Search one user's memory for keys starting with query
+
+    Args:
+        query: Key prefix, e.g. "flight_search" or "hotel_search_Paris"
+        user_id: User whose keys are searched
+        limit: Maximum number of results per page
+        cursor: next_cursor from the previous page (None for the first page)
+
+    Returns:
+        Dictionary with the page of results and the cursor for the next page
+    """
     try:
-        matching_keys = [k for k in _MEMORY_DB.keys() if query in k and user_id in k]
+        total_found, page, next_cursor = get_memory_backend().search(user_id, query, limit, cursor)
         results = []
-        
-        for key in matching_keys[:limit]:
+
+        for memory_key, value in page:
+            serialized = _dumps(value)
             results.append({
-                "key": key,
-                "data": _MEMORY_DB[key][:100] + "..." if len(_MEMORY_DB[key]) > 100 else _MEMORY_DB[key]
+                "key": str(memory_key),
+                "data": serialized[:100] + "..." if len(serialized) > 100 else serialized
             })
-        
+
         logger.info(f"[search_memory] query={query} user_id={user_id} found={len(results)}")
         return {
             "query": query,
             "user_id": user_id,
-            "total_found": len(matching_keys),
-            "results": results
+            "total_found": total_found,
+            "results": results,
+            "next_cursor": next_cursor
         }
     except Exception as e:
         logger.error(f"[search_memory] error searching {query}: {e}")
-        return {"query": query, "user_id": user_id, "total_found": 0, "results": []}
+        return {"query": query, "user_id": user_id, "total_found": 0, "results": [], "next_cursor": None}
+
+def export_memory(user_id: Optional[str] = None) -> str:
+    """Serialize memory contents to JSON for use outside the process
+
+    Args:
+        user_id: Only export keys belonging to this user (all keys if None)
+
+    Returns:
+        JSON object mapping memory keys to their data
+    """
+    exported = {str(k): v for k, v in get_memory_backend().items(user_id)}
+    return json.dumps(exported, default=json_default)
 
 def get_memory_stats() -> Dict[str, Any]:
-    """Get memory database statistics"""
+    """Get memory database statistics from incrementally maintained counters
+
+    Includes key and byte totals per namespace and eviction counters. The
+    cost does not grow with the number of keys; use iter_memory_keys to
+    enumerate keys. It does not wait for a write-behind queue: writes still
+    queued are counted under write_behind["pending"].
+    """
+    backend = get_memory_backend()
+    return {"backend": backend.name, **backend.stats()}
+
+def get_user_memory_stats(user_id: str) -> Dict[str, Any]:
+    """Get key count and size for one user"""
+    return get_memory_backend().user_stats(user_id)
+
+def list_memory_keys(limit: int = 100, cursor: Optional[str] = None) -> Dict[str, Any]:
+    """List one page of memory keys
+
+    Args:
+        limit: Maximum number of keys in the page
+        cursor: next_cursor from the previous page (None for the first page)
+
+    Returns:
+        Dictionary with the keys and the cursor for the next page
+    """
+    position = tuple(json.loads(cursor)) if cursor else None
+    keys, next_position = get_memory_backend().list_keys(limit, position)
     return {
-        "total_keys": len(_MEMORY_DB),
-        "total_size": sum(len(v) for v in _MEMORY_DB.values()),
-        "keys": list(_MEMORY_DB.keys())
-    }
\ No newline at end of file
+        "keys": [str(k) for k in keys],
+        "next_cursor": json.dumps(next_position) if next_position else None
+    }
+
+def iter_memory_keys(page_size: int = 100) -> Iterator[str]:
+    """Stream every memory key, fetching one page at a time"""
+    cursor = None
+    while True:
+        page = list_memory_keys(page_size, cursor)
+        yield from page["keys"]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return
+
+async def _run_async(func, *args, **kwargs):
+    """Run a memory call without blocking the event loop on backend I/O"""
+    if not getattr(get_memory_backend(), "blocking", True):
+        return func(*args, **kwargs)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, functools.partial(func, *args, **kwargs))
+
+async def asave_memory(key: str, data: Any, user_id: str = "default") -> bool:
+    """Async variant of save_memory"""
+    return await _run_async(save_memory, key, data, user_id)
+
+async def aload_memory(key: str, user_id: str = "default") -> Optional[Any]:
+    """Async variant of load_memory"""
+    return await _run_async(load_memory, key, user_id)
+
+async def asearch_memory(query: str, user_id: str = "default", limit: int = 10, cursor: Optional[str] = None) -> Dict[str, Any]:
+    """Async variant of search_memory"""
+    return await _run_async(search_memory, query, user_id, limit, cursor)
+
+async def aget_memory_stats() -> Dict[str, Any]:
+    """Async variant of get_memory_stats"""
+    return await _run_async(get_memory_stats)
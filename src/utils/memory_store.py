@@ -0,0 +1,677 @@
+"""
+In-process memory backend for TripCraft AI
+
+Values are kept as native Python objects. The store is bounded: entries
+expire after their namespace TTL and the least recently used entries are
+evicted once MEMORY_CONFIG["max_bytes"] is exceeded. Every user has a
+sorted index of their keys, so lookups and prefix searches only touch that
+user's data.
+
+The store is split into MEMORY_CONFIG["shards"] lock-striped segments and
+all keys of a user live in the same segment, so concurrent sessions for
+different users rarely share a lock and per-user operations see a
+consistent view.
+
+With MEMORY_CONFIG["dedup"] on, snapshot sub-objects of at least
+MEMORY_CONFIG["dedup_min_bytes"] are interned per shard by content hash and
+reference counted, so repeated payloads (preferences embedded in aggregated
+plans, identical search results) are stored once. The byte budget applies
+to these deduplicated bytes.
+
+Namespaces listed in MEMORY_CONFIG["namespace_codecs"] are stored encoded
+(and optionally compressed) by utils.codecs to trade CPU for footprint;
+loads decode them into fresh objects.
+"""
+import bisect
+import heapq
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Dict, Any, Iterator, List, NamedTuple, Optional, Tuple
+from config import logger, MEMORY_CONFIG
+from .codecs import EncodedValue, codec_for, decode, encode_for
+from .records import Record
+
+ISOLATION_MODES = ("snapshot", "copy", "reference")
+
+class MemoryKey(NamedTuple):
+    """Structured memory key: "flight_search_Tokyo" for user_1 is
+    MemoryKey("flight_search", "user_1", "Tokyo")"""
+    namespace: str
+    user_id: str
+    subkey: str
+
+    @property
+    def name(self) -> str:
+        """Key as passed to save_memory (namespace plus subkey)"""
+        return f"{self.namespace}_{self.subkey}" if self.subkey else self.namespace
+
+    def __str__(self) -> str:
+        return f"{self.name}_{self.user_id}"
+
+def make_key(key: str, user_id: str) -> MemoryKey:
+    """Split a key into its configured namespace and subkey
+
+    Keys outside the configured namespaces form their own namespace.
+    """
+    best = None
+    for namespace in MEMORY_CONFIG["namespace_ttls"]:
+        if (key == namespace or key.startswith(namespace + "_")) and (best is None or len(namespace) > len(best)):
+            best = namespace
+    if best is None:
+        return MemoryKey(key, user_id, "")
+    return MemoryKey(best, user_id, key[len(best) + 1:])
+
+def ttl_for(namespace: str) -> Optional[float]:
+    """Get the time-to-live in seconds for a namespace"""
+    return MEMORY_CONFIG["namespace_ttls"].get(namespace, MEMORY_CONFIG["default_ttl"])
+
+class FrozenDict(dict):
+    """Read-only dict used for immutable memory snapshots
+
+    Subclasses dict so snapshots stay JSON-serializable and cheap to read.
+    Instances built by snapshot() remember their JSON size, so snapshotting
+    one again (e.g. when a write-behind queue hands it to its backend) does
+    not walk it a second time.
+    """
+    __slots__ = ("_snapshot_size",)
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("memory snapshots are read-only; use isolation='copy' for mutable results")
+
+    __setitem__ = __delitem__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+def snapshot(data: Any) -> Tuple[Any, int]:
+    """Freeze data into a read-only snapshot and estimate its JSON size in one walk"""
+    if isinstance(data, str):
+        return data, len(data) + 2
+    if data is None:
+        return data, 4
+    if isinstance(data, bool):
+        return data, 4 if data else 5
+    if isinstance(data, (int, float)):
+        return data, len(repr(data))
+    if isinstance(data, dict):
+        size = getattr(data, "_snapshot_size", None)
+        if size is not None:
+            return data, size
+        items = {}
+        size = 2
+        for k, v in data.items():
+            frozen, item_size = snapshot(v)
+            items[k] = frozen
+            size += len(str(k)) + 4 + item_size
+        frozen = FrozenDict(items)
+        frozen._snapshot_size = size + max(0, 2 * (len(items) - 1))
+        return frozen, frozen._snapshot_size
+    if isinstance(data, Record):
+        # Records are immutable: keep them by reference, sized as their dict
+        return data, snapshot(data.to_dict())[1]
+    if isinstance(data, (list, tuple)):
+        frozen_items = []
+        size = 2
+        for v in data:
+            frozen, item_size = snapshot(v)
+            frozen_items.append(frozen)
+            size += item_size
+        return tuple(frozen_items), size + max(0, 2 * (len(frozen_items) - 1))
+    # Non-JSON objects are kept by reference and sized by their text form
+    return data, len(str(data)) + 2
+
+def thaw(data: Any) -> Any:
+    """Build a mutable copy of a snapshot (copy-on-read)"""
+    if isinstance(data, Record):
+        return thaw(data.to_dict())
+    if isinstance(data, dict):
+        return {k: thaw(v) for k, v in data.items()}
+    if isinstance(data, tuple):
+        return [thaw(v) for v in data]
+    return data
+
+def _same(a: Any, b: Any) -> bool:
+    """Type-strict structural equality (1, 1.0 and True must stay distinct)"""
+    if a is b:
+        return True
+    if type(a) is not type(b):
+        return False
+    if isinstance(a, dict):
+        return len(a) == len(b) and all(k in b and _same(v, b[k]) for k, v in a.items())
+    if isinstance(a, tuple):
+        return len(a) == len(b) and all(_same(x, y) for x, y in zip(a, b))
+    return a == b
+
+class _Blob:
+    """Interned snapshot sub-object shared by every value containing it"""
+    __slots__ = ("value", "content_hash", "exclusive", "children", "refs")
+
+    def __init__(self, value: Any, content_hash: int, exclusive: int, children: List["_Blob"]):
+        self.value = value
+        self.content_hash = content_hash
+        # Bytes not already accounted to interned children
+        self.exclusive = exclusive
+        self.children = children
+        self.refs = 1
+
+class _ContentStore:
+    """Content-addressed, reference-counted snapshot sub-objects of one shard"""
+
+    def __init__(self):
+        self.blobs: Dict[int, List[_Blob]] = {}
+        self.blob_count = 0
+        self.unique_bytes = 0
+        self.hits = 0
+
+    def freeze(self, data: Any, min_bytes: int) -> Tuple[Any, int, Optional[int], int, List[_Blob]]:
+        """snapshot() that interns large sub-objects
+
+        Returns:
+            Tuple of (frozen value, JSON size, content hash or None,
+            bytes not held by interned blobs, blobs directly referenced)
+        """
+        if isinstance(data, (str, int, float, Record)) or data is None:
+            frozen, size = snapshot(data)
+            return frozen, size, hash((type(data), data)), size, []
+        if isinstance(data, dict):
+            items = {}
+            size = exclusive = 2 + max(0, 2 * (len(data) - 1))
+            hashes = []
+            refs: List[_Blob] = []
+            for k, v in data.items():
+                frozen, item_size, item_hash, item_exclusive, item_refs = self.freeze(v, min_bytes)
+                items[k] = frozen
+                size += len(str(k)) + 4 + item_size
+                exclusive += len(str(k)) + 4 + item_exclusive
+                refs.extend(item_refs)
+                hashes.append((k, item_hash) if item_hash is not None else None)
+            content_hash = hash(("d", frozenset(hashes))) if None not in hashes else None
+            return self._intern(FrozenDict(items), size, content_hash, exclusive, refs, min_bytes)
+        if isinstance(data, (list, tuple)):
+            frozen_items = []
+            size = exclusive = 2 + max(0, 2 * (len(data) - 1))
+            hashes = []
+            refs = []
+            for v in data:
+                frozen, item_size, item_hash, item_exclusive, item_refs = self.freeze(v, min_bytes)
+                frozen_items.append(frozen)
+                size += item_size
+                exclusive += item_exclusive
+                refs.extend(item_refs)
+                hashes.append(item_hash)
+            content_hash = hash(("l", tuple(hashes))) if None not in hashes else None
+            return self._intern(tuple(frozen_items), size, content_hash, exclusive, refs, min_bytes)
+        frozen, size = snapshot(data)
+        return frozen, size, None, size, []
+
+    def _intern(self, frozen: Any, size: int, content_hash: Optional[int], exclusive: int, refs: List[_Blob], min_bytes: int):
+        if content_hash is None or size < min_bytes:
+            return frozen, size, content_hash, exclusive, refs
+        bucket = self.blobs.setdefault(content_hash, [])
+        for blob in bucket:
+            if _same(blob.value, frozen):
+                blob.refs += 1
+                self.hits += 1
+                # The existing blob already holds its own children
+                self.release(refs)
+                return blob.value, size, content_hash, 0, [blob]
+        blob = _Blob(frozen, content_hash, exclusive, refs)
+        bucket.append(blob)
+        self.blob_count += 1
+        self.unique_bytes += exclusive
+        return frozen, size, content_hash, 0, [blob]
+
+    def release(self, refs: List[_Blob]) -> None:
+        """Drop one reference to each blob, freeing blobs nobody uses"""
+        for blob in refs:
+            blob.refs -= 1
+            if blob.refs == 0:
+                bucket = self.blobs[blob.content_hash]
+                bucket.remove(blob)
+                if not bucket:
+                    del self.blobs[blob.content_hash]
+                self.blob_count -= 1
+                self.unique_bytes -= blob.exclusive
+                self.release(blob.children)
+
+    def clear(self) -> None:
+        self.blobs.clear()
+        self.blob_count = 0
+        self.unique_bytes = 0
+
+def _decoded(value: Any) -> Any:
+    return decode(value) if isinstance(value, EncodedValue) else value
+
+class _MemoryEntry:
+    """Stored value plus the bookkeeping needed for eviction"""
+    __slots__ = ("value", "size", "namespace", "expires_at", "pinned", "exclusive", "refs")
+
+    def __init__(self, value: Any, size: int, namespace: str, expires_at: Optional[float], pinned: bool = False,
+                 exclusive: Optional[int] = None, refs: Optional[List[_Blob]] = None):
+        self.value = value
+        self.size = size
+        self.namespace = namespace
+        self.expires_at = expires_at
+        # Pinned entries are never evicted to satisfy the byte budget
+        self.pinned = pinned
+        # Bytes owned by this entry alone, and the interned blobs it shares
+        self.exclusive = size if exclusive is None else exclusive
+        self.refs = refs or []
+
+class _UserIndex:
+    """Sorted key names of one user, for prefix search and pagination"""
+    __slots__ = ("names", "keys", "size")
+
+    def __init__(self):
+        self.names: List[str] = []
+        self.keys: Dict[str, MemoryKey] = {}
+        self.size = 0
+
+class _Shard:
+    """One lock-striped segment of the in-process store
+
+    Callers must hold self.lock around every method.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        # Native objects in LRU order
+        self._db: "OrderedDict[MemoryKey, _MemoryEntry]" = OrderedDict()
+        # Unpinned keys in LRU order, so eviction never walks pinned entries
+        self._evictable: "OrderedDict[MemoryKey, None]" = OrderedDict()
+        # Logical bytes of pinned entries, so unpinned bytes are known without a scan
+        self.pinned_bytes = 0
+        # Per-user sorted key names, used for prefix search and cursor pagination
+        self._user_index: Dict[str, _UserIndex] = {}
+        # Sorted user ids, used to page through every key of the shard
+        self._users: List[str] = []
+        # Running [keys, bytes] per namespace, updated on every save and drop
+        self._namespace_stats: Dict[str, List[int]] = {}
+        # Min-heap of (expires_at, key) used to expire entries without a full scan
+        self._expiry_heap: List[Tuple[float, MemoryKey]] = []
+        # Interned sub-objects shared between this shard's entries
+        self.content = _ContentStore()
+        # total_size counts logical bytes; entry_bytes only what entries do not share
+        self._counters = {"total_size": 0, "entry_bytes": 0, "evictions": 0, "evicted_bytes": 0, "expirations": 0}
+
+    def stored_bytes(self) -> int:
+        """Bytes actually held after deduplication"""
+        return self._counters["entry_bytes"] + self.content.unique_bytes
+
+    def evictable_bytes(self) -> int:
+        """Logical bytes of unpinned entries, i.e. what eviction can work on"""
+        return self._counters["total_size"] - self.pinned_bytes
+
+    def _index_add(self, memory_key: MemoryKey, size: int) -> None:
+        index = self._user_index.get(memory_key.user_id)
+        if index is None:
+            index = self._user_index[memory_key.user_id] = _UserIndex()
+            bisect.insort(self._users, memory_key.user_id)
+        name = memory_key.name
+        bisect.insort(index.names, name)
+        index.keys[name] = memory_key
+        index.size += size
+
+    def _index_remove(self, memory_key: MemoryKey, size: int) -> None:
+        index = self._user_index[memory_key.user_id]
+        name = memory_key.name
+        del index.keys[name]
+        del index.names[bisect.bisect_left(index.names, name)]
+        index.size -= size
+        if not index.names:
+            del self._user_index[memory_key.user_id]
+            del self._users[bisect.bisect_left(self._users, memory_key.user_id)]
+
+    def _account(self, namespace: str, keys: int, size: int) -> None:
+        """Apply a key/byte delta to the running counters"""
+        self._counters["total_size"] += size
+        totals = self._namespace_stats.get(namespace)
+        if totals is None:
+            totals = self._namespace_stats[namespace] = [0, 0]
+        totals[0] += keys
+        totals[1] += size
+        if totals[0] == 0:
+            del self._namespace_stats[namespace]
+
+    def _drop(self, memory_key: MemoryKey) -> _MemoryEntry:
+        """Remove an entry, its index slot and its bytes"""
+        entry = self._db.pop(memory_key)
+        if entry.pinned:
+            self.pinned_bytes -= entry.size
+        else:
+            del self._evictable[memory_key]
+        self._index_remove(memory_key, entry.size)
+        self._account(entry.namespace, -1, -entry.size)
+        self._counters["entry_bytes"] -= entry.exclusive
+        self.content.release(entry.refs)
+        return entry
+
+    def _purge_expired(self, now: float) -> int:
+        """Drop entries whose TTL has passed"""
+        purged = 0
+        heap = self._expiry_heap
+        while heap and heap[0][0] <= now:
+            expires_at, memory_key = heapq.heappop(heap)
+            entry = self._db.get(memory_key)
+            # Heap items go stale when a key is overwritten or evicted
+            if entry is not None and entry.expires_at == expires_at:
+                self._drop(memory_key)
+                purged += 1
+        if purged:
+            self._counters["expirations"] += purged
+            logger.info(f"[memory] expired {purged} keys")
+        return purged
+
+    def evict(self, excess: int) -> int:
+        """Evict least recently used, unpinned entries until about excess bytes are freed
+
+        Returns:
+            Number of entries evicted
+        """
+        victims = []
+        for memory_key in self._evictable:
+            if excess <= 0:
+                break
+            entry = self._db[memory_key]
+            victims.append(memory_key)
+            # What a victim frees: its own bytes plus blobs only it uses
+            excess -= entry.exclusive + sum(b.exclusive for b in entry.refs if b.refs == 1)
+        for memory_key in victims:
+            entry = self._drop(memory_key)
+            self._counters["evicted_bytes"] += entry.size
+        self._counters["evictions"] += len(victims)
+        return len(victims)
+
+    def put(self, memory_key: MemoryKey, stored: Any, size: int,
+            exclusive: Optional[int] = None, refs: Optional[List[_Blob]] = None) -> None:
+        ttl = ttl_for(memory_key.namespace)
+        now = time.monotonic()
+        expires_at = now + ttl if ttl is not None else None
+
+        if memory_key in self._db:
+            self._drop(memory_key)
+        pinned = memory_key.namespace in MEMORY_CONFIG["pinned_namespaces"]
+        entry = self._db[memory_key] = _MemoryEntry(stored, size, memory_key.namespace, expires_at, pinned, exclusive, refs)
+        if pinned:
+            self.pinned_bytes += entry.size
+        else:
+            self._evictable[memory_key] = None
+        self._index_add(memory_key, size)
+        self._account(memory_key.namespace, 1, size)
+        self._counters["entry_bytes"] += entry.exclusive
+        if expires_at is not None:
+            heapq.heappush(self._expiry_heap, (expires_at, memory_key))
+
+        self._purge_expired(now)
+
+    def get(self, memory_key: MemoryKey) -> Optional[Any]:
+        entry = self._db.get(memory_key)
+        if entry is None:
+            return None
+        if entry.expires_at is not None and entry.expires_at <= time.monotonic():
+            self._drop(memory_key)
+            self._counters["expirations"] += 1
+            return None
+        self._db.move_to_end(memory_key)
+        if not entry.pinned:
+            self._evictable.move_to_end(memory_key)
+        return entry.value
+
+    def delete(self, memory_key: MemoryKey) -> bool:
+        if memory_key not in self._db:
+            return False
+        self._drop(memory_key)
+        return True
+
+    def search(self, user_id: str, prefix: str, limit: int, cursor: Optional[str]) -> Tuple[int, List[Tuple[MemoryKey, Any]], Optional[str]]:
+        self._purge_expired(time.monotonic())
+        index = self._user_index.get(user_id) or _UserIndex()
+        names = index.names
+        # Keys sharing a prefix are contiguous in the sorted index
+        start = bisect.bisect_left(names, prefix)
+        end = bisect.bisect_left(names, prefix + "\uffff")
+        page_start = max(start, bisect.bisect_right(names, cursor)) if cursor is not None else start
+        page_end = min(end, page_start + limit)
+        page = [(index.keys[name], self._db[index.keys[name]].value) for name in names[page_start:page_end]]
+        return end - start, page, names[page_end - 1] if page_end < end else None
+
+    def items(self, user_id: Optional[str] = None) -> List[Tuple[MemoryKey, Any]]:
+        """Copy out (key, value) pairs, optionally for one user"""
+        self._purge_expired(time.monotonic())
+        if user_id is None:
+            return [(k, e.value) for k, e in self._db.items()]
+        index = self._user_index.get(user_id) or _UserIndex()
+        return [(k, self._db[k].value) for k in index.keys.values()]
+
+    def list_keys(self, after: Optional[Tuple[str, str]], limit: int) -> List[MemoryKey]:
+        """Up to limit keys ordered by (user_id, name), starting after a position"""
+        keys = []
+        if after is None:
+            position = 0
+        else:
+            position = bisect.bisect_left(self._users, after[0])
+        while position < len(self._users) and len(keys) < limit:
+            user_id = self._users[position]
+            index = self._user_index[user_id]
+            start = 0
+            if after is not None and user_id == after[0]:
+                start = bisect.bisect_right(index.names, after[1])
+            for name in index.names[start:start + limit - len(keys)]:
+                keys.append(index.keys[name])
+            position += 1
+        return keys
+
+    def user_stats(self, user_id: str) -> Tuple[int, int]:
+        index = self._user_index.get(user_id)
+        return (len(index.names), index.size) if index else (0, 0)
+
+    def stats(self) -> Dict[str, Any]:
+        """Read the running counters; cost does not depend on the key count"""
+        self._purge_expired(time.monotonic())
+        return {
+            "total_keys": len(self._db),
+            "users": len(self._users),
+            "namespaces": {ns: tuple(totals) for ns, totals in self._namespace_stats.items()},
+            "stored_size": self.stored_bytes(),
+            "pinned_size": self.pinned_bytes,
+            "dedup_blobs": self.content.blob_count,
+            "dedup_hits": self.content.hits,
+            **self._counters
+        }
+
+    def clear(self) -> None:
+        self._db.clear()
+        self._evictable.clear()
+        self.pinned_bytes = 0
+        self._user_index.clear()
+        self._users.clear()
+        self._namespace_stats.clear()
+        self._expiry_heap.clear()
+        self.content.clear()
+        self._counters["total_size"] = 0
+        self._counters["entry_bytes"] = 0
+
+class InMemoryStore:
+    """Bounded, indexed, lock-striped in-process memory backend"""
+
+    name = "memory"
+    # Operations never block on I/O, so async callers may run them inline
+    blocking = False
+
+    def __init__(self, shards: Optional[int] = None):
+        shard_count = shards or MEMORY_CONFIG["shards"]
+        self._shards = [_Shard() for _ in range(shard_count)]
+
+    def _shard_for(self, user_id: str) -> _Shard:
+        # crc32 keeps the user -> shard mapping stable across processes
+        return self._shards[zlib.crc32(user_id.encode("utf-8")) % len(self._shards)]
+
+    def _snapshot_all(self, read):
+        """Apply read to every shard while holding all shard locks
+
+        Locks are always taken in shard order, so concurrent snapshots cannot
+        deadlock, and the combined result reflects a single point in time.
+        """
+        acquired = []
+        try:
+            for shard in self._shards:
+                shard.lock.acquire()
+                acquired.append(shard)
+            return [read(shard) for shard in self._shards]
+        finally:
+            for shard in reversed(acquired):
+                shard.lock.release()
+
+    def save(self, memory_key: MemoryKey, data: Any) -> int:
+        """Store data under a key and return its size"""
+        if codec_for(memory_key.namespace) is not None:
+            stored = encode_for(memory_key.namespace, data)
+            size = len(stored)
+        elif MEMORY_CONFIG["isolation"] == "reference":
+            stored, size = data, snapshot(data)[1]
+        elif MEMORY_CONFIG["dedup"]:
+            shard = self._shard_for(memory_key.user_id)
+            with shard.lock:
+                stored, size, _, exclusive, refs = shard.content.freeze(data, MEMORY_CONFIG["dedup_min_bytes"])
+                shard.put(memory_key, stored, size, exclusive, refs)
+            self._enforce_budget()
+            return size
+        else:
+            stored, size = snapshot(data)
+        shard = self._shard_for(memory_key.user_id)
+        with shard.lock:
+            shard.put(memory_key, stored, size)
+        self._enforce_budget()
+        return size
+
+    def _enforce_budget(self) -> int:
+        """Evict until the whole store fits MEMORY_CONFIG["max_bytes"]
+
+        Every shard keeps running byte counters, so the store total is a sum
+        over shards. Eviction takes the least recently used unpinned entries
+        of the shard with the most evictable bytes, one shard lock at a time;
+        counters of the other shards are read without their locks, which is
+        at worst briefly stale.
+        """
+        max_bytes = MEMORY_CONFIG["max_bytes"]
+        if max_bytes is None:
+            return 0
+        evicted = 0
+        while True:
+            excess = sum(shard.stored_bytes() for shard in self._shards) - max_bytes
+            if excess <= 0:
+                break
+            shard = max(self._shards, key=_Shard.evictable_bytes)
+            if not shard.evictable_bytes():
+                logger.warning(f"[memory] over budget with only pinned keys left (excess={excess} max={max_bytes})")
+                break
+            with shard.lock:
+                victims = shard.evict(excess)
+            if not victims:
+                break
+            evicted += victims
+        if evicted:
+            logger.info(f"[memory] evicted {evicted} keys to stay within {max_bytes} bytes")
+        return evicted
+
+    def load(self, memory_key: MemoryKey) -> Optional[Any]:
+        """Load data for a key according to MEMORY_CONFIG["isolation"]"""
+        shard = self._shard_for(memory_key.user_id)
+        with shard.lock:
+            value = shard.get(memory_key)
+        if isinstance(value, EncodedValue):
+            return decode(value)
+        if value is not None and MEMORY_CONFIG["isolation"] == "copy":
+            return thaw(value)
+        return value
+
+    def delete(self, memory_key: MemoryKey) -> bool:
+        shard = self._shard_for(memory_key.user_id)
+        with shard.lock:
+            return shard.delete(memory_key)
+
+    def search(self, user_id: str, prefix: str, limit: int, cursor: Optional[str]) -> Tuple[int, List[Tuple[MemoryKey, Any]], Optional[str]]:
+        """Find one page of a user's keys starting with prefix
+
+        Returns:
+            Tuple of (total matches, [(key, value)], next cursor)
+        """
+        shard = self._shard_for(user_id)
+        with shard.lock:
+            total, page, next_cursor = shard.search(user_id, prefix, limit, cursor)
+        return total, [(k, _decoded(v)) for k, v in page], next_cursor
+
+    def items(self, user_id: Optional[str] = None) -> Iterator[Tuple[MemoryKey, Any]]:
+        """Iterate over a consistent snapshot of (key, value) pairs"""
+        if user_id is not None:
+            shard = self._shard_for(user_id)
+            with shard.lock:
+                pairs = shard.items(user_id)
+        else:
+            pairs = [pair for shard_items in self._snapshot_all(lambda shard: shard.items()) for pair in shard_items]
+        return ((k, _decoded(v)) for k, v in pairs)
+
+    def list_keys(self, limit: int, cursor: Optional[Tuple[int, str, str]]) -> Tuple[List[MemoryKey], Optional[Tuple[int, str, str]]]:
+        """One page of keys in (shard, user_id, name) order
+
+        Returns:
+            Tuple of (keys, cursor for the next page or None)
+        """
+        shard_position, after = (cursor[0], (cursor[1], cursor[2])) if cursor else (0, None)
+        keys: List[MemoryKey] = []
+        while shard_position < len(self._shards) and len(keys) < limit:
+            shard = self._shards[shard_position]
+            with shard.lock:
+                keys.extend(shard.list_keys(after, limit - len(keys)))
+            if len(keys) < limit:
+                shard_position, after = shard_position + 1, None
+        if len(keys) < limit:
+            return keys, None
+        last = keys[-1]
+        return keys, (shard_position, last.user_id, last.name)
+
+    def user_stats(self, user_id: str) -> Dict[str, Any]:
+        shard = self._shard_for(user_id)
+        with shard.lock:
+            total_keys, total_size = shard.user_stats(user_id)
+        return {"user_id": user_id, "total_keys": total_keys, "total_size": total_size}
+
+    def stats(self) -> Dict[str, Any]:
+        """Combine shard counters taken at a single point in time"""
+        shard_stats = self._snapshot_all(lambda shard: shard.stats())
+        combined = {
+            "total_keys": sum(s["total_keys"] for s in shard_stats),
+            "total_size": sum(s["total_size"] for s in shard_stats),
+            "max_bytes": MEMORY_CONFIG["max_bytes"],
+            "shards": len(self._shards),
+            "users": sum(s["users"] for s in shard_stats)
+        }
+        for counter in ("stored_size", "pinned_size", "dedup_blobs", "dedup_hits", "evictions", "evicted_bytes", "expirations"):
+            combined[counter] = sum(s[counter] for s in shard_stats)
+        namespaces: Dict[str, Dict[str, int]] = {}
+        for s in shard_stats:
+            for namespace, (keys, size) in s["namespaces"].items():
+                totals = namespaces.setdefault(namespace, {"keys": 0, "bytes": 0})
+                totals["keys"] += keys
+                totals["bytes"] += size
+        combined["namespaces"] = namespaces
+        return combined
+
+    def clear(self) -> None:
+        """Remove every key (counters are kept)"""
+        self._snapshot_all(lambda shard: shard.clear())
+
+    def flush(self) -> None:
+        """Nothing is buffered in process memory"""
+
+    def close(self) -> None:
+        self.clear()
@@ -1,77 +1,382 @@
 """
 Natural language parsing utilities for travel requests
+
+Everything the parser looks for is compiled once at import into a
+TravelRequestMatcher: the destination cue words, one pattern for numbers
+and the word after them, and one alternation pattern over the style and
+interest keywords, factored like a trie and wrapped in a lookahead so a
+single scan finds every keyword, overlapping ones included. Destinations are resolved against the
+gazetteer (utils/gazetteer.py) while scanning the words of the request,
+so multi-word cities ("Rio de Janeiro"), aliases ("Saigon") and airport
+codes ("NRT") all map to one canonical name. Travel dates ("March 3-8",
+"from 3 March to 10 March", "2025-03-03") are only searched for when the
+request names a month or contains an ISO-like date.
+
+Every field comes with a confidence between 0 (a default was used) and 1
+(stated explicitly), so callers can tell a fully specified request from
+one that needs a conversation.
 """
 import re
-from typing import Dict, List
+import string
+from datetime import date, timedelta
+from typing import Dict, FrozenSet, List, Optional, Pattern, Tuple
 from config import TRAVEL_DEFAULTS
+from .gazetteer import Gazetteer, WORD_PATTERN, get_gazetteer, strip_accents
+
+# Words followed by the destination, in priority order ("travel to",
+# "going to" and "trip to" all end in "to")
+DESTINATION_CUES = ['to', 'visit']
+
+# Words after a number that make it a count rather than an amount of money
+COUNT_UNITS = frozenset([
+    'day', 'days', 'night', 'nights', 'week', 'weeks', 'month', 'months', 'year', 'years',
+    'hour', 'hours', 'people', 'person', 'persons', 'adult', 'adults', 'guest', 'guests',
+    'traveler', 'travelers', 'traveller', 'travellers', 'kid', 'kids', 'child', 'children',
+    'room', 'rooms', 'star', 'stars', 'km', 'mile', 'miles'
+])
+
+# Words after a number that make it an amount of money
+CURRENCY_WORDS = frozenset(['usd', 'dollar', 'dollars', 'eur', 'euro', 'euros', 'gbp', 'pound', 'pounds'])
+
+# Travel styles in priority order: the first style with a keyword wins
+STYLE_KEYWORDS = {
+    'budget': ['budget', 'cheap', 'affordable', 'low-cost'],
+    'luxury': ['luxury', 'premium', 'high-end', 'expensive']
+}
+
+INTEREST_KEYWORDS = {
+    'culture': ['culture', 'history', 'museum', 'art', 'heritage', 'traditional'],
+    'food': ['food', 'cuisine', 'restaurant', 'dining', 'culinary', 'local food'],
+    'shopping': ['shopping', 'market', 'shop', 'boutique', 'mall', 'souvenirs'],
+    'adventure': ['adventure', 'hiking', 'outdoor', 'sports', 'activities', 'nature'],
+    'nightlife': ['nightlife', 'bars', 'clubs', 'entertainment', 'party'],
+    'relaxation': ['relax', 'spa', 'beach', 'peaceful', 'quiet', 'wellness']
+}
+
+CURRENCY_SIGNS = '$€£¥'
+
+# Every number (with thousands separators and decimals) and the word after
+# it; the pattern starts with a plain digit class so the engine skips
+# ahead to digits
+NUMBER_PATTERN: Pattern = re.compile(r'(\d[\d,]*)(?:\.\d+)?(?:\s*([a-z]+))?')
+
+MONTHS = {
+    'jan': 1, 'january': 1, 'feb': 2, 'february': 2, 'mar': 3, 'march': 3, 'apr': 4, 'april': 4,
+    'may': 5, 'jun': 6, 'june': 6, 'jul': 7, 'july': 7, 'aug': 8, 'august': 8,
+    'sep': 9, 'sept': 9, 'september': 9, 'oct': 10, 'october': 10,
+    'nov': 11, 'november': 11, 'dec': 12, 'december': 12
+}
+_MONTH = '|'.join(sorted(MONTHS, key=len, reverse=True))
+
+# A four-digit number after a date is its year unless money follows
+# ("March 3, 2500 dollars") ...
+_YEAR = (r'(?:,?\s+(?P<year>\d{4})\b(?!\s*(?:[' + re.escape(CURRENCY_SIGNS) + r']|(?:'
+         + '|'.join(sorted(CURRENCY_WORDS)) + r')\b)))?')
+# ... and it is within this many years of today ("dec 28 - jan 3 2000" ends
+# with a budget, not a year)
+YEAR_WINDOW = 10
 
-def parse_travel_request(user_input: str) -> Dict:
+# "March 3", "Mar. 3rd, 2025", "3 March", "3rd of March" and "2025-03-03"
+DATE_PATTERN: Pattern = re.compile(
+    rf'\b(?:(?P<month>{_MONTH})\.?\s+(?P<day>\d{{1,2}})(?:st|nd|rd|th)?'
+    rf'|(?P<day_first>\d{{1,2}})(?:st|nd|rd|th)?\s+(?:of\s+)?(?P<month_last>{_MONTH}))\b'
+    + _YEAR +
+    r'|\b(?P<iso_year>\d{4})-(?P<iso_month>\d{1,2})-(?P<iso_day>\d{1,2})\b'
+)
+
+# Cheap check for ISO dates before running DATE_PATTERN
+ISO_DATE_HINT: Pattern = re.compile(r'\d{4}-\d')
+
+# Other end of a range that names its month once: "March 3-8[, 2025]" ...
+RANGE_END_PATTERN: Pattern = re.compile(
+    r'\s*(?:-|–|to|until|till|through)\s*(\d{1,2})(?:st|nd|rd|th)?\b(?!\s*(?:day|night|week)s?\b)'
+    + _YEAR
+)
+# ... and "3-8 March", "from 3 to 8 March"
+RANGE_START_PATTERN: Pattern = re.compile(r'(\d{1,2})(?:st|nd|rd|th)?\s*(?:-|–|to|until|till|through)\s*$')
+
+# Confidence of a field that was stated, inferred or defaulted
+CONFIDENCE_STATED = 1.0
+CONFIDENCE_INFERRED = 0.9
+CONFIDENCE_GUESSED = 0.5
+CONFIDENCE_DEFAULT = 0.0
+
+def _calendar_date(year: Optional[int], month: int, day: int, after: date) -> Optional[date]:
+    """Date of a day and month, in the first year on or after `after` if none is given"""
+    try:
+        if year is not None:
+            return date(year, month, day)
+        resolved = date(after.year, month, day)
+        return resolved if resolved >= after else date(after.year + 1, month, day)
+    except ValueError:
+        return None
+
+# ASCII punctuation -> space, to split ASCII text into words with bytes
+# methods (bytes.translate is a table lookup, str.translate a dict lookup)
+_PUNCTUATION = bytes.maketrans(string.punctuation.encode(), b' ' * len(string.punctuation))
+
+def _trie_alternation(keywords: List[str]) -> str:
+    """Regex alternation of keywords with shared prefixes factored out
+
+    "shop|shopping|spa" becomes "s(?:hop(?:ping)?|pa)": each position of
+    the text is tried against one branch per first character instead of
+    every keyword, and optional tails are greedy, so the longest keyword
+    starting at a position wins.
+    """
+    trie: Dict[str, dict] = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def branch(node: Dict[str, dict]) -> str:
+        tails = [re.escape(char) + branch(child) for char, child in sorted(node.items()) if char]
+        if not tails:
+            return ''
+        if '' in node:
+            return '(?:' + '|'.join(tails) + ')?'
+        return tails[0] if len(tails) == 1 else '(?:' + '|'.join(tails) + ')'
+
+    return branch(trie)
+
+class TravelRequestMatcher:
+    """Precompiled extractor of the fields of a travel request
+
+    Args:
+        cues: Words preceding a destination, in priority order
+        styles: Style -> keywords, in priority order
+        interests: Interest category -> keywords
+        gazetteer: Places to resolve destinations against (the shared gazetteer if None)
+    """
+
+    def __init__(self, cues: List[str], styles: Dict[str, List[str]], interests: Dict[str, List[str]],
+                 gazetteer: Optional[Gazetteer] = None):
+        self.cues = [cue.lower().split() for cue in cues]
+        self.month_words = frozenset(MONTHS)
+        self.gazetteer = gazetteer
+        self.styles = list(styles)
+        self.interests = list(interests)
+        # Each keyword once, with every label it stands for
+        labels: Dict[str, set] = {}
+        for group in (styles, interests):
+            for label, keywords in group.items():
+                for keyword in keywords:
+                    labels.setdefault(keyword, set()).add(label)
+        # The lookahead finds the longest keyword at every position, so a
+        # keyword also stands for the labels of the keywords inside it
+        # ("party" contains "art"); overlapping ones ("sparta": "spa",
+        # "art") are found at their own positions
+        self.keyword_labels: Dict[str, FrozenSet[str]] = {
+            keyword: frozenset().union(*[found for other, found in labels.items() if other in keyword])
+            for keyword in labels
+        }
+        self.keyword_pattern: Pattern = re.compile('(?=(' + _trie_alternation(list(labels)) + '))')
+
+    def cue_rank(self, words: List[str], position: int) -> Optional[int]:
+        """Priority of the cue right before a word, or None if there is none"""
+        for rank, cue in enumerate(self.cues):
+            if position >= len(cue) and words[position - len(cue):position] == cue:
+                return rank
+        return None
+
+    def words(self, text: str) -> Tuple[List[str], List[str]]:
+        """Words of a text (accents stripped), as written and lowercased"""
+        if text.isascii():
+            spaced = text.encode().translate(_PUNCTUATION).decode()
+            return spaced.split(), spaced.lower().split()
+        words = WORD_PATTERN.findall(strip_accents(text))
+        return words, ' '.join(words).lower().split()
+
+    def resolve_destination(self, words: List[str], lowered: List[str]) -> Tuple[Optional[str], float]:
+        """Destination named in a request and its confidence
+
+        Places are matched longest first while scanning the words. The
+        place after the highest priority cue wins (leftmost on ties), then
+        the first capitalized place; a capitalized word after a cue that
+        is not in the gazetteer is taken as is.
+        """
+        gazetteer = self.gazetteer or get_gazetteer()
+        heads = gazetteer.heads.keys()
+        last_rank = len(self.cues)
+        best_rank, best, covered = last_rank + 1, None, 0
+        # Only words that can start a place (or all-caps codes) are looked up
+        if not (heads.isdisjoint(lowered) and heads.isdisjoint(words)):
+            for i, word in enumerate(lowered):
+                if i < covered:
+                    continue
+                match = gazetteer.longest_match(lowered, i) if word in heads else None
+                if match is None and words[i] in heads:
+                    index = gazetteer.code(words[i])
+                    match = (index, 1) if index is not None else None
+                if match is None:
+                    continue
+                rank = self.cue_rank(lowered, i)
+                if rank is None and words[i][0].isupper():
+                    rank = last_rank
+                if rank is not None and rank < best_rank:
+                    best_rank, best = rank, gazetteer.name(match[0])
+                covered = i + match[1]
+        if best is not None:
+            return best, CONFIDENCE_STATED if best_rank < last_rank else CONFIDENCE_INFERRED
+        unknown = [(rank, i) for i, word in enumerate(words)
+                   if word[0].isupper() and not word.isdigit()
+                   for rank in [self.cue_rank(lowered, i)] if rank is not None]
+        if unknown:
+            return words[min(unknown)[1]].title(), CONFIDENCE_GUESSED
+        return None, CONFIDENCE_DEFAULT
+
+    def destination(self, text: str) -> Optional[str]:
+        """Destination named in a request, if any"""
+        return self.resolve_destination(*self.words(text))[0]
+
+    def dates(self, lower: str, today: date) -> Tuple[Optional[date], Optional[date], List[Tuple[int, int]], bool]:
+        """Departure and return dates named in a request
+
+        Dates without a year are the next ones on or after today (the
+        return date: on or after the departure).
+
+        Returns:
+            Tuple of (departure, return, spans of the text used by dates,
+            whether they make a trip that can be booked: a valid departure
+            on or after today and, if a return date was named, a valid one
+            after the departure)
+        """
+        days, spans = [], []
+        for match in DATE_PATTERN.finditer(lower):
+            groups = match.groupdict()
+            start, end = match.span()
+            if groups['iso_year']:
+                days.append((int(groups['iso_year']), int(groups['iso_month']), int(groups['iso_day'])))
+            else:
+                year = int(groups['year']) if groups['year'] else None
+                if year is not None and abs(year - today.year) > YEAR_WINDOW:
+                    # Not a year: leave the number to the budget
+                    year, end = None, match.start('year')
+                month = MONTHS[groups['month'] or groups['month_last']]
+                if groups['day_first']:
+                    head = RANGE_START_PATTERN.search(lower, max(0, start - 16), start)
+                    if head:
+                        days.append((year, month, int(head.group(1))))
+                        start = head.start()
+                    days.append((year, month, int(groups['day_first'])))
+                else:
+                    tail = RANGE_END_PATTERN.match(lower, end)
+                    tail_end = tail.end() if tail else end
+                    if tail and tail.group('year'):
+                        if abs(int(tail.group('year')) - today.year) > YEAR_WINDOW:
+                            tail_end = tail.start('year')
+                        elif year is None:
+                            year = int(tail.group('year'))
+                    days.append((year, month, int(groups['day'])))
+                    if tail:
+                        days.append((year, month, int(tail.group(1))))
+                        end = tail_end
+            spans.append((start, end))
+        depart = _calendar_date(*days[0], today) if days else None
+        back = _calendar_date(*days[1], depart) if depart and len(days) > 1 else None
+        if back and back <= depart:
+            back = None
+        bookable = depart is not None and depart >= today and (len(days) < 2 or back is not None)
+        return depart, back, spans, bookable
+
+    def labels(self, lower: str) -> FrozenSet[str]:
+        """Style and interest labels of the keywords found in the text"""
+        keyword_labels = self.keyword_labels
+        return frozenset().union(*[keyword_labels[keyword] for keyword in self.keyword_pattern.findall(lower)])
+
+    def parse(self, user_input: str, today: Optional[date] = None) -> Dict:
+        """Parse a request, filling fields it does not mention from TRAVEL_DEFAULTS
+
+        The duration is the first number of days (or weeks), else the
+        length of the date range. The budget is the last amount of money:
+        the last number with a currency sign or word, else the last number
+        that is not a count of days, people, etc. or part of a date.
+        """
+        today = today or date.today()
+        lower = user_input.lower()
+        words, lowered = self.words(user_input)
+        place, place_confidence = self.resolve_destination(words, lowered)
+        depart = back = None
+        spans: List[Tuple[int, int]] = []
+        bookable = True
+        if not self.month_words.isdisjoint(lowered) or ('-' in lower and ISO_DATE_HINT.search(lower)):
+            depart, back, spans, bookable = self.dates(lower, today)
+        days = weeks = money = None
+        amounts, money_confidence = [], CONFIDENCE_STATED
+        for match in NUMBER_PATTERN.finditer(lower):
+            if spans and any(start <= match.start() < end for start, end in spans):
+                continue
+            number, unit = match.groups()
+            if number.endswith(','):
+                # "3000, 2 adults": the word after the comma is not a unit
+                number, unit = number.rstrip(','), None
+            value = int(number.replace(',', ''))
+            sign = lower[max(0, match.start() - 2):match.start()].strip()[-1:]
+            if (sign and sign in CURRENCY_SIGNS) or unit in CURRENCY_WORDS:
+                money = value
+            elif unit not in COUNT_UNITS:
+                amounts.append(value)
+            elif days is None and unit in ('day', 'days'):
+                days = value
+            elif weeks is None and unit in ('week', 'weeks'):
+                weeks = value
+        if money is None and amounts:
+            money, money_confidence = amounts[-1], CONFIDENCE_INFERRED
+
+        if days is not None:
+            duration, duration_confidence = days, CONFIDENCE_STATED
+        elif weeks is not None:
+            duration, duration_confidence = 7 * weeks, CONFIDENCE_STATED
+        elif depart and back:
+            duration, duration_confidence = (back - depart).days, CONFIDENCE_STATED
+        else:
+            duration, duration_confidence = TRAVEL_DEFAULTS["default_duration"], CONFIDENCE_DEFAULT
+        if depart and back:
+            dates_confidence = CONFIDENCE_STATED
+        elif depart:
+            # The return date follows from the duration, if there is one
+            back = depart + timedelta(days=duration)
+            dates_confidence = CONFIDENCE_INFERRED if duration_confidence else CONFIDENCE_GUESSED
+        else:
+            dates_confidence = CONFIDENCE_DEFAULT
+        if not bookable:
+            # Past or impossible dates were stated, but cannot be planned as is
+            dates_confidence = min(dates_confidence, CONFIDENCE_GUESSED)
+
+        found = self.labels(lower)
+        style = next((style for style in self.styles if style in found), None)
+        interests = [interest for interest in self.interests if interest in found]
+        return {
+            'destination': place or TRAVEL_DEFAULTS["default_destination"],
+            'budget': money if money is not None else TRAVEL_DEFAULTS["default_budget"],
+            'duration': duration,
+            'depart_date': depart.isoformat() if depart else None,
+            'return_date': back.isoformat() if back else None,
+            'style': style or TRAVEL_DEFAULTS["default_style"],
+            'interests': interests or TRAVEL_DEFAULTS["default_interests"],
+            'confidence': {
+                'destination': place_confidence,
+                'budget': money_confidence if money is not None else CONFIDENCE_DEFAULT,
+                'duration': duration_confidence,
+                'dates': dates_confidence,
+                'style': CONFIDENCE_STATED if style else CONFIDENCE_GUESSED,
+                'interests': CONFIDENCE_STATED if interests else CONFIDENCE_GUESSED
+            },
+            'original_request': user_input
+        }
+
+_MATCHER = TravelRequestMatcher(DESTINATION_CUES, STYLE_KEYWORDS, INTEREST_KEYWORDS)
+
+def parse_travel_request(user_input: str, today: Optional[date] = None) -> Dict:
     """
     Parse natural language travel request into structured data
-    
+
     Args:
         user_input: Natural language travel request
-        
+        today: Reference date for dates without a year (default: today)
+
     Returns:
         Dictionary with parsed travel information
     """
-    user_lower = user_input.lower()
-    
-    # Extract destination using multiple patterns
-    patterns = [
-        r'to\s+([A-Za-z]+)', 
-        r'visit\s+([A-Za-z]+)', 
-        r'travel\s+to\s+([A-Za-z]+)',
-        r'going\s+to\s+([A-Za-z]+)',
-        r'trip\s+to\s+([A-Za-z]+)'
-    ]
-    
-    destination = TRAVEL_DEFAULTS["default_destination"]
-    for pattern in patterns:
-        match = re.search(pattern, user_input, re.IGNORECASE)
-        if match:
-            destination = match.group(1).title()
-            break
-    
-    # Extract budget with currency handling
-    budget_match = re.findall(r'\$?(\d+)', user_input)
-    budget = int(budget_match[-1]) if budget_match else TRAVEL_DEFAULTS["default_budget"]
-    
-    # Extract duration
-    dur = re.search(r'(\d+)\s*days?', user_input)
-    duration = int(dur.group(1)) if dur else TRAVEL_DEFAULTS["default_duration"]
-    
-    # Classify travel style
-    if any(word in user_lower for word in ['budget', 'cheap', 'affordable', 'low-cost']):
-        style = 'budget'
-    elif any(word in user_lower for word in ['luxury', 'premium', 'high-end', 'expensive']):
-        style = 'luxury'
-    else:
-        style = TRAVEL_DEFAULTS["default_style"]
-    
-    # Extract interests
-    interest_keywords = {
-        'culture': ['culture', 'history', 'museum', 'art', 'heritage', 'traditional'],
-        'food': ['food', 'cuisine', 'restaurant', 'dining', 'culinary', 'local food'],
-        'shopping': ['shopping', 'market', 'shop', 'boutique', 'mall', 'souvenirs'],
-        'adventure': ['adventure', 'hiking', 'outdoor', 'sports', 'activities', 'nature'],
-        'nightlife': ['nightlife', 'bars', 'clubs', 'entertainment', 'party'],
-        'relaxation': ['relax', 'spa', 'beach', 'peaceful', 'quiet', 'wellness']
-    }
-    
-    interests = []
-    for category, keywords in interest_keywords.items():
-        if any(keyword in user_lower for keyword in keywords):
-            interests.append(category)
-    
-    if not interests:
-        interests = TRAVEL_DEFAULTS["default_interests"]
-    
-    return {
-        'destination': destination,
-        'budget': budget,
-        'duration': duration,
-        'style': style,
-        'interests': interests,
-        'original_request': user_input
-    }
\ No newline at end of file
+    return _MATCHER.parse(user_input, today)
@@ -0,0 +1,75 @@
+"""
+Compact result records for TripCraft AI
+
+A Record keeps a result (a flight, a hotel) in __slots__ with shared,
+interned strings and plain numbers, and reads like the dict the tools
+used to build: record['price'], record['fare']['amount'], 'WiFi' in
+record['amenities']. Nested parts and formatted text are only produced
+when a key is read; to_dict() builds the full dict at the API or
+serialization edge, and json_default() lets json/msgpack encode records.
+
+Records are immutable and hashable, so memory snapshots and the search
+cache keep them by reference.
+"""
+from collections.abc import Mapping
+from typing import Dict, Any, Callable, Iterator, Tuple
+
+class Record(Mapping):
+    """Immutable slotted record with a read-only mapping interface
+
+    Subclasses declare __slots__ (constructor argument order) and KEYS, an
+    ordered mapping of API key -> getter taking the record.
+    """
+    __slots__ = ()
+    KEYS: Dict[str, Callable[["Record"], Any]] = {}
+
+    def __init__(self, *values):
+        for name, value in zip(self.__slots__, values):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise TypeError(f"{type(self).__name__} is read-only; use _replace()")
+
+    def __getitem__(self, key: str) -> Any:
+        return self.KEYS[key](self)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.KEYS)
+
+    def __len__(self) -> int:
+        return len(self.KEYS)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.KEYS
+
+    def _values(self) -> Tuple[Any, ...]:
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def _replace(self, **changes) -> "Record":
+        """Copy of the record with some fields changed"""
+        return type(self)(*(changes.get(name, getattr(self, name)) for name in self.__slots__))
+
+    def __eq__(self, other: object) -> bool:
+        if type(other) is type(self):
+            return self._values() == other._values()
+        return Mapping.__eq__(self, other)
+
+    def __hash__(self) -> int:
+        return hash((type(self), self._values()))
+
+    def __reduce__(self):
+        return (type(self), self._values())
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Build the full result dict"""
+        return {key: getter(self) for key, getter in self.KEYS.items()}
+
+def json_default(value: Any) -> Any:
+    """json/msgpack default hook: records become dicts, anything else text"""
+    if isinstance(value, Record):
+        return value.to_dict()
+    return str(value)
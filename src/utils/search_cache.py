@@ -0,0 +1,170 @@
+"""
+Search result cache for TripCraft AI tools
+
+Caches results by normalized search parameters with a TTL and an LRU size
+limit. Concurrent identical searches are coalesced: the first caller
+computes the result while the others wait for it, so N simultaneous
+searches trigger one backend call.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Callable, Hashable, Optional
+from config import logger, SEARCH_CACHE_CONFIG
+
+class _InFlight:
+    """A computation other callers can wait on"""
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+class SearchCache:
+    """Thread-safe TTL/LRU cache with single-flight computation"""
+
+    def __init__(self, name: str, ttl: Optional[float] = None, max_entries: Optional[int] = None):
+        self.name = name
+        self.ttl = SEARCH_CACHE_CONFIG["cache_ttl"] if ttl is None else ttl
+        self.max_entries = SEARCH_CACHE_CONFIG["cache_max_entries"] if max_entries is None else max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._inflight: Dict[Hashable, _InFlight] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Return the cached value for key, computing it at most once at a time
+
+        Args:
+            key: Normalized search parameters
+            compute: Called without arguments on a miss
+
+        Returns:
+            Cached or freshly computed value
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _InFlight()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = compute()
+        except BaseException as e:
+            # Waiting callers see the same error; nothing is cached
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+                if flight.error is None:
+                    self._store(key, flight.value)
+            flight.done.set()
+        return flight.value
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for key (None on a miss), without computing it"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Cache a value computed outside get_or_compute (e.g. by a stream)"""
+        with self._lock:
+            self._store(key, value)
+
+    def _store(self, key: Hashable, value: Any) -> None:
+        """Insert as most recently used and enforce max_entries (lock held)"""
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """Drop one cached key, or every key if None (counters are kept)"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss/coalesce counters and the number of cached entries"""
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "hit_rate": round((self.hits + self.coalesced) / lookups, 3) if lookups else 0.0
+            }
+
+_CACHES: Dict[str, SearchCache] = {}
+_CACHES_LOCK = threading.Lock()
+
+def get_search_cache(name: str) -> SearchCache:
+    """Get the named cache, creating it from SEARCH_CACHE_CONFIG on first use"""
+    with _CACHES_LOCK:
+        cache = _CACHES.get(name)
+        if cache is None:
+            cache = _CACHES[name] = SearchCache(name)
+        return cache
+
+def cached_search(name: str, key: Hashable, compute: Callable[[], Any]) -> Any:
+    """Compute a search through the named cache (directly if caching is disabled)"""
+    if not SEARCH_CACHE_CONFIG["cache_enabled"]:
+        return compute()
+    return get_search_cache(name).get_or_compute(key, compute)
+
+def cache_lookup(name: str, key: Hashable) -> Optional[Any]:
+    """Look up a search in the named cache (None on a miss or if caching is disabled)"""
+    if not SEARCH_CACHE_CONFIG["cache_enabled"]:
+        return None
+    return get_search_cache(name).get(key)
+
+def cache_store(name: str, key: Hashable, value: Any) -> None:
+    """Store a search result in the named cache (no-op if caching is disabled)"""
+    if SEARCH_CACHE_CONFIG["cache_enabled"]:
+        get_search_cache(name).put(key, value)
+
+def get_search_cache_stats() -> Dict[str, Any]:
+    """Get counters for every search cache"""
+    with _CACHES_LOCK:
+        caches = list(_CACHES.values())
+    return {cache.name: cache.stats() for cache in caches}
+
+def clear_search_cache() -> None:
+    """Drop every cached search result"""
+    with _CACHES_LOCK:
+        caches = list(_CACHES.values())
+    for cache in caches:
+        cache.invalidate()
+    logger.info(f"[clear_search_cache] cleared {len(caches)} caches")
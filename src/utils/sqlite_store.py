@@ -0,0 +1,342 @@
+"""
+Durable SQLite memory backend for TripCraft AI
+
+Data survives process restarts. The database runs in WAL mode so readers
+never block the writer, every thread reads through its own connection, and
+saves are group-committed: they are queued and a single writer thread
+applies many of them in one transaction. Pending writes stay visible to
+load() through an overlay until they are committed; a batch that fails
+(locked or full database, I/O error) stays there and is retried, and
+flush() raises until it commits. Values are stored with
+the namespace codec from utils.codecs (JSON unless configured otherwise).
+"""
+import atexit
+import json
+import queue
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+from config import logger, MEMORY_CONFIG
+from .codecs import decode, encode_for
+from .memory_store import MemoryKey, ttl_for
+
+# Constant SQL text lets sqlite3's per-connection statement cache reuse
+# the prepared statements instead of recompiling them on every call
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS memory (
+    user_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    namespace TEXT NOT NULL,
+    subkey TEXT NOT NULL,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    expires_at REAL,
+    PRIMARY KEY (user_id, name)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS memory_expires_at ON memory (expires_at) WHERE expires_at IS NOT NULL;
+CREATE TABLE IF NOT EXISTS memory_stats (
+    scope TEXT NOT NULL,
+    id TEXT NOT NULL,
+    keys INTEGER NOT NULL,
+    bytes INTEGER NOT NULL,
+    PRIMARY KEY (scope, id)
+) WITHOUT ROWID;
+CREATE TRIGGER IF NOT EXISTS memory_stats_insert AFTER INSERT ON memory BEGIN
+    INSERT INTO memory_stats VALUES ('namespace', new.namespace, 1, new.size)
+        ON CONFLICT (scope, id) DO UPDATE SET keys = keys + 1, bytes = bytes + new.size;
+    INSERT INTO memory_stats VALUES ('user', new.user_id, 1, new.size)
+        ON CONFLICT (scope, id) DO UPDATE SET keys = keys + 1, bytes = bytes + new.size;
+END;
+CREATE TRIGGER IF NOT EXISTS memory_stats_delete AFTER DELETE ON memory BEGIN
+    UPDATE memory_stats SET keys = keys - 1, bytes = bytes - old.size
+        WHERE (scope = 'namespace' AND id = old.namespace) OR (scope = 'user' AND id = old.user_id);
+    DELETE FROM memory_stats WHERE keys = 0
+        AND ((scope = 'namespace' AND id = old.namespace) OR (scope = 'user' AND id = old.user_id));
+END;
+CREATE TRIGGER IF NOT EXISTS memory_stats_update AFTER UPDATE OF size, namespace ON memory BEGIN
+    UPDATE memory_stats SET keys = keys - 1, bytes = bytes - old.size
+        WHERE (scope = 'namespace' AND id = old.namespace) OR (scope = 'user' AND id = old.user_id);
+    INSERT INTO memory_stats VALUES ('namespace', new.namespace, 1, new.size)
+        ON CONFLICT (scope, id) DO UPDATE SET keys = keys + 1, bytes = bytes + new.size;
+    INSERT INTO memory_stats VALUES ('user', new.user_id, 1, new.size)
+        ON CONFLICT (scope, id) DO UPDATE SET keys = keys + 1, bytes = bytes + new.size;
+    DELETE FROM memory_stats WHERE keys = 0
+        AND ((scope = 'namespace' AND id = old.namespace) OR (scope = 'user' AND id = old.user_id));
+END;
+"""
+# Databases created before the counter triggers existed are backfilled once
+_BACKFILL_STATS = """
+INSERT INTO memory_stats SELECT 'namespace', namespace, COUNT(*), SUM(size) FROM memory GROUP BY namespace;
+INSERT INTO memory_stats SELECT 'user', user_id, COUNT(*), SUM(size) FROM memory GROUP BY user_id;
+"""
+_UPSERT = (
+    "INSERT INTO memory (user_id, name, namespace, subkey, value, size, expires_at) VALUES (?, ?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT (user_id, name) DO UPDATE SET namespace = excluded.namespace, subkey = excluded.subkey, "
+    "value = excluded.value, size = excluded.size, expires_at = excluded.expires_at"
+)
+_DELETE = "DELETE FROM memory WHERE user_id = ? AND name = ?"
+_SELECT = "SELECT value, expires_at FROM memory WHERE user_id = ? AND name = ?"
+_COUNT_RANGE = (
+    "SELECT COUNT(*) FROM memory WHERE user_id = ? AND name >= ? AND name < ? "
+    "AND (expires_at IS NULL OR expires_at > ?)"
+)
+_SELECT_RANGE = (
+    "SELECT namespace, subkey, value FROM memory WHERE user_id = ? AND name >= ? AND name < ? AND name > ? "
+    "AND (expires_at IS NULL OR expires_at > ?) ORDER BY name LIMIT ?"
+)
+_SELECT_USER = "SELECT namespace, subkey, value FROM memory WHERE user_id = ? AND (expires_at IS NULL OR expires_at > ?)"
+_SELECT_ALL = "SELECT namespace, user_id, subkey, value FROM memory WHERE expires_at IS NULL OR expires_at > ?"
+_NAMESPACE_STATS = "SELECT id, keys, bytes FROM memory_stats WHERE scope = 'namespace'"
+_USER_STATS = "SELECT keys, bytes FROM memory_stats WHERE scope = 'user' AND id = ?"
+_USER_COUNT = "SELECT COUNT(*) FROM memory_stats WHERE scope = 'user'"
+_LIST_KEYS = "SELECT namespace, user_id, subkey FROM memory WHERE (user_id, name) > (?, ?) ORDER BY user_id, name LIMIT ?"
+_PURGE = "DELETE FROM memory WHERE expires_at <= ?"
+
+_PURGE_INTERVAL = 60.0
+# Seconds between attempts to commit a batch that failed
+_RETRY_INTERVAL = 1.0
+
+def _decode_value(value) -> Any:
+    # Rows written before codecs were introduced hold plain JSON text
+    return json.loads(value) if isinstance(value, str) else decode(value)
+
+class SQLiteStore:
+    """SQLite (WAL) memory backend with group commit"""
+
+    name = "sqlite"
+    # Reads hit the database file, so async callers run them in a thread
+    blocking = True
+
+    def __init__(self, path: Optional[str] = None, batch_size: Optional[int] = None, commit_interval: Optional[float] = None):
+        self.path = path or MEMORY_CONFIG["sqlite_path"]
+        self.batch_size = batch_size or MEMORY_CONFIG["sqlite_batch_size"]
+        self.commit_interval = commit_interval if commit_interval is not None else MEMORY_CONFIG["sqlite_commit_interval"]
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        # Writes queued for the writer thread, and the overlay that keeps
+        # them readable until committed: key -> (sequence, record or None)
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._pending: Dict[MemoryKey, Tuple[int, Optional[Tuple[bytes, Optional[float]]]]] = {}
+        self._pending_lock = threading.Lock()
+        self._sequence = 0
+        self._counters = {"batches_committed": 0, "writes_committed": 0, "expirations": 0,
+                          "batches_failed": 0, "purges_failed": 0}
+        self._closed = False
+
+        conn = self._connection()
+        has_stats = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'memory_stats'").fetchone()
+        conn.executescript(_SCHEMA)
+        if not has_stats:
+            conn.executescript(_BACKFILL_STATS)
+        self._writer = threading.Thread(target=self._write_loop, name="tripcraft-sqlite-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+        logger.info(f"[sqlite_store] opened {self.path} (batch_size={self.batch_size} commit_interval={self.commit_interval}s)")
+
+    def _connection(self) -> sqlite3.Connection:
+        """Get the calling thread's connection, opening it on first use"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30.0, check_same_thread=False, cached_statements=256)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def _enqueue(self, memory_key: MemoryKey, record: Optional[Tuple[bytes, Optional[float]]]) -> None:
+        with self._pending_lock:
+            self._sequence += 1
+            self._pending[memory_key] = (self._sequence, record)
+            self._queue.put(("write", memory_key, self._sequence, record))
+
+    def _write_loop(self) -> None:
+        """Drain the queue, committing each batch in a single transaction
+
+        A batch that fails keeps its overlay entries and is committed again,
+        ahead of newer writes, with the next batch (at least every
+        _RETRY_INTERVAL seconds).
+        """
+        conn = self._connection()
+        last_purge = 0.0
+        failed: List[tuple] = []
+        error: Optional[sqlite3.Error] = None
+        running = True
+        while running:
+            try:
+                batch = [self._queue.get(timeout=_RETRY_INTERVAL if failed else None)]
+            except queue.Empty:
+                batch = []
+            deadline = time.monotonic() + self.commit_interval
+            while batch and len(batch) < self.batch_size and batch[-1][0] == "write":
+                try:
+                    batch.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            writes = failed + [op for op in batch if op[0] == "write"]
+            if writes:
+                try:
+                    with conn:
+                        for _, memory_key, _, record in writes:
+                            if record is None:
+                                conn.execute(_DELETE, (memory_key.user_id, memory_key.name))
+                            else:
+                                payload, expires_at = record
+                                conn.execute(_UPSERT, (memory_key.user_id, memory_key.name, memory_key.namespace,
+                                                       memory_key.subkey, payload, len(payload), expires_at))
+                    self._counters["batches_committed"] += 1
+                    self._counters["writes_committed"] += len(writes)
+                    failed, error = [], None
+                except sqlite3.Error as e:
+                    self._counters["batches_failed"] += 1
+                    logger.error(f"[sqlite_store] batch of {len(writes)} writes failed, will retry: {e}")
+                    failed, error = writes, e
+                if not failed:
+                    with self._pending_lock:
+                        for _, memory_key, sequence, _ in writes:
+                            # A newer write to the same key keeps its overlay slot
+                            if self._pending.get(memory_key, (None,))[0] == sequence:
+                                del self._pending[memory_key]
+            now = time.time()
+            if now - last_purge >= _PURGE_INTERVAL:
+                try:
+                    with conn:
+                        self._counters["expirations"] += conn.execute(_PURGE, (now,)).rowcount
+                except sqlite3.Error as e:
+                    self._counters["purges_failed"] += 1
+                    logger.error(f"[sqlite_store] purging expired rows failed: {e}")
+                last_purge = now
+            for op in batch:
+                if op[0] in ("flush", "stop"):
+                    op[2].append(error)
+                    op[1].set()
+                    running = running and op[0] != "stop"
+        if failed:
+            logger.error(f"[sqlite_store] stopped with {len(failed)} uncommitted writes: {error}")
+
+    def _wait_for_writer(self, op: str) -> Optional[sqlite3.Error]:
+        """Wait until the writer handled every earlier write; return the error that kept them uncommitted, if any"""
+        done, result = threading.Event(), []
+        self._queue.put((op, done, result))
+        done.wait()
+        return result[0]
+
+    def save(self, memory_key: MemoryKey, data: Any) -> int:
+        """Queue data for the next group commit and return its size"""
+        payload = encode_for(memory_key.namespace, data)
+        ttl = ttl_for(memory_key.namespace)
+        self._enqueue(memory_key, (bytes(payload), time.time() + ttl if ttl is not None else None))
+        return len(payload)
+
+    def load(self, memory_key: MemoryKey) -> Optional[Any]:
+        with self._pending_lock:
+            pending = self._pending.get(memory_key)
+        if pending is not None:
+            record = pending[1]
+        else:
+            record = self._connection().execute(_SELECT, (memory_key.user_id, memory_key.name)).fetchone()
+        if record is None:
+            return None
+        payload, expires_at = record
+        if expires_at is not None and expires_at <= time.time():
+            return None
+        return _decode_value(payload)
+
+    def delete(self, memory_key: MemoryKey) -> bool:
+        existed = self.load(memory_key) is not None
+        self._enqueue(memory_key, None)
+        return existed
+
+    def search(self, user_id: str, prefix: str, limit: int, cursor: Optional[str]) -> Tuple[int, List[Tuple[MemoryKey, Any]], Optional[str]]:
+        """Find one page of a user's keys starting with prefix (after a flush)"""
+        self.flush()
+        conn = self._connection()
+        now = time.time()
+        upper = prefix + "\uffff"
+        total = conn.execute(_COUNT_RANGE, (user_id, prefix, upper, now)).fetchone()[0]
+        rows = conn.execute(_SELECT_RANGE, (user_id, prefix, upper, cursor or "", now, limit + 1)).fetchall()
+        page = [(MemoryKey(namespace, user_id, subkey), _decode_value(value)) for namespace, subkey, value in rows[:limit]]
+        next_cursor = page[-1][0].name if len(rows) > limit else None
+        return total, page, next_cursor
+
+    def items(self, user_id: Optional[str] = None) -> Iterator[Tuple[MemoryKey, Any]]:
+        """Iterate over committed (key, value) pairs, optionally for one user"""
+        self.flush()
+        conn = self._connection()
+        if user_id is None:
+            for namespace, row_user, subkey, value in conn.execute(_SELECT_ALL, (time.time(),)):
+                yield MemoryKey(namespace, row_user, subkey), _decode_value(value)
+        else:
+            for namespace, subkey, value in conn.execute(_SELECT_USER, (user_id, time.time())):
+                yield MemoryKey(namespace, user_id, subkey), _decode_value(value)
+
+    def list_keys(self, limit: int, cursor: Optional[Tuple[str, str]]) -> Tuple[List[MemoryKey], Optional[Tuple[str, str]]]:
+        """One page of keys in (user_id, name) order, read from the primary key"""
+        self.flush()
+        after = cursor or ("", "")
+        rows = self._connection().execute(_LIST_KEYS, (after[0], after[1], limit)).fetchall()
+        keys = [MemoryKey(namespace, user_id, subkey) for namespace, user_id, subkey in rows]
+        return keys, (keys[-1].user_id, keys[-1].name) if len(keys) == limit else None
+
+    def user_stats(self, user_id: str) -> Dict[str, Any]:
+        self.flush()
+        row = self._connection().execute(_USER_STATS, (user_id,)).fetchone() or (0, 0)
+        return {"user_id": user_id, "total_keys": row[0], "total_size": row[1]}
+
+    def stats(self) -> Dict[str, Any]:
+        """Read the trigger-maintained counters (rows awaiting TTL purge included)
+
+        Waits for queued writes but does not raise if they failed:
+        batches_failed counts failed commits.
+        """
+        if not self._closed:
+            self._wait_for_writer("flush")
+        conn = self._connection()
+        namespaces = {ns: {"keys": keys, "bytes": size} for ns, keys, size in conn.execute(_NAMESPACE_STATS)}
+        return {
+            "total_keys": sum(n["keys"] for n in namespaces.values()),
+            "total_size": sum(n["bytes"] for n in namespaces.values()),
+            "path": self.path,
+            "users": conn.execute(_USER_COUNT).fetchone()[0],
+            "namespaces": namespaces,
+            "batches_committed": self._counters["batches_committed"],
+            "writes_committed": self._counters["writes_committed"],
+            "expirations": self._counters["expirations"],
+            "batches_failed": self._counters["batches_failed"],
+            "purges_failed": self._counters["purges_failed"]
+        }
+
+    def clear(self) -> None:
+        self.flush()
+        with self._connection() as conn:
+            conn.execute("DELETE FROM memory")
+            conn.execute("DELETE FROM memory_stats")
+
+    def flush(self) -> None:
+        """Block until every queued write is committed
+
+        Raises:
+            sqlite3.Error: Queued writes could not be committed (they stay
+                readable and are retried)
+        """
+        if not self._closed:
+            error = self._wait_for_writer("flush")
+            if error is not None:
+                raise error
+
+    def close(self) -> None:
+        """Commit pending writes, stop the writer and close all connections"""
+        if self._closed:
+            return
+        self._wait_for_writer("stop")
+        self._closed = True
+        self._writer.join()
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        atexit.unregister(self.close)
+        logger.info(f"[sqlite_store] closed {self.path}")
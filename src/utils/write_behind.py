@@ -0,0 +1,183 @@
+"""
+Write-behind buffering for TripCraft AI memory backends
+
+WriteBehindStore wraps any memory backend so save() and delete() return
+immediately: writes are queued and a background worker applies them to
+the wrapped backend in batches. The caller's thread still takes the
+read-only snapshot (so callers may keep mutating what they saved); the
+backend reuses it without walking it again, and encoding, deduplication,
+budget enforcement and logging run on the worker. Queued writes stay
+visible to load() through an overlay (read-your-writes); every other read
+flushes the queue first, and pending writes are flushed on close() and at
+interpreter exit. Once closed, writes go straight to the wrapped backend.
+"""
+import atexit
+import queue
+import threading
+import time
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+from config import logger, MEMORY_CONFIG
+from .memory_store import MemoryKey, FrozenDict, snapshot, thaw
+
+# Overlay marker for a queued delete
+_DELETED = object()
+
+def _freeze(data: Any) -> Any:
+    """Read-only copy of data, so callers may keep mutating what they saved"""
+    if MEMORY_CONFIG["isolation"] == "reference" or isinstance(data, (FrozenDict, str)):
+        return data
+    return snapshot(data)[0]
+
+class WriteBehindStore:
+    """Memory backend wrapper that applies writes asynchronously in batches"""
+
+    def __init__(self, backend, batch_size: Optional[int] = None, interval: Optional[float] = None,
+                 max_pending: Optional[int] = None):
+        self.backend = backend
+        self.name = backend.name
+        self.blocking = getattr(backend, "blocking", True)
+        self.batch_size = batch_size or MEMORY_CONFIG["write_behind_batch_size"]
+        self.interval = MEMORY_CONFIG["write_behind_interval"] if interval is None else interval
+        # Queued writes in order, and the overlay that keeps them readable
+        # until applied: key -> (sequence, value or _DELETED)
+        self._queue: "queue.Queue[tuple]" = queue.Queue(max_pending or MEMORY_CONFIG["write_behind_max_pending"])
+        self._pending: Dict[MemoryKey, Tuple[int, Any]] = {}
+        self._pending_lock = threading.Lock()
+        # Held from numbering a write until it is queued, so the queue is in
+        # sequence order; the worker never takes it, so a producer waiting
+        # on a full queue cannot stall the worker
+        self._enqueue_lock = threading.Lock()
+        self._sequence = 0
+        self._counters = {"batches_applied": 0, "writes_applied": 0, "write_errors": 0}
+        self._closed = False
+        self._worker = threading.Thread(target=self._write_loop, name="tripcraft-write-behind", daemon=True)
+        self._worker.start()
+        atexit.register(self.close)
+
+    def _enqueue(self, memory_key: MemoryKey, value: Any) -> bool:
+        """Queue a write; False once closed, when the caller writes through"""
+        with self._enqueue_lock:
+            if self._closed:
+                return False
+            with self._pending_lock:
+                self._sequence += 1
+                self._pending[memory_key] = (self._sequence, value)
+                sequence = self._sequence
+            self._queue.put(("write", memory_key, sequence, value))
+        return True
+
+    def _write_loop(self) -> None:
+        """Apply queued writes in batches until stopped"""
+        running = True
+        while running:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.interval
+            while len(batch) < self.batch_size and batch[-1][0] == "write":
+                try:
+                    batch.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            writes = [op for op in batch if op[0] == "write"]
+            for _, memory_key, _, value in writes:
+                try:
+                    if value is _DELETED:
+                        self.backend.delete(memory_key)
+                    else:
+                        self.backend.save(memory_key, value)
+                except Exception as e:
+                    self._counters["write_errors"] += 1
+                    logger.error(f"[write_behind] error writing {memory_key}: {e}")
+            if writes:
+                self._counters["batches_applied"] += 1
+                self._counters["writes_applied"] += len(writes)
+                logger.debug(f"[write_behind] applied {len(writes)} writes")
+                with self._pending_lock:
+                    for _, memory_key, sequence, _ in writes:
+                        # A newer write to the same key keeps its overlay slot
+                        if self._pending.get(memory_key, (None,))[0] == sequence:
+                            del self._pending[memory_key]
+            for op in batch:
+                if op[0] in ("flush", "stop"):
+                    op[1].set()
+                    running = running and op[0] != "stop"
+
+    def _post(self, op: str) -> threading.Event:
+        """Queue a flush or stop marker; call with _enqueue_lock held"""
+        done = threading.Event()
+        self._queue.put((op, done))
+        return done
+
+    def save(self, memory_key: MemoryKey, data: Any) -> None:
+        """Queue data for the worker (the stored size is not known yet)"""
+        if not self._enqueue(memory_key, _freeze(data)):
+            self.backend.save(memory_key, data)
+        return None
+
+    def load(self, memory_key: MemoryKey) -> Optional[Any]:
+        """Load data for a key, seeing writes that are still queued"""
+        with self._pending_lock:
+            pending = self._pending.get(memory_key)
+        if pending is None:
+            return self.backend.load(memory_key)
+        value = pending[1]
+        if value is _DELETED:
+            return None
+        return thaw(value) if MEMORY_CONFIG["isolation"] == "copy" else value
+
+    def delete(self, memory_key: MemoryKey) -> bool:
+        existed = self.load(memory_key) is not None
+        if not self._enqueue(memory_key, _DELETED):
+            self.backend.delete(memory_key)
+        return existed
+
+    def search(self, user_id: str, prefix: str, limit: int, cursor: Optional[str]) -> Tuple[int, List[Tuple[MemoryKey, Any]], Optional[str]]:
+        self.flush()
+        return self.backend.search(user_id, prefix, limit, cursor)
+
+    def items(self, user_id: Optional[str] = None) -> Iterator[Tuple[MemoryKey, Any]]:
+        self.flush()
+        return self.backend.items(user_id)
+
+    def list_keys(self, limit: int, cursor: Optional[tuple]) -> Tuple[List[MemoryKey], Optional[tuple]]:
+        self.flush()
+        return self.backend.list_keys(limit, cursor)
+
+    def user_stats(self, user_id: str) -> Dict[str, Any]:
+        self.flush()
+        return self.backend.user_stats(user_id)
+
+    def stats(self) -> Dict[str, Any]:
+        """Wrapped backend stats plus write-behind counters, without waiting for the queue
+
+        Writes still queued are not in the backend figures yet; they are
+        counted under write_behind["pending"].
+        """
+        with self._pending_lock:
+            pending = len(self._pending)
+        return {**self.backend.stats(), "write_behind": {**self._counters, "pending": pending}}
+
+    def clear(self) -> None:
+        self.flush()
+        self.backend.clear()
+
+    def flush(self) -> None:
+        """Block until every queued write is applied and the wrapped backend is flushed"""
+        with self._enqueue_lock:
+            done = None if self._closed else self._post("flush")
+        if done is not None:
+            done.wait()
+        self.backend.flush()
+
+    def close(self) -> None:
+        """Apply pending writes, stop the worker and close the wrapped backend"""
+        # Closing under _enqueue_lock means no write or flush can be queued
+        # behind the stop marker, where the stopped worker would never see it
+        with self._enqueue_lock:
+            if self._closed:
+                return
+            self._closed = True
+            done = self._post("stop")
+        done.wait()
+        self._worker.join()
+        atexit.unregister(self.close)
+        self.backend.close()
@@ -0,0 +1,91 @@
+"""
+Tests for TripCraft AI agents and the rule-based fast path
+"""
+import pytest
+from src.agents.fast_path import FastPathPlanner
+from src.config import TRAVEL_DEFAULTS
+from src.main import MockToolContext
+
+class RecordingRunner:
+    """Agent runner stand-in that records the requests it gets"""
+    
+    def __init__(self):
+        self.requests = []
+    
+    def run(self, request=None, **kwargs):
+        self.requests.append(request)
+        return {"status": "completed"}
+
+class TestFastPath:
+    """Test suite for the fast path planner"""
+    
+    def test_fully_specified_request_skips_agents(self):
+        """Test a request with a destination and dates is planned by the tools alone"""
+        runner = RecordingRunner()
+        planner = FastPathPlanner(runner=runner)
+        
+        result = planner.plan("Budget travel to Tokyo for 5 days from March 3", MockToolContext())
+        
+        assert result['route'] == 'fast_path'
+        assert runner.requests == []
+        assert result['plan']['destination'] == 'Tokyo'
+        assert result['plan']['budget_analysis']['nights'] == 5
+        assert result['agent_response'] is None
+    
+    def test_vague_request_goes_to_agents(self):
+        """Test requests without dates or a known destination go to the agents"""
+        runner = RecordingRunner()
+        planner = FastPathPlanner(runner=runner)
+        
+        for request in ["Budget travel to Tokyo for 5 days", "Somewhere warm from March 3"]:
+            result = planner.plan(request, MockToolContext())
+            assert result['route'] == 'agents'
+            assert result['plan'] is None
+        assert len(runner.requests) == 2
+    
+    def test_stats(self):
+        """Test the fast path rate and per-route timings"""
+        planner = FastPathPlanner(runner=RecordingRunner())
+        context = MockToolContext()
+        planner.plan("Trip to Paris from May 3 to May 8", context)
+        planner.plan("Trip to Paris", context)
+        planner.plan("Trip to Rome from June 1 to June 4", context)
+        
+        stats = planner.stats()
+        assert stats['requests'] == 3
+        assert stats['fast_path'] == 2
+        assert stats['agents'] == 1
+        assert stats['fast_path_rate'] == pytest.approx(2 / 3, abs=1e-4)
+        assert stats['fast_path_ms'] > 0
+        planner.reset_stats()
+        assert planner.stats()['requests'] == 0
+    
+    def test_required_fields(self):
+        """Test stricter requirements send more requests to the agents"""
+        planner = FastPathPlanner(runner=RecordingRunner(), required_fields=["destination", "dates", "budget"])
+        
+        assert planner.plan("Trip to Paris from May 3 to May 8", MockToolContext())['route'] == 'agents'
+        assert planner.plan("Trip to Paris from May 3 to May 8 for $900", MockToolContext())['route'] == 'fast_path'
+    
+    def test_past_dates_go_to_agents(self):
+        """Test past or impossible date ranges are not planned on the fast path"""
+        runner = RecordingRunner()
+        planner = FastPathPlanner(runner=runner)
+        
+        for request in ["Paris 2020-01-05 to 2020-01-10", "Paris from Feb 30, 2030 to Mar 4, 2030"]:
+            assert planner.plan(request, MockToolContext())['route'] == 'agents'
+        assert len(runner.requests) == 2
+    
+    def test_defaulted_budget_is_marked(self):
+        """Test a fast path plan made with the default budget says so"""
+        planner = FastPathPlanner(runner=RecordingRunner())
+        
+        defaulted = planner.plan("Trip to Paris from May 3 to May 8", MockToolContext())
+        stated = planner.plan("Trip to Paris from May 3 to May 8 for $900", MockToolContext())
+        assert defaulted['route'] == stated['route'] == 'fast_path'
+        assert defaulted['defaulted'] == ['budget']
+        assert defaulted['parsed']['budget'] == TRAVEL_DEFAULTS['default_budget']
+        assert stated['defaulted'] == []
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,472 @@
+"""
+Tests for TripCraft AI memory management
+"""
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+import pytest
+from src.utils import memory
+from src.utils.memory import save_memory, load_memory, search_memory, get_memory_stats, export_memory
+from src.utils.memory_store import MemoryKey, InMemoryStore
+from src.utils.sqlite_store import SQLiteStore
+from src.utils.write_behind import WriteBehindStore
+from src.utils import codecs
+
+class TestMemory:
+    """Test suite for the in-process memory store"""
+
+    def setup_method(self):
+        """Start every test with an empty store"""
+        memory.set_memory_backend(InMemoryStore())
+
+    def test_round_trip_native_objects(self):
+        """Test that saved data loads back with the same content"""
+        data = {'price': 500, 'tags': ['WiFi', 'Meals'], 'nested': {'ok': True}}
+        assert save_memory('flight_search_Tokyo', data, 'user_1')
+
+        loaded = load_memory('flight_search_Tokyo', 'user_1')
+        assert loaded == {'price': 500, 'tags': ('WiFi', 'Meals'), 'nested': {'ok': True}}
+        assert json.loads(json.dumps(loaded)) == data
+
+    def test_snapshot_isolation(self, monkeypatch):
+        """Test that snapshots are read-only and detached from the caller"""
+        monkeypatch.setitem(memory.MEMORY_CONFIG, 'isolation', 'snapshot')
+        data = {'interests': ['culture']}
+        save_memory('travel_preferences', data, 'user_1')
+        data['interests'].append('food')
+
+        loaded = load_memory('travel_preferences', 'user_1')
+        assert loaded['interests'] == ('culture',)
+        with pytest.raises(TypeError):
+            loaded['interests'] = []
+
+    def test_copy_isolation(self, monkeypatch):
+        """Test that copy mode returns independent mutable objects"""
+        monkeypatch.setitem(memory.MEMORY_CONFIG, 'isolation', 'copy')
+        save_memory('travel_preferences', {'interests': ['culture']}, 'user_1')
+
+        first = load_memory('travel_preferences', 'user_1')
+        first['interests'].append('food')
+        assert load_memory('travel_preferences', 'user_1') == {'interests': ['culture']}
+
+    def test_size_matches_json_length(self):
+        """Test that size accounting tracks the JSON text length"""
+        data = {'a': [1, 2.5, None, True], 'b': 'text'}
+        save_memory('sized', data, 'user_1')
+
+        assert get_memory_stats()['total_size'] == len(json.dumps(data))
+
+    def test_search_and_export(self):
+        """Test that data is serialized only when it leaves the store"""
+        save_memory('flight_search_Paris', {'price': 650}, 'user_1')
+        save_memory('hotel_search_Paris', {'price': 95}, 'user_2')
+
+        result = search_memory('flight_search', 'user_1')
+        assert result['total_found'] == 1
+        assert result['results'][0]['data'] == '{"price": 650}'
+        assert json.loads(export_memory('user_2')) == {'hotel_search_Paris_user_2': {'price': 95}}
+
+    def test_lru_eviction_respects_byte_budget(self, monkeypatch):
+        """Test that least recently used keys are evicted first"""
+        monkeypatch.setitem(memory.MEMORY_CONFIG, 'max_bytes', 250)
+        memory.set_memory_backend(InMemoryStore(shards=1))
+        before = get_memory_stats()['evictions']
+        save_memory('flight_search_Tokyo', {'blob': 'x' * 80}, 'user_1')
+        save_memory('flight_search_Paris', {'blob': 'x' * 80}, 'user_1')
+        load_memory('flight_search_Tokyo', 'user_1')
+        save_memory('flight_search_Rome', {'blob': 'x' * 80}, 'user_1')
+
+        stats = get_memory_stats()
+        assert stats['total_size'] <= 250
+        assert stats['evictions'] == before + 1
+        assert load_memory('flight_search_Paris', 'user_1') is None
+        assert load_memory('flight_search_Tokyo', 'user_1') is not None
+
+    def test_pinned_namespace_is_not_evicted(self, monkeypatch):
+        """Test that travel preferences survive budget pressure"""
+        monkeypatch.setitem(memory.MEMORY_CONFIG, 'max_bytes', 150)
+        memory.set_memory_backend(InMemoryStore(shards=1))
+        save_memory('travel_preferences', {'blob': 'p' * 80}, 'user_1')
+        save_memory('hotel_search_Paris', {'blob': 'x' * 80}, 'user_1')
+
+        assert load_memory('travel_preferences', 'user_1') is not None
+        assert load_memory('hotel_search_Paris', 'user_1') is None
+
+    def test_byte_budget_is_global_across_shards(self, monkeypatch):
+        """Test that one heavy user may use more than an even share of the budget"""
+        monkeypatch.setitem(memory.MEMORY_CONFIG, 'max_bytes', 1000)
+        memory.set_memory_backend(InMemoryStore(shards=16))
+        for city in ('Tokyo', 'Paris', 'Rome', 'Lima'):
+            save_memory(f'flight_search_{city}', {'blob': city * 40}, 'user_1')
+        assert get_memory_stats()['evictions'] == 0
+
+        for city in ('Oslo', 'Lagos', 'Cairo'):
+            save_memory(f'flight_search_{city}', {'blob': city * 40}, 'user_2')
+        stats = get_memory_stats()
+        assert stats['stored_size'] <= 1000
+        assert stats['evictions'] >= 1
+        assert load_memory('flight_search_Tokyo', 'user_1') is None
+        assert load_memory('flight_search_Cairo', 'user_2') is not None
+
+    def test_pinned_bytes_are_tracked(self, monkeypatch):
+        """Test that pinned bytes are counted and released with their entries"""
+        monkeypatch.setitem(memory.MEMORY_CONFIG, 'max_bytes', 100)
+        memory.set_memory_backend(InMemoryStore(shards=1))
+        save_memory('travel_preferences', {'blob': 'p' * 150}, 'user_1')
+        stats = get_memory_stats()
+        assert stats['pinned_size'] == stats['stored_size'] > 100
+        assert load_memory('travel_preferences', 'user_1') is not None
+
+        memory.delete_memory('travel_preferences', 'user_1')
+        assert get_memory_stats()['pinned_size'] == 0
+
+    def test_namespace_ttl_expiry(self, monkeypatch):
+        """Test that search results expire while preferences stay"""
+        monkeypatch.setitem(memory.MEMORY_CONFIG, 'namespace_ttls', {'flight_search': 0, 'travel_preferences': None})
+        before = get_memory_stats()['expirations']
+        save_memory('flight_search_Tokyo', {'price': 800}, 'user_1')
+        save_memory('travel_preferences', {'style': 'budget'}, 'user_1')
+
+        assert load_memory('flight_search_Tokyo', 'user_1') is None
+        assert load_memory('travel_preferences', 'user_1') == {'style': 'budget'}
+        assert get_memory_stats()['expirations'] == before + 1
+
+    def test_search_does_not_match_other_users(self):
+        """Test that user_1 searches never see user_10 keys"""
+        save_memory('flight_search_Tokyo', {'price': 800}, 'user_1')
+        save_memory('flight_search_Tokyo', {'price': 900}, 'user_10')
+
+        result = search_memory('flight_search', 'user_1')
+        assert result['total_found'] == 1
+        assert result['results'][0]['key'] == 'flight_search_Tokyo_user_1'
+
+    def test_search_prefix_with_cursor_pagination(self):
+        """Test that pages follow each other without overlap"""
+        for city in ['Tokyo', 'Paris', 'London', 'Bangkok', 'Dubai']:
+            save_memory(f'flight_search_{city}', {'city': city}, 'user_1')
+        save_memory('hotel_search_Paris', {'city': 'Paris'}, 'user_1')
+
+        first = search_memory('flight_search', 'user_1', limit=2)
+        second = search_memory('flight_search', 'user_1', limit=2, cursor=first['next_cursor'])
+        third = search_memory('flight_search', 'user_1', limit=2, cursor=second['next_cursor'])
+
+        keys = [r['key'] for page in (first, second, third) for r in page['results']]
+        assert first['total_found'] == 5
+        assert len(keys) == len(set(keys)) == 5
+        assert all(k.startswith('flight_search_') for k in keys)
+        assert third['next_cursor'] is None
+
+    def test_incremental_stats(self):
+        """Test that counters follow saves, overwrites and deletes"""
+        save_memory('flight_search_Tokyo', {'price': 800}, 'user_1')
+        save_memory('flight_search_Paris', {'price': 650}, 'user_2')
+        save_memory('travel_preferences', {'style': 'budget'}, 'user_1')
+        save_memory('flight_search_Tokyo', {'price': 810}, 'user_1')
+        memory.delete_memory('flight_search_Paris', 'user_2')
+
+        stats = get_memory_stats()
+        assert stats['total_keys'] == 2
+        assert stats['users'] == 1
+        assert stats['namespaces']['flight_search'] == {'keys': 1, 'bytes': len('{"price": 810}')}
+        assert stats['total_size'] == len('{"price": 810}') + len('{"style": "budget"}')
+        assert memory.get_user_memory_stats('user_1')['total_keys'] == 2
+        assert memory.get_user_memory_stats('user_2')['total_keys'] == 0
+
+    def test_paginated_key_enumeration(self):
+        """Test that key pages cover every key exactly once"""
+        for n in range(7):
+            for city in ['Tokyo', 'Paris', 'Rome']:
+                save_memory(f'hotel_search_{city}', {'n': n}, f'user_{n}')
+
+        first = memory.list_memory_keys(limit=5)
+        assert len(first['keys']) == 5
+        keys = list(memory.iter_memory_keys(page_size=4))
+        assert len(keys) == len(set(keys)) == 21
+
+    def test_repeated_payloads_are_stored_once(self):
+        """Test that identical payloads share storage and are released by refcount"""
+        preferences = {'style': 'budget', 'interests': ['culture', 'food'], 'notes': 'n' * 200}
+        save_memory('travel_preferences', preferences, 'user_1')
+        save_memory('aggregated_results', {'destination': 'Tokyo', 'user_preferences': preferences}, 'user_1')
+        for _ in range(5):
+            save_memory('flight_search_Tokyo', {'flights': [{'price': 800, 'blob': 'x' * 300}]}, 'user_1')
+
+        stats = get_memory_stats()
+        assert stats['dedup_hits'] >= 1
+        assert stats['dedup_blobs'] >= 1
+        assert stats['stored_size'] < stats['total_size']
+        assert load_memory('aggregated_results', 'user_1')['user_preferences'] is load_memory('travel_preferences', 'user_1')
+
+        memory.delete_memory('aggregated_results', 'user_1')
+        memory.delete_memory('travel_preferences', 'user_1')
+        memory.delete_memory('flight_search_Tokyo', 'user_1')
+        stats = get_memory_stats()
+        assert stats['stored_size'] == stats['total_size'] == 0
+        assert stats['dedup_blobs'] == 0
+
+    def test_dedup_keeps_types_distinct(self):
+        """Test that values equal in Python but not in JSON are not merged"""
+        save_memory('a', {'flag': [True] * 40}, 'user_1')
+        save_memory('b', {'flag': [1] * 40}, 'user_1')
+
+        assert load_memory('b', 'user_1')['flag'][0] is not True
+        assert json.loads(export_memory('user_1'))['b_user_1'] == {'flag': [1] * 40}
+
+    def test_concurrent_sessions(self):
+        """Test that parallel writers for many users lose no data"""
+        def session(user):
+            for i in range(50):
+                save_memory(f'flight_search_City{i}', {'i': i}, user)
+
+        threads = [threading.Thread(target=session, args=(f'user_{n}',)) for n in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert get_memory_stats()['total_keys'] == 400
+        assert search_memory('flight_search', 'user_3', limit=100)['total_found'] == 50
+
+    def test_async_interface(self):
+        """Test the asyncio variants of the memory API"""
+        async def run():
+            await memory.asave_memory('travel_preferences', {'style': 'luxury'}, 'user_1')
+            loaded = await memory.aload_memory('travel_preferences', 'user_1')
+            found = await memory.asearch_memory('travel', 'user_1')
+            stats = await memory.aget_memory_stats()
+            return loaded, found, stats
+
+        loaded, found, stats = asyncio.run(run())
+        assert loaded == {'style': 'luxury'}
+        assert found['total_found'] == 1
+        assert stats['total_keys'] == 1
+
+class TestCodecs:
+    """Test suite for memory payload codecs"""
+
+    PLAN = {'destination': 'Tokyo', 'flights': [{'price': 800, 'amenities': ['WiFi'] * 50}], 'ok': True}
+
+    @pytest.mark.parametrize('codec', sorted(codecs.CODECS))
+    @pytest.mark.parametrize('compression', [None, 'zlib'])
+    def test_round_trip(self, codec, compression):
+        """Test that every codec/compression pair decodes to the input"""
+        payload = codecs.encode(self.PLAN, codec, compression, threshold=0)
+        assert codecs.decode(payload) == self.PLAN
+
+    def test_compression_threshold(self):
+        """Test that small payloads are left uncompressed"""
+        small = codecs.encode({'a': 1}, 'json', 'zlib', threshold=1024)
+        large = codecs.encode(self.PLAN, 'json', 'zlib', threshold=100)
+        assert small[1:2] == b'-'
+        assert large[1:2] == b'z'
+        assert len(large) < len(codecs.encode(self.PLAN, 'json'))
+
+    def test_namespace_codec_in_memory(self, monkeypatch):
+        """Test that configured namespaces are stored encoded"""
+        monkeypatch.setitem(memory.MEMORY_CONFIG, 'namespace_codecs',
+                            {'aggregated_results': {'codec': 'pickle', 'compression': 'zlib'}})
+        memory.set_memory_backend(InMemoryStore())
+        save_memory('aggregated_results', self.PLAN, 'user_1')
+
+        assert load_memory('aggregated_results', 'user_1') == self.PLAN
+        assert get_memory_stats()['total_size'] < len(json.dumps(self.PLAN))
+        assert json.loads(export_memory('user_1')) == {'aggregated_results_user_1': self.PLAN}
+
+class TestSQLiteStore:
+    """Test suite for the durable SQLite backend"""
+
+    def test_data_survives_reopen(self, tmp_path):
+        """Test that committed data is visible after a restart"""
+        path = str(tmp_path / "memory.db")
+        store = SQLiteStore(path)
+        key = MemoryKey('travel_preferences', 'user_1', '')
+        store.save(key, {'style': 'budget', 'interests': ['food']})
+        assert store.load(key) == {'style': 'budget', 'interests': ['food']}
+        store.close()
+
+        reopened = SQLiteStore(path)
+        assert reopened.load(key) == {'style': 'budget', 'interests': ['food']}
+        assert reopened.stats()['total_keys'] == 1
+        reopened.close()
+
+    def test_group_commit_batches_writes(self, tmp_path):
+        """Test that many queued saves share transactions"""
+        store = SQLiteStore(str(tmp_path / "memory.db"), batch_size=1000, commit_interval=0.2)
+        for i in range(200):
+            store.save(MemoryKey('flight_search', 'user_1', f'City{i:03d}'), {'price': i})
+        store.flush()
+
+        stats = store.stats()
+        assert stats['writes_committed'] == 200
+        assert stats['namespaces']['flight_search']['keys'] == 200
+        assert store.user_stats('user_1')['total_keys'] == 200
+        keys, cursor = store.list_keys(150, None)
+        assert len(keys) == 150 and len(store.list_keys(150, cursor)[0]) == 50
+        assert stats['batches_committed'] < 200
+        total, page, next_cursor = store.search('user_1', 'flight_search_City01', 5, None)
+        assert total == 10
+        assert [k.subkey for k, _ in page] == [f'City01{i}' for i in range(5)]
+        assert store.search('user_1', 'flight_search_City01', 5, next_cursor)[2] is None
+        store.close()
+
+    def test_failed_batch_is_kept_and_retried(self, tmp_path, monkeypatch):
+        """Test a write the database rejects stays readable, fails flush and commits once possible"""
+        from src.utils import sqlite_store
+        monkeypatch.setattr(sqlite_store, "_RETRY_INTERVAL", 0.01)
+        path = str(tmp_path / "memory.db")
+        store = SQLiteStore(path, commit_interval=0.01)
+        admin = sqlite3.connect(path)
+        admin.execute("CREATE TRIGGER reject BEFORE INSERT ON memory BEGIN SELECT RAISE(ABORT, 'disk full'); END")
+        admin.commit()
+        key = MemoryKey('travel_preferences', 'user_1', '')
+        store.save(key, {'style': 'budget'})
+
+        with pytest.raises(sqlite3.Error):
+            store.flush()
+        assert store.load(key) == {'style': 'budget'}
+        assert store.stats()['batches_failed'] >= 1
+
+        admin.execute("DROP TRIGGER reject")
+        admin.commit()
+        admin.close()
+        deadline = time.monotonic() + 5
+        while store.stats()['writes_committed'] == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        store.flush()
+        store.close()
+        reopened = SQLiteStore(path)
+        assert reopened.load(key) == {'style': 'budget'}
+        reopened.close()
+
+    def test_failed_purge_keeps_writer_alive(self, tmp_path, monkeypatch):
+        """Test an error while purging expired rows does not stop the writer"""
+        from src.utils import sqlite_store
+        monkeypatch.setattr(sqlite_store, "_PURGE_INTERVAL", 0.0)
+        path = str(tmp_path / "memory.db")
+        store = SQLiteStore(path, commit_interval=0.01)
+        admin = sqlite3.connect(path)
+        admin.execute("INSERT INTO memory VALUES ('user_1', 'flight_search_Lima', 'flight_search', 'Lima', '{}', 2, 0)")
+        admin.execute("CREATE TRIGGER keep BEFORE DELETE ON memory BEGIN SELECT RAISE(ABORT, 'locked'); END")
+        admin.commit()
+        admin.close()
+        store.save(MemoryKey('flight_search', 'user_1', 'Rome'), {'price': 1})
+        store.flush()
+        store.save(MemoryKey('flight_search', 'user_1', 'Oslo'), {'price': 2})
+        store.flush()
+
+        stats = store.stats()
+        assert stats['writes_committed'] == 2
+        assert stats['purges_failed'] >= 1
+        assert stats['namespaces']['flight_search']['keys'] == 3
+        store.close()
+
+class _SlowStore(InMemoryStore):
+    """In-process store whose writes wait for a gate, to hold them in the queue"""
+
+    def __init__(self):
+        super().__init__()
+        self.gate = threading.Event()
+
+    def save(self, memory_key, data):
+        self.gate.wait()
+        return super().save(memory_key, data)
+
+class TestWriteBehind:
+    """Test suite for the write-behind memory queue"""
+
+    def teardown_method(self):
+        """Close the write-behind store so no worker thread outlives the test"""
+        inner = getattr(memory.get_memory_backend(), 'backend', None)
+        if isinstance(inner, _SlowStore):
+            # Release held writes even if the test failed before opening the gate
+            inner.gate.set()
+        memory.set_memory_backend(InMemoryStore())
+
+    def test_read_your_writes(self):
+        """Test queued writes are visible to load_memory before they are applied"""
+        inner = _SlowStore()
+        memory.set_memory_backend(WriteBehindStore(inner))
+        data = {'price': 500, 'tags': ['WiFi']}
+
+        assert save_memory('flight_search_Tokyo', data, 'user_1')
+        data['price'] = 1
+        assert load_memory('flight_search_Tokyo', 'user_1') == {'price': 500, 'tags': ('WiFi',)}
+        assert inner.load(MemoryKey('flight_search', 'user_1', 'Tokyo')) is None
+
+        inner.gate.set()
+        memory.flush_memory()
+        assert inner.load(MemoryKey('flight_search', 'user_1', 'Tokyo')) == {'price': 500, 'tags': ('WiFi',)}
+
+    def test_queued_delete_hides_value(self):
+        """Test a delete queued after a save wins over the save"""
+        inner = _SlowStore()
+        memory.set_memory_backend(WriteBehindStore(inner))
+
+        save_memory('travel_preferences', {'style': 'budget'}, 'user_1')
+        assert memory.delete_memory('travel_preferences', 'user_1')
+        assert load_memory('travel_preferences', 'user_1') is None
+
+        inner.gate.set()
+        memory.flush_memory()
+        assert get_memory_stats()['total_keys'] == 0
+
+    def test_concurrent_saves_to_one_key_apply_in_order(self):
+        """Test the last save of each writer wins and concurrent saves never reorder"""
+        store = WriteBehindStore(InMemoryStore(), batch_size=4, interval=0.0, max_pending=8)
+        try:
+            keys = [MemoryKey('flight_search', 'user_1', f'City{t}') for t in range(8)]
+            shared = MemoryKey('flight_search', 'user_1', 'Tokyo')
+            seen = {t: [] for t in range(8)}
+
+            def writer(thread):
+                for i in range(200):
+                    store.save(keys[thread], {'i': i})
+                    store.save(shared, {'writer': thread, 'i': i})
+                    # Each writer's own saves must never appear to go back in time
+                    seen[thread].append(store.load(keys[thread])['i'])
+
+            threads = [threading.Thread(target=writer, args=(t,)) for t in range(8)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            store.flush()
+
+            for t in range(8):
+                assert seen[t] == list(range(200))
+                assert store.backend.load(keys[t]) == {'i': 199}
+            assert store.backend.load(shared) in [{'writer': t, 'i': 199} for t in range(8)]
+            assert store.stats()['write_behind']['pending'] == 0
+        finally:
+            store.close()
+
+    def test_writes_are_batched(self):
+        """Test many saves are applied in few batches and reads flush first"""
+        store = WriteBehindStore(InMemoryStore(), batch_size=1000, interval=0.2)
+        memory.set_memory_backend(store)
+        for i in range(200):
+            save_memory(f'flight_search_City{i:03d}', {'price': i}, 'user_1')
+
+        assert search_memory('flight_search_City', 'user_1', limit=5)['total_found'] == 200
+        stats = get_memory_stats()
+        assert stats['total_keys'] == 200
+        assert stats['write_behind']['writes_applied'] == 200
+        assert stats['write_behind']['batches_applied'] < 10
+
+    def test_close_flushes_pending_writes(self, tmp_path):
+        """Test pending writes reach the durable backend on shutdown"""
+        path = str(tmp_path / "memory.db")
+        store = WriteBehindStore(SQLiteStore(path), interval=10.0)
+        for i in range(50):
+            store.save(MemoryKey('hotel_search', 'user_1', f'City{i}'), {'price': i})
+        store.close()
+
+        reopened = SQLiteStore(path)
+        assert reopened.stats()['total_keys'] == 50
+        assert reopened.load(MemoryKey('hotel_search', 'user_1', 'City7')) == {'price': 7}
+        reopened.close()
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -1,8 +1,13 @@
 """
 Tests for TripCraft AI natural language parser
 """
+import json
+from datetime import date
+import numpy as np
 import pytest
-from src.utils import parse_travel_request
+from src.utils import parse_travel_request, parse_request_file
+from src.utils.parser import TravelRequestMatcher
+from src.utils.gazetteer import Gazetteer, build_gazetteer, normalize
 
 class TestTravelParser:
     """Test suite for travel request parsing"""
@@ -47,5 +52,258 @@ class TestTravelParser:
         assert result['duration'] == 5  # Default
         assert len(result['interests']) > 0  # Default interests
 
+    def test_budget_and_duration_numbers(self):
+        """Test the duration is the first number of days and the budget the last number"""
+        result = parse_travel_request("Trip to Rome for 4 days, 2 adults, up to $2500")
+        
+        assert result['destination'] == 'Rome'
+        assert result['duration'] == 4
+        assert result['budget'] == 2500
+    
+    def test_style_priority_and_interest_order(self):
+        """Test budget wins over luxury and interests keep their category order"""
+        result = parse_travel_request("Cheap but premium trip to Lisbon: spa, street food and museums")
+        
+        assert result['style'] == 'budget'
+        assert result['interests'] == ['culture', 'food', 'relaxation']
+    
+    def test_overlapping_keywords(self):
+        """Test keywords overlapping other keywords are all found"""
+        assert parse_travel_request("trip to Sparta")['interests'] == ['culture', 'relaxation']
+        assert parse_travel_request("spartan hostel in Rome")['interests'] == ['culture', 'relaxation']
+        assert parse_travel_request("party in Ibiza")['interests'] == ['culture', 'nightlife']
+    
+    def test_custom_matcher(self):
+        """Test a matcher built from custom cues and keywords"""
+        matcher = TravelRequestMatcher(['fly to', 'see'], {'eco': ['green']}, {'wine': ['vineyard', 'wine']})
+        result = matcher.parse("I'd like to see Porto, then fly to Lyon for green vineyard tours")
+        
+        assert result['destination'] == 'Lyon'
+        assert result['style'] == 'eco'
+        assert result['interests'] == ['wine']
+
+    def test_gazetteer_destinations(self):
+        """Test multi-word cities, aliases, accents and airport codes resolve to one name"""
+        assert parse_travel_request("Trip to New York for 4 days")['destination'] == 'New York'
+        assert parse_travel_request("going to rio de janeiro with friends")['destination'] == 'Rio de Janeiro'
+        assert parse_travel_request("A week in Ho Chi Minh City")['destination'] == 'Ho Chi Minh City'
+        assert parse_travel_request("I want to visit Saigon")['destination'] == 'Ho Chi Minh City'
+        assert parse_travel_request("Flights into NRT please")['destination'] == 'Tokyo'
+        assert parse_travel_request("Take me to NYC")['destination'] == 'New York'
+        # Lowercase words only count after a cue; unknown places after a cue are kept
+        assert parse_travel_request("nice food in Lima")['destination'] == 'Lima'
+        assert parse_travel_request("Trip to Atlantis")['destination'] == 'Atlantis'
+    
+    def test_budget_ignores_counts(self):
+        """Test counts of days and people are not taken as the budget"""
+        assert parse_travel_request("Trip to Rome for 5 days")['budget'] == 2000
+        result = parse_travel_request("Paris with $1,500 for 2 adults and 1 child")
+        assert result['budget'] == 1500
+        assert parse_travel_request("3000 euros, 6 days in Berlin, 2 kids")['budget'] == 3000
+
+    def test_date_ranges(self):
+        """Test date ranges in several spellings, with the year inferred from today"""
+        today = date(2026, 10, 18)
+        def dates(request):
+            result = parse_travel_request(request, today=today)
+            return result['depart_date'], result['return_date'], result['duration']
+        
+        assert dates("Paris from March 3 to March 10") == ("2027-03-03", "2027-03-10", 7)
+        assert dates("Rome Dec 28 - Jan 4") == ("2026-12-28", "2027-01-04", 7)
+        assert dates("Lisbon 3 to 8 May") == ("2027-05-03", "2027-05-08", 5)
+        assert dates("Oslo Nov 2nd-6th, 2027") == ("2027-11-02", "2027-11-06", 4)
+        assert dates("Tokyo on 2026-12-20 for 2 weeks") == ("2026-12-20", "2027-01-03", 14)
+        assert dates("I may go to Rome") == (None, None, 5)
+    
+    def test_dates_are_not_budget(self):
+        """Test day and year numbers of dates are not taken as the budget"""
+        result = parse_travel_request("Tokyo from March 3, 2027 for 5 days", today=date(2026, 10, 18))
+        
+        assert result['budget'] == 2000
+        assert result['depart_date'] == "2027-03-03"
+        assert result['return_date'] == "2027-03-08"
+    
+    def test_amount_after_date_is_not_year(self):
+        """Test money and implausible years after a date stay out of the date"""
+        today = date(2026, 10, 18)
+        
+        result = parse_travel_request("Budget travel to Tokyo for 5 days from March 3, 2500 dollars", today=today)
+        assert (result['depart_date'], result['return_date']) == ("2027-03-03", "2027-03-08")
+        assert result['budget'] == 2500
+        assert result['confidence']['budget'] == 1.0
+        result = parse_travel_request("Paris from 3 to 8 March, 1500 euros", today=today)
+        assert (result['depart_date'], result['budget']) == ("2027-03-03", 1500)
+        result = parse_travel_request("Rome dec 28 - jan 3 2000", today=today)
+        assert (result['return_date'], result['budget']) == ("2027-01-03", 2000)
+        assert result['confidence']['budget'] == 0.9
+    
+    def test_confidence(self):
+        """Test stated fields are confident and defaults are not"""
+        stated = parse_travel_request("Budget travel to Tokyo for 5 days from March 3 with $1500 for food")
+        vague = parse_travel_request("Just want to travel somewhere")
+        
+        assert stated['confidence'] == {
+            'destination': 1.0, 'budget': 1.0, 'duration': 1.0, 'dates': 0.9, 'style': 1.0, 'interests': 1.0
+        }
+        assert vague['confidence']['destination'] == 0.0
+        assert vague['confidence']['dates'] == 0.0
+        assert vague['depart_date'] is None
+        assert parse_travel_request("Somewhere in Bangkok")['confidence']['destination'] < 1.0
+        assert parse_travel_request("Bangkok from May 3")['confidence']['dates'] == 0.5
+    
+    def test_past_and_invalid_dates(self):
+        """Test past or impossible date ranges are kept but not trusted"""
+        today = date(2026, 10, 18)
+        def confidence(request):
+            return parse_travel_request(request, today=today)['confidence']['dates']
+        
+        assert confidence("Paris 2020-01-05 to 2020-01-10") == 0.5
+        assert confidence("Paris from March 3, 2020 for 5 days") == 0.5
+        assert confidence("Paris 2027-02-03 to 2027-02-30") == 0.5
+        assert confidence("Paris 2027-02-30 to 2027-03-04") == 0.0
+        assert confidence("Paris 2026-10-18 to 2026-10-20") == 1.0
+        assert parse_travel_request("Paris 2020-01-05 to 2020-01-10", today=today)['depart_date'] == "2020-01-05"
+
+class TestGazetteer:
+    """Test suite for building and loading the gazetteer"""
+    
+    SEED = (
+        "# test seed\n"
+        "# name\tcountry\tregion\tlat\tlon\tiata_codes\taliases\n"
+        "Sao Paulo\tBR\tSouth America\t-23.55\t-46.63\tSAO,GRU\tSampa\n"
+        "New York\tUS\tNorth America\t40.71\t-74.01\tNYC,JFK\tBig Apple,NYC\n"
+        "York\tGB\tEurope\t53.96\t-1.08\t\t\n"
+        "Newark\tUS\tNorth America\t40.74\t-74.17\tEWR\tNew York\n"
+    )
+    
+    def build(self, tmp_path, *sources):
+        paths = []
+        for i, text in enumerate(sources):
+            path = tmp_path / f"source{i}.txt"
+            path.write_text(text, encoding="utf-8")
+            paths.append(str(path))
+        output = str(tmp_path / "gazetteer.bin")
+        build_gazetteer(paths, output)
+        return Gazetteer.load(output)
+    
+    def test_build_and_lookup(self, tmp_path):
+        """Test names, aliases and codes survive the binary roundtrip"""
+        gazetteer = self.build(tmp_path, self.SEED)
+        
+        assert len(gazetteer) == 4
+        assert gazetteer.lookup("São Paulo").name == "Sao Paulo"
+        assert gazetteer.lookup("sampa").country == "BR"
+        assert gazetteer.lookup("GRU").iata == "SAO"
+        assert gazetteer.lookup("gru") is None  # codes are case-sensitive
+        assert gazetteer.lookup("New York").name == "New York"  # earlier places win
+        assert gazetteer.lookup("JFK").lat == pytest.approx(40.71, abs=1e-4)
+    
+    def test_longest_match(self, tmp_path):
+        """Test the longest key wins and matching stops at unknown words"""
+        gazetteer = self.build(tmp_path, self.SEED)
+        words = normalize("fly to new york then york and new jersey").split()
+        
+        assert gazetteer.longest_match(words, 2) == (1, 2)
+        assert gazetteer.longest_match(words, 3) == (2, 1)
+        assert gazetteer.longest_match(words, 7) is None
+        assert gazetteer.longest_match(words, 0) is None
+    
+    def test_heads_table(self, tmp_path):
+        """Test words starting a key map to their one-word place and whether longer keys follow"""
+        gazetteer = self.build(tmp_path, self.SEED)
+    
+        assert gazetteer.heads["york"] == (2, 0)
+        assert gazetteer.heads["new"] == (-1, 1)
+        assert gazetteer.heads["EWR"] == (3, 0)
+        assert "jersey" not in gazetteer.heads
+        assert gazetteer.longest_match(["york"], 0) == (2, 1)
+        assert gazetteer.longest_match(["new"], 0) is None
+    
+    def test_geonames_source(self, tmp_path):
+        """Test GeoNames rows are added after the seed, most populous first"""
+        def row(name, alternates, lat, lon, country, population):
+            columns = ["1", name, name, alternates, lat, lon, "P", "PPL", country] + [""] * 5 + [population] + [""] * 4
+            return "\t".join(columns) + "\n"
+        geonames = row("Porto", "Oporto", "41.15", "-8.61", "PT", "250000") + row("Campinas", "", "-22.9", "-47.06", "BR", "1000000")
+        gazetteer = self.build(tmp_path, self.SEED, geonames)
+        
+        campinas = gazetteer.lookup("campinas")
+        assert campinas.region == "South America"  # from the seed's countries
+        assert gazetteer.lookup("Oporto").name == "Porto"
+        assert gazetteer.lookup("porto").region == ""
+        assert gazetteer.place(4) == campinas
+
+class TestBulkParser:
+    """Test suite for bulk parsing of request logs"""
+    
+    REQUESTS = [
+        "Budget travel to Tokyo for 5 days",
+        "Luxury trip to New York with $4,000",
+        "I love food and shopping in Bangkok",
+        "Family vacation to Rio de Janeiro for 9 days, 2 kids"
+    ] * 3
+    
+    def write_jsonl(self, path):
+        with open(path, "w") as f:
+            for i, request in enumerate(self.REQUESTS):
+                f.write(json.dumps({"request": request} if i % 2 else request) + "\n")
+            f.write("not json\n")
+            f.write(json.dumps({"other": "field"}) + "\n")
+    
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_jsonl_matches_single_parser(self, tmp_path, workers):
+        """Test bulk results match parse_travel_request, in input order"""
+        source, output = tmp_path / "requests.jsonl", tmp_path / "parsed.jsonl"
+        self.write_jsonl(source)
+        
+        stats = parse_request_file(str(source), str(output), workers=workers, chunk_size=5)
+        
+        rows = [json.loads(line) for line in output.read_text().splitlines()]
+        assert stats["requests"] == len(self.REQUESTS)
+        assert stats["skipped"] == 2
+        assert stats["chunks"] == 3
+        assert stats["requests_per_second"] > 0
+        assert [row.pop("line") for row in rows] == list(range(1, len(self.REQUESTS) + 1))
+        assert rows == [parse_travel_request(request) for request in self.REQUESTS]
+    
+    def test_csv_to_columnar(self, tmp_path):
+        """Test CSV input written as coded columns"""
+        source, output = tmp_path / "requests.csv", tmp_path / "parsed.npz"
+        source.write_text("id,text\n" + "".join(f'{i},"{r}"\n' for i, r in enumerate(self.REQUESTS)))
+        
+        stats = parse_request_file(str(source), str(output), field="text", workers=2, chunk_size=4)
+        
+        archive = np.load(output)
+        destinations = archive["destination_names"][archive["destination"]]
+        names = list(archive["interest_names"])
+        assert stats["requests"] == len(self.REQUESTS)
+        assert list(destinations[:4]) == ["Tokyo", "New York", "Bangkok", "Rio de Janeiro"]
+        assert list(archive["budget"][:4]) == [2000, 4000, 2000, 2000]
+        assert list(archive["duration"][:4]) == [5, 5, 5, 9]
+        assert archive["style_names"][archive["style"][1]] == "luxury"
+        assert archive["interests"][2] == (1 << names.index("food")) | (1 << names.index("shopping"))
+        assert list(archive["line"][:2]) == [2, 3]
+        assert np.isnat(archive["depart_date"]).all()
+    
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_reference_date(self, tmp_path, workers):
+        """Test dates without a year resolve against the given reference date"""
+        source, output = tmp_path / "requests.jsonl", tmp_path / "parsed.jsonl"
+        source.write_text(json.dumps("Trip to Rome from March 3 to March 8") + "\n")
+        
+        parse_request_file(str(source), str(output), workers=workers, today=date(2030, 6, 1))
+        
+        row = json.loads(output.read_text())
+        assert (row["depart_date"], row["return_date"]) == ("2031-03-03", "2031-03-08")
+        assert row == {"line": 1, **parse_travel_request("Trip to Rome from March 3 to March 8", date(2030, 6, 1))}
+    
+    def test_missing_csv_column(self, tmp_path):
+        """Test a CSV without the request column is rejected"""
+        source = tmp_path / "requests.csv"
+        source.write_text("id,query\n1,Trip to Paris\n")
+        
+        with pytest.raises(ValueError):
+            parse_request_file(str(source), str(tmp_path / "parsed.jsonl"), field="text", workers=1)
+
 if __name__ == "__main__":
     pytest.main([__file__])
\ No newline at end of file
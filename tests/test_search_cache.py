@@ -0,0 +1,112 @@
+"""
+Tests for TripCraft AI search result cache
+"""
+import threading
+import time
+import pytest
+from src.utils.search_cache import SearchCache
+from src.tools import travel_tools
+from src.main import MockToolContext
+
+class TestSearchCache:
+    """Test suite for the TTL/LRU single-flight cache"""
+
+    def test_hit_and_miss(self):
+        """Test a repeated key is served from the cache"""
+        cache = SearchCache("test", ttl=60, max_entries=10)
+        calls = []
+
+        assert cache.get_or_compute("k", lambda: calls.append(1) or "v") == "v"
+        assert cache.get_or_compute("k", lambda: calls.append(1) or "other") == "v"
+        assert len(calls) == 1
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_ttl_expiry(self):
+        """Test expired entries are recomputed"""
+        cache = SearchCache("test", ttl=0.01, max_entries=10)
+        cache.get_or_compute("k", lambda: 1)
+        time.sleep(0.02)
+
+        assert cache.get_or_compute("k", lambda: 2) == 2
+        assert cache.stats()["misses"] == 2
+
+    def test_lru_limit(self):
+        """Test least recently used entries are dropped beyond max_entries"""
+        cache = SearchCache("test", ttl=60, max_entries=2)
+        cache.get_or_compute("a", lambda: 1)
+        cache.get_or_compute("b", lambda: 2)
+        cache.get_or_compute("a", lambda: 1)
+        cache.get_or_compute("c", lambda: 3)
+
+        assert cache.get_or_compute("a", lambda: "recomputed") == 1
+        assert cache.get_or_compute("b", lambda: "recomputed") == "recomputed"
+        assert cache.stats()["evictions"] == 2
+
+    def test_concurrent_calls_coalesce(self):
+        """Test N simultaneous identical searches trigger one computation"""
+        cache = SearchCache("test", ttl=60, max_entries=10)
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+        results = []
+
+        def compute():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return "v"
+
+        threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute("k", compute))) for _ in range(8)]
+        threads[0].start()
+        started.wait(5)
+        for t in threads[1:]:
+            t.start()
+        while cache.stats()["coalesced"] < 7:
+            time.sleep(0.001)
+        release.set()
+        for t in threads:
+            t.join()
+
+        assert len(calls) == 1
+        assert results == ["v"] * 8
+        assert cache.stats()["coalesced"] == 7
+
+    def test_errors_are_shared_not_cached(self):
+        """Test a failing computation is retried on the next call"""
+        cache = SearchCache("test", ttl=60, max_entries=10)
+
+        def fail():
+            raise RuntimeError("supplier down")
+
+        with pytest.raises(RuntimeError):
+            cache.get_or_compute("k", fail)
+        assert cache.get_or_compute("k", lambda: "ok") == "ok"
+        assert cache.stats()["entries"] == 1
+
+class TestCachedTools:
+    """Test suite for caching in the search tools"""
+
+    def test_identical_searches_compute_once(self, monkeypatch):
+        """Test normalized identical searches share one computation"""
+        calls = []
+        compute = travel_tools._flight_options
+        monkeypatch.setattr(travel_tools, "_flight_options", lambda *args: calls.append(args) or compute(*args))
+        context = MockToolContext("cache_user", "cache_session")
+
+        first = travel_tools.search_flights_ultimate("Lisbon", "2031-03-01", "2031-03-08", context)
+        second = travel_tools.search_flights_ultimate("  lisbon ", "2031-03-01", "2031-03-08", context)
+
+        assert len(calls) == 1
+        assert first['flights'] == second['flights']
+        assert first['search_context']['timestamp'] <= second['search_context']['timestamp']
+
+    def test_cached_results_are_read_only(self):
+        """Test callers cannot corrupt the shared cached result"""
+        context = MockToolContext("cache_user", "cache_session")
+        result = travel_tools.find_hotels_ultimate("Lisbon", "2031-03-01", "2031-03-08", 120.0, 2, context)
+        price = result['hotels'][0]['price_per_night']
+        result['hotels'][0]['price_per_night'] = 1
+
+        again = travel_tools.find_hotels_ultimate("Lisbon", "2031-03-01", "2031-03-08", 120.0, 2, context)
+        assert again['hotels'][0]['price_per_night'] == price
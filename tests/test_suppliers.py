@@ -0,0 +1,231 @@
+"""
+Tests for TripCraft AI supplier adapters
+"""
+import asyncio
+import random
+import time
+import pytest
+from src.suppliers import FanOutSupplier, HTTPSupplier, LatencyHistogram, RetryPolicy, SupplierError, run_sync
+from src.suppliers.local import LocalSupplier
+from src.suppliers.server import SupplierServer
+from src.tools import travel_tools
+from src.utils.search_cache import clear_search_cache
+from src.main import MockToolContext
+
+FAST_RETRY = dict(attempts=3, initial_delay=0.001, max_delay=0.01)
+
+@pytest.fixture
+def server():
+    server = SupplierServer().start_in_thread()
+    yield server
+    server.stop_thread()
+
+class TestSuppliers:
+    """Test suite for the pooled HTTP supplier client"""
+
+    def test_keep_alive_reuses_connections(self, server):
+        """Test sequential requests share one pooled connection"""
+        supplier = HTTPSupplier(server.base_url, retry=RetryPolicy(**FAST_RETRY))
+
+        for _ in range(10):
+            result = run_sync(supplier.fetch_flights("Tokyo", "2025-06-01", "2025-06-06", 3))
+            assert len(result["flights"]) == 3
+
+        stats = supplier.stats()
+        assert stats["requests_sent"] == 10
+        assert stats["connections_opened"] == 1
+        assert server.connections == 1
+
+    def test_concurrent_requests_bounded_by_pool(self, server):
+        """Test concurrent requests open at most pool_size connections"""
+        supplier = HTTPSupplier(server.base_url, pool_size=3, retry=RetryPolicy(**FAST_RETRY))
+
+        async def fetch_many():
+            return await asyncio.gather(*[
+                supplier.fetch_hotels("Paris", "2025-06-01", "2025-06-04", 150, 2, 2) for _ in range(12)
+            ])
+
+        results = run_sync(fetch_many())
+        assert all(len(result["hotels"]) == 2 for result in results)
+        assert supplier.stats()["connections_opened"] <= 3
+
+    def test_retries_transient_failures(self, server):
+        """Test 503 responses are retried until the supplier recovers"""
+        server.fail_first = 2
+        supplier = HTTPSupplier(server.base_url, retry=RetryPolicy(**FAST_RETRY))
+
+        result = run_sync(supplier.fetch_flights("Rome", "2025-06-01", "2025-06-04", 2))
+        assert len(result["flights"]) == 2
+        assert server.requests == 3
+
+    def test_gives_up_after_attempts(self, server):
+        """Test the last error is raised once retries are exhausted"""
+        server.fail_first = 5
+        supplier = HTTPSupplier(server.base_url, retry=RetryPolicy(**FAST_RETRY))
+
+        with pytest.raises(SupplierError) as excinfo:
+            run_sync(supplier.fetch_flights("Rome", "2025-06-01", "2025-06-04", 2))
+        assert excinfo.value.status == 503
+        assert server.requests == 3
+
+    def test_client_errors_not_retried(self, server):
+        """Test 4xx responses fail immediately"""
+        supplier = HTTPSupplier(server.base_url, retry=RetryPolicy(**FAST_RETRY))
+
+        with pytest.raises(SupplierError) as excinfo:
+            run_sync(supplier.get_json("/missing", {}))
+        assert excinfo.value.status == 404
+        assert not excinfo.value.retryable
+        assert server.requests == 1
+
+    def test_timeout_is_retried(self, server):
+        """Test slow responses time out on every attempt"""
+        server.latency = 0.2
+        supplier = HTTPSupplier(server.base_url, timeout=0.02, retry=RetryPolicy(**FAST_RETRY))
+
+        with pytest.raises(asyncio.TimeoutError):
+            run_sync(supplier.fetch_flights("Rome", "2025-06-01", "2025-06-04", 2))
+        assert server.requests == 3
+
+    def test_https_url_uses_tls(self, server):
+        """Test an https supplier speaks TLS, so a plain HTTP server never sees a request"""
+        supplier = HTTPSupplier(server.base_url.replace("http://", "https://"), timeout=0.2,
+                                retry=RetryPolicy(**FAST_RETRY))
+        assert HTTPSupplier("https://suppliers.example/api").port == 443
+
+        with pytest.raises((asyncio.TimeoutError, OSError)):
+            run_sync(supplier.fetch_flights("Rome", "2025-06-01", "2025-06-04", 2))
+        assert server.requests == 0
+
+    def test_unsupported_scheme_rejected(self):
+        """Test supplier URLs other than http and https fail fast"""
+        with pytest.raises(ValueError):
+            HTTPSupplier("ftp://suppliers.example")
+
+    def test_run_sync_refuses_running_loop(self, server):
+        """Test async callers must await the supplier instead of blocking their loop"""
+        supplier = HTTPSupplier(server.base_url, retry=RetryPolicy(**FAST_RETRY))
+
+        async def on_loop():
+            with pytest.raises(RuntimeError):
+                run_sync(supplier.fetch_flights("Rome", "2025-06-01", "2025-06-04", 2))
+            return await supplier.fetch_flights("Rome", "2025-06-01", "2025-06-04", 2)
+
+        assert len(_run(on_loop())["flights"]) == 2
+        assert server.requests == 1
+
+    def test_backoff_jitter_bounds(self):
+        """Test retry delays stay within the capped exponential ceiling"""
+        policy = RetryPolicy(attempts=5, initial_delay=1.0, max_delay=4.0, multiplier=2.0, rng=random.Random(7))
+
+        for attempt in range(6):
+            ceiling = min(4.0, 2.0 ** attempt)
+            delays = [policy.delay(attempt) for _ in range(200)]
+            assert all(0 <= d <= ceiling for d in delays)
+            assert max(delays) > ceiling / 2
+
+    def test_tools_use_http_supplier(self, server, monkeypatch):
+        """Test the search tools return supplier results in http mode"""
+        local = travel_tools._flight_options("Tokyo", "2025-07-01", "2025-07-06", 4)
+        clear_search_cache()
+        supplier = HTTPSupplier(server.base_url, retry=RetryPolicy(**FAST_RETRY))
+        monkeypatch.setattr(travel_tools, "get_supplier", lambda: supplier)
+        context = MockToolContext("supplier_test")
+
+        flights = travel_tools.search_flights_ultimate("Tokyo", "2025-07-01", "2025-07-06", context, limit=4)
+        assert flights["total_available"] == local["total_available"]
+        assert [f["price"] for f in flights["flights"]] == [f["price"] for f in local["flights"]]
+
+        hotels = list(travel_tools.stream_hotels("Paris", "2025-07-01", "2025-07-04", 150, 2, context,
+                                                 limit=3, amenities=["Pool"]))
+        assert len(hotels) == 3
+        assert all("Pool" in h["amenities"] for h in hotels)
+        assert supplier.stats()["requests_sent"] == 2
+
+def _run(awaitable):
+    return asyncio.run(awaitable)
+
+class TestFanOut:
+    """Test suite for hedged fan-out across providers"""
+
+    def test_histogram_quantiles(self):
+        """Test quantiles land in the bucket of the observed latencies"""
+        histogram = LatencyHistogram()
+        assert histogram.quantile(0.95) is None
+
+        for _ in range(95):
+            histogram.record(0.010)
+        for _ in range(5):
+            histogram.record(0.500)
+        assert 0.010 <= histogram.quantile(0.5) < 0.013
+        assert 0.010 <= histogram.quantile(0.95) < 0.013
+        assert 0.500 <= histogram.quantile(0.99) < 0.6
+
+    def test_merges_and_deduplicates(self):
+        """Test offers for the same flight are merged, keeping the cheapest"""
+        fanout = FanOutSupplier([LocalSupplier("a"), LocalSupplier("b", markup=0.9)], quorum=2)
+        direct = _run(LocalSupplier("direct").fetch_flights("Tokyo", "2025-06-01", "2025-06-06", 5))
+
+        result = _run(fanout.fetch_flights("Tokyo", "2025-06-01", "2025-06-06", 5))
+        assert result["providers"] == 2
+        assert [f["id"] for f in result["flights"]] == [f["id"] for f in direct["flights"]]
+        assert [f["price"] for f in result["flights"]] == [round(f["price"] * 0.9) for f in direct["flights"]]
+
+    def test_quorum_cancels_stragglers(self):
+        """Test the answer arrives with the quorum and slow providers are cancelled"""
+        slow = LocalSupplier("slow", latency=2.0)
+        fanout = FanOutSupplier([LocalSupplier("a"), LocalSupplier("b"), slow], quorum=2, deadline=5.0)
+
+        start = time.perf_counter()
+        result = _run(fanout.fetch_hotels("Paris", "2025-06-01", "2025-06-04", 150, 2, 3))
+        assert time.perf_counter() - start < 1.0
+        assert result["providers"] == 2
+        assert fanout.stats()["slow"]["cancelled"] == 1
+
+    def test_deadline_returns_partial_results(self):
+        """Test the deadline answers with the providers that responded"""
+        fanout = FanOutSupplier([LocalSupplier("fast"), LocalSupplier("slow", latency=2.0)], quorum=2, deadline=0.1)
+
+        start = time.perf_counter()
+        result = _run(fanout.fetch_flights("Rome", "2025-06-01", "2025-06-04", 3))
+        assert time.perf_counter() - start < 1.0
+        assert result["providers"] == 1
+        assert len(result["flights"]) == 3
+
+    def test_no_answer_by_deadline(self):
+        """Test a deadline with no responses raises a retryable error"""
+        fanout = FanOutSupplier([LocalSupplier("slow", latency=2.0)], deadline=0.05)
+
+        with pytest.raises(SupplierError) as excinfo:
+            _run(fanout.fetch_flights("Rome", "2025-06-01", "2025-06-04", 3))
+        assert excinfo.value.retryable
+
+    def test_hedges_slow_attempt(self):
+        """Test an attempt slower than the provider's p95 is hedged and the hedge wins"""
+        provider = LocalSupplier("flaky", latency=0.01)
+        fanout = FanOutSupplier([provider], quorum=1, deadline=5.0, hedge_min_samples=5)
+
+        async def scenario():
+            for _ in range(5):
+                await fanout.fetch_flights("Rome", "2025-06-01", "2025-06-04", 2)
+            provider.slow_every, provider.slow_latency = provider.requests + 1, 2.0
+            start = time.perf_counter()
+            await fanout.fetch_flights("Rome", "2025-06-01", "2025-06-04", 2)
+            return time.perf_counter() - start
+
+        assert _run(scenario()) < 1.0
+        stats = fanout.stats()["flaky"]
+        assert stats["hedges"] == 1
+        assert stats["hedge_wins"] == 1
+
+    def test_tools_use_fanout(self, monkeypatch):
+        """Test the search tools merge provider results in fan-out mode"""
+        fanout = FanOutSupplier([LocalSupplier("a", latency=0.01), LocalSupplier("b", markup=0.95)], quorum=2)
+        clear_search_cache()
+        monkeypatch.setattr(travel_tools, "get_supplier", lambda: fanout)
+        context = MockToolContext("fanout_test")
+
+        hotels = travel_tools.find_hotels_ultimate("Paris", "2025-08-01", "2025-08-04", 150, 2, context, limit=4)
+        ids = [h["id"] for h in hotels["hotels"]]
+        assert len(ids) == len(set(ids)) == 4
+        assert fanout.stats()["a"]["responses"] == fanout.stats()["b"]["responses"] == 1
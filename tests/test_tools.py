@@ -1,13 +1,35 @@
 """
 Tests for TripCraft AI tools
 """
+import asyncio
+import json
+import tracemalloc
+import numpy as np
 import pytest
 from src.tools import (
     search_flights_ultimate,
     find_hotels_ultimate,
+    search_travel_batch,
+    search_price_calendar,
+    stream_flights,
+    stream_hotels,
+    astream_flights,
+    astream_hotels,
     save_user_preferences_ultimate,
-    aggregate_travel_results_ultimate
+    aggregate_travel_results_ultimate,
+    find_hotels_near,
+    find_attractions
 )
+from src.tools import inventory
+# The tools import utils as a top-level package, so records are checked
+# against those module objects
+from utils import codecs
+from utils.memory_store import snapshot
+from utils.records import json_default
+from src.tools.hotel_index import HotelIndex, amenity_mask
+from src.tools.bundles import optimize_bundles, duration_minutes
+from src.tools.aggregation_memo import get_aggregation_memo
+from src.tools.geo import GridIndex, haversine_km, proximity_scores, get_poi_catalog
 from src.main import MockToolContext
 
 class TestTravelTools:
@@ -59,5 +81,680 @@ class TestTravelTools:
         assert 'flights' in result
         assert 'hotels' in result
 
+    def test_flights_sorted_and_limited(self):
+        """Test flights come back cheapest first from the full route inventory"""
+        result = search_flights_ultimate("Paris", "2024-02-01", "2024-02-06", self.context, limit=5)
+        prices = [f['price'] for f in result['flights']]
+        
+        assert len(prices) == 5
+        assert prices == sorted(prices)
+        assert result['total_available'] > 1000
+        assert all(f['fare']['amount'] == f['price'] for f in result['flights'])
+    
+    def test_results_are_json_serializable(self):
+        """Test every tool returns plain data that json.dumps accepts"""
+        flights = search_flights_ultimate("Rome", "2030-09-01", "2030-09-05", self.context)
+        hotels = find_hotels_ultimate("Rome", "2030-09-01", "2030-09-05", 120.0, 2, self.context)
+        results = [
+            flights,
+            hotels,
+            find_hotels_near("Rome", "2030-09-01", "2030-09-05", 120.0, 2, self.context, limit=3),
+            find_attractions("Rome", self.context, k=3),
+            search_travel_batch([("Rome", "2030-09-01", "2030-09-05", 3000)], self.context, limit=3),
+            search_price_calendar("Rome", "2030-09-01", self.context, flex_days=1, min_nights=3, max_nights=4),
+            save_user_preferences_ultimate("test_user", self.context),
+            aggregate_travel_results_ultimate(flights, hotels, {}, self.context, budget=3000, nights=4),
+            list(stream_flights("Rome", "2030-09-01", "2030-09-05", self.context, limit=3)),
+            list(stream_hotels("Rome", "2030-09-01", "2030-09-05", 120.0, 2, self.context, limit=3))
+        ]
+
+        for result in results:
+            json.dumps(result)
+        assert isinstance(flights['flights'][0], dict)
+        assert isinstance(results[7]['bundles'][0]['flight'], dict)
+
+    def test_hotels_respect_budget(self):
+        """Test hotels within 20% of the budget are preferred"""
+        result = find_hotels_ultimate("Paris", "2024-02-01", "2024-02-06", 100.0, 2, self.context)
+        
+        assert all(h['price_per_night'] <= 120 for h in result['hotels'])
+        assert all(h['room_types'][0]['max_guests'] == 2 for h in result['hotels'])
+
+class TestStreaming:
+    """Test suite for streaming tool variants"""
+    
+    def setup_method(self):
+        """Setup test context"""
+        self.context = MockToolContext("stream_user", "stream_session")
+    
+    def test_streams_match_full_results(self):
+        """Test streams yield the same options in the same order"""
+        flights = list(stream_flights("Dubai", "2030-01-10", "2030-01-15", self.context))
+        hotels = list(stream_hotels("Dubai", "2030-01-10", "2030-01-15", 120.0, 2, self.context, sort_by='rating'))
+        
+        assert flights == search_flights_ultimate("Dubai", "2030-01-10", "2030-01-15", self.context)['flights']
+        assert hotels == find_hotels_ultimate("Dubai", "2030-01-10", "2030-01-15", 120.0, 2, self.context, sort_by='rating')['hotels']
+    
+    def test_price_stream_matches_uncached_query(self):
+        """Test hotels streamed by price come out in final ranking order"""
+        streamed = list(stream_hotels("Singapore", "2030-02-01", "2030-02-04", 90.0, 1, self.context, limit=25))
+        prices = [h['price_per_night'] for h in streamed]
+        
+        assert len(streamed) == 25
+        assert prices == sorted(prices)
+        assert all(p <= 108 for p in prices)
+    
+    def test_memory_saved_only_when_exhausted(self, monkeypatch):
+        """Test a stream saves its full result once, and nothing when closed early"""
+        from src.tools import travel_tools
+        writes = []
+        monkeypatch.setattr(travel_tools, "save_memory", lambda key, data, user_id: writes.append((key, data)) or True)
+        
+        stream = stream_flights("Mumbai", "2030-03-01", "2030-03-05", self.context)
+        next(stream)
+        stream.close()
+        assert writes == []
+        
+        flights = list(stream_flights("Mumbai", "2030-03-01", "2030-03-05", self.context))
+        assert [key for key, _ in writes] == ['flight_search_Mumbai']
+        assert writes[0][1]['flights'] == flights
+    
+    def test_async_streams(self):
+        """Test async iterators interleave flights and hotels"""
+        from src.tools.hotel_index import get_hotel_index
+        inventory.get_flight_inventory("Bangkok")
+        get_hotel_index("Bangkok")
+
+        async def collect():
+            order = []
+            
+            async def drain(stream, kind):
+                async for _ in stream:
+                    order.append(kind)
+            
+            await asyncio.gather(
+                drain(astream_flights("Bangkok", "2030-04-01", "2030-04-06", self.context, limit=5), 'flight'),
+                drain(astream_hotels("Bangkok", "2030-04-01", "2030-04-06", 40.0, 2, self.context, limit=5), 'hotel')
+            )
+            return order
+        
+        order = asyncio.run(collect())
+        assert order.count('flight') == 5 and order.count('hotel') == 5
+        assert 'hotel' in order[:5]
+
+    def test_async_streams_await_supplier(self, monkeypatch):
+        """Test async streams await the supplier on the caller's loop instead of blocking it"""
+        from src.tools import travel_tools
+        from src.suppliers.local import LocalSupplier
+        from src.utils.search_cache import clear_search_cache
+        clear_search_cache()
+        monkeypatch.setattr(travel_tools, "get_supplier", lambda: LocalSupplier(latency=0.05))
+        monkeypatch.setattr(travel_tools, "run_sync", lambda awaitable: pytest.fail("run_sync on the event loop"))
+
+        async def collect():
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    ticks += 1
+                    await asyncio.sleep(0.005)
+
+            task = asyncio.create_task(ticker())
+            flights = [f async for f in astream_flights("Lima", "2030-06-01", "2030-06-05", self.context, limit=3)]
+            hotels = [h async for h in astream_hotels("Lima", "2030-06-01", "2030-06-05", 80.0, 2, self.context, limit=3)]
+            task.cancel()
+            return flights, hotels, ticks
+
+        flights, hotels, ticks = asyncio.run(collect())
+        assert len(flights) == 3 and len(hotels) == 3
+        assert ticks >= 10
+    
+    def test_aggregator_consumes_streams(self):
+        """Test the aggregator accepts generators"""
+        result = aggregate_travel_results_ultimate(
+            stream_flights("Sydney", "2030-05-01", "2030-05-08", self.context),
+            stream_hotels("Sydney", "2030-05-01", "2030-05-08", 150.0, 2, self.context),
+            {}, self.context, budget=3000, nights=7, destination="Sydney"
+        )
+        
+        assert result['destination'] == 'Sydney'
+        assert result['flights']['total_options'] == 10
+        assert result['budget_analysis']['nights'] == 7
+
+class TestBatchSearch:
+    """Test suite for batch searches"""
+    
+    def setup_method(self):
+        """Setup test context"""
+        self.context = MockToolContext("batch_user", "batch_session")
+    
+    def test_region_under_budget(self):
+        """Test "anywhere in Asia under $1500" is a single call"""
+        result = search_travel_batch([("Asia", "2024-03-01", "2024-03-08", 1500)], self.context, limit=3)
+        asian = {d['name'] for d in inventory.DESTINATIONS.values() if d['region'] == 'Asia'}
+        
+        assert result['status'] == 'success'
+        assert {r['destination'] for r in result['results']} | set(result['over_budget']) == asian
+        assert all(r['cheapest_total'] <= 1500 for r in result['results'])
+        totals = [r['cheapest_total'] for r in result['results']]
+        assert totals == sorted(totals)
+        assert all(len(r['flights']) <= 3 and r['nights'] == 7 for r in result['results'])
+    
+    def test_mixed_queries_single_memory_write(self, monkeypatch):
+        """Test dict and tuple queries share one memory write"""
+        from src.tools import travel_tools
+        writes = []
+        monkeypatch.setattr(travel_tools, "save_memory", lambda key, data, user_id: writes.append(key) or True)
+        
+        result = search_travel_batch([
+            {'destination': 'Paris', 'depart_date': '2024-05-01', 'return_date': '2024-05-04', 'budget_per_night': 150, 'guests': 2},
+            ('London', '2024-05-01', '2024-05-04'),
+            ('Sydney', '2024-05-01', '2024-05-04', 100)
+        ], self.context)
+        
+        assert writes == ['batch_search']
+        assert {r['destination'] for r in result['results']} == {'Paris', 'London'}
+        assert result['over_budget'] == ['Sydney']
+        assert result['queries'] == 3
+    
+    def test_expand_destination(self):
+        """Test region and wildcard expansion"""
+        assert len(inventory.expand_destination("anywhere")) == len(inventory.DESTINATIONS)
+        assert inventory.expand_destination("middle  east") == ['Dubai']
+        assert inventory.expand_destination("Lisbon") == ['Lisbon']
+
+class TestPriceCalendar:
+    """Test suite for flexible-date searches"""
+    
+    def setup_method(self):
+        """Setup test context"""
+        self.context = MockToolContext("calendar_user", "calendar_session")
+    
+    def test_grid_shape_and_cheapest(self):
+        """Test every departure date and trip length is priced"""
+        result = search_price_calendar("Tokyo", "2024-06-15", self.context, flex_days=3, min_nights=4, max_nights=6)
+        calendar = result['calendar']
+        
+        assert len(calendar) == 7 * 3
+        assert calendar[0]['depart_date'] == '2024-06-12'
+        assert calendar[-1]['return_date'] == '2024-06-24'
+        assert result['cheapest']['total'] == min(e['total'] for e in calendar)
+        assert all(e['total'] == e['flight_price'] + e['hotel_price_per_night'] * e['nights'] for e in calendar)
+    
+    def test_matches_exact_date_search(self):
+        """Test calendar cells agree with pricing each date pair separately"""
+        result = search_price_calendar("Paris", "2024-08-10", self.context, flex_days=2, min_nights=2, max_nights=5)
+        flights = inventory.get_flight_inventory("Paris")
+        hotels = inventory.get_hotel_inventory("Paris")
+        
+        for entry in result['calendar'][::4]:
+            depart = inventory.parse_date(entry['depart_date'])
+            return_ = inventory.parse_date(entry['return_date'])
+            assert entry['flight_price'] == flights.prices(depart, return_).min()
+            assert abs(entry['hotel_price_per_night'] - hotels.nightly_prices(depart, return_).min()) <= 1
+    
+    def test_budget_and_rating(self):
+        """Test budget flags and the hotel rating filter"""
+        result = search_price_calendar("London", "2024-09-01", self.context, flex_days=1, min_nights=3, max_nights=3,
+                                       budget=100, min_rating=4.8)
+        hotels = inventory.get_hotel_inventory("London")
+        
+        assert result['cheapest'] is None
+        assert not any(e['within_budget'] for e in result['calendar'])
+        for entry in result['calendar']:
+            row = int(entry['hotel_id'].rsplit('-', 1)[1]) - 1
+            assert hotels.rating[row] >= 4.8 - 1e-4
+
+class TestBundleOptimizer:
+    """Test suite for the flight + hotel bundle optimizer"""
+    
+    def setup_method(self):
+        """Build large random option lists"""
+        rng = inventory.np.random.default_rng(7)
+        self.flights = [
+            {'price': int(p), 'stops': int(s), 'duration': f"{m // 60}h {m % 60}m"}
+            for p, s, m in zip(rng.integers(300, 1200, 1500), rng.integers(0, 3, 1500), rng.integers(400, 1200, 1500))
+        ]
+        self.hotels = [
+            {'price_per_night': int(p), 'rating': round(float(r), 1), 'distance_to_center_km': round(float(d), 1)}
+            for p, r, d in zip(rng.integers(30, 400, 1500), rng.uniform(3.5, 5.0, 1500), rng.uniform(0.2, 9, 1500))
+        ]
+    
+    def brute_force(self, nights, budget, k):
+        """Reference answer: score every combination"""
+        scored = []
+        for n in nights:
+            for f in self.flights[:100]:
+                for h in self.hotels[:100]:
+                    total = f['price'] + h['price_per_night'] * n
+                    if total <= budget:
+                        scored.append(optimize_bundles([f], [h], [n], budget, k=1)[0]['utility'])
+        return sorted(scored, reverse=True)[:k]
+    
+    def test_matches_brute_force(self):
+        """Test pruning returns the same top-k utilities as scoring every bundle"""
+        bundles = optimize_bundles(self.flights[:100], self.hotels[:100], [4, 6], 2000, k=5)
+        
+        assert [b['utility'] for b in bundles] == self.brute_force([4, 6], 2000, 5)
+        assert all(b['total_cost'] <= 2000 for b in bundles)
+        assert all(b['total_cost'] == b['flight']['price'] + b['hotel']['price_per_night'] * b['nights'] for b in bundles)
+    
+    def test_large_inputs(self):
+        """Test thousands of options per side stay within budget and sorted"""
+        bundles = optimize_bundles(self.flights, self.hotels, range(3, 8), 1500, k=10)
+        utilities = [b['utility'] for b in bundles]
+        
+        assert len(bundles) == 10
+        assert utilities == sorted(utilities, reverse=True)
+        assert all(b['total_cost'] <= 1500 for b in bundles)
+    
+    def test_no_bundle_fits(self):
+        """Test an impossible budget returns nothing"""
+        assert optimize_bundles(self.flights, self.hotels, [5], 100) == []
+    
+    def test_duration_parsing(self):
+        """Test flight duration strings"""
+        assert duration_minutes("12h 5m") == 725
+        assert duration_minutes("45m") == 45
+        assert duration_minutes(None) is None
+    
+    def test_aggregator_uses_budget_and_nights(self):
+        """Test the aggregator prices the parsed trip length against the budget"""
+        context = MockToolContext("test_user", "test_session")
+        flights = {'flights': [{'price': 900}, {'price': 500, 'stops': 2}], 'destination': 'Tokyo'}
+        hotels = {'hotels': [{'price_per_night': 100, 'rating': 4.8}, {'price_per_night': 60, 'rating': 3.6}]}
+        
+        result = aggregate_travel_results_ultimate(flights, hotels, {}, context, budget=1000, nights=7)
+        over = aggregate_travel_results_ultimate(flights, hotels, {}, context, budget=600, nights=7)
+        
+        assert result['budget_analysis']['nights'] == 7
+        assert result['budget_analysis']['total_estimated_cost'] <= 1000
+        assert result['budget_analysis']['within_budget']
+        assert not over['budget_analysis']['within_budget']
+        assert over['budget_analysis']['total_estimated_cost'] > 600
+
+class TestIncrementalAggregation:
+    """Test suite for memoized re-aggregation"""
+    
+    def setup_method(self):
+        self.context = MockToolContext("incremental_user", "incremental_session")
+        self.flights = search_flights_ultimate("Tokyo", "2025-09-01", "2025-09-06", self.context)
+        self.hotels = find_hotels_ultimate("Tokyo", "2025-09-01", "2025-09-06", 150, 2, self.context)
+        self.rated_hotels = find_hotels_ultimate("Tokyo", "2025-09-01", "2025-09-06", 150, 2, self.context, min_rating=4.5)
+        get_aggregation_memo().invalidate()
+    
+    def aggregate(self, hotels=None, budget=3000, **kwargs):
+        return aggregate_travel_results_ultimate(self.flights, hotels or self.hotels, {}, self.context,
+                                                 budget=budget, nights=5, **kwargs)
+    
+    def test_unchanged_inputs_reuse_everything(self):
+        """Test repeating an aggregation recomputes and resaves nothing"""
+        first = self.aggregate()
+        second = self.aggregate()
+        
+        assert set(first['aggregation']['recomputed']) == {'flights', 'hotels', 'budget_analysis', 'saved'}
+        assert second['aggregation']['recomputed'] == []
+        assert second['budget_analysis'] == first['budget_analysis']
+        assert second['bundles'] == first['bundles']
+    
+    def test_only_changed_parts_recomputed(self):
+        """Test a new hotel search or budget only recomputes what depends on it"""
+        self.aggregate()
+        
+        new_hotels = self.aggregate(hotels=self.rated_hotels)
+        assert new_hotels['aggregation']['recomputed'] == ['hotels', 'budget_analysis', 'saved']
+        
+        new_budget = self.aggregate(hotels=self.rated_hotels, budget=2500)
+        assert new_budget['aggregation']['recomputed'] == ['budget_analysis', 'saved']
+        assert new_budget['budget_analysis']['budget'] == 2500
+        
+        full = self.aggregate(hotels=self.rated_hotels, budget=2500, incremental=False)
+        assert full['budget_analysis'] == new_budget['budget_analysis']
+        assert len(full['aggregation']['recomputed']) == 4
+    
+    def test_same_prices_for_more_guests_recomputed(self):
+        """Test options that differ beyond id and price are not taken as unchanged"""
+        self.aggregate()
+        family = find_hotels_ultimate("Tokyo", "2025-09-01", "2025-09-06", 150, 4, self.context)
+        
+        result = self.aggregate(hotels=family)
+        assert result['aggregation']['recomputed'] == ['hotels', 'budget_analysis', 'saved']
+        assert result['hotels']['recommended']['room_types'][0]['max_guests'] == 4
+    
+    def test_saved_preferences_reloaded(self):
+        """Test saving preferences makes the next aggregation reload them"""
+        self.aggregate()
+        self.context.travel_style = 'luxury'
+        save_user_preferences_ultimate("incremental_user", self.context)
+        
+        result = self.aggregate()
+        assert result['aggregation']['recomputed'] == ['saved']
+        assert result['user_preferences']['travel_style'] == 'luxury'
+    
+    def test_preferences_written_directly_are_reloaded(self):
+        """Test preferences saved or deleted outside the tools invalidate the memo"""
+        from utils.memory import save_memory, delete_memory
+        self.aggregate()
+        save_memory('travel_preferences', {'travel_style': 'backpacker'}, 'incremental_user')
+        assert self.aggregate()['user_preferences'] == {'travel_style': 'backpacker'}
+
+        delete_memory('travel_preferences', 'incremental_user')
+        result = self.aggregate()
+        assert result['aggregation']['recomputed'] == ['saved']
+        assert result['user_preferences'] is None
+
+    def test_plan_resaved_when_stored_plan_changed(self):
+        """Test the plan is saved again once another session or expiry replaced it"""
+        from utils.memory import load_memory, delete_memory
+        mine = self.aggregate()
+        aggregate_travel_results_ultimate(self.flights, self.rated_hotels, {},
+                                          MockToolContext("incremental_user", "other_session"),
+                                          budget=3000, nights=5)
+
+        again = self.aggregate()
+        assert again['aggregation']['recomputed'] == ['saved']
+        stored = load_memory('aggregated_results', 'incremental_user')
+        assert stored['plan_fingerprint'] == mine['plan_fingerprint']
+
+        delete_memory('aggregated_results', 'incremental_user')
+        assert self.aggregate()['aggregation']['recomputed'] == ['saved']
+        assert self.aggregate()['aggregation']['recomputed'] == []
+
+    def test_sessions_are_separate(self):
+        """Test another session does not reuse this session's results"""
+        self.aggregate()
+        other = aggregate_travel_results_ultimate(self.flights, self.hotels, {},
+                                                  MockToolContext("incremental_user", "other_session"),
+                                                  budget=3000, nights=5)
+        
+        assert len(other['aggregation']['recomputed']) == 4
+
+class TestInventory:
+    """Test suite for the synthetic inventory"""
+    
+    def setup_method(self):
+        """Start from an empty inventory"""
+        inventory.reset_inventory()
+    
+    def test_columnar_inventory_for_catalog(self):
+        """Test every catalog destination gets production-sized columns"""
+        flights = inventory.get_flight_inventory("Tokyo")
+        hotels = inventory.get_hotel_inventory("Tokyo")
+        
+        assert len(flights) == inventory.INVENTORY_CONFIG["flights_per_route"]
+        assert len(hotels) == inventory.INVENTORY_CONFIG["hotels_per_city"]
+        assert set(inventory.DESTINATIONS) <= set(inventory._FLIGHTS)
+        assert flights.stops.min() >= 0 and flights.stops.max() <= 2
+        assert hotels.rating.min() >= 3.5 and hotels.rating.max() <= 5.0
+    
+    def test_deterministic(self):
+        """Test the same seed rebuilds the same inventory"""
+        first = inventory.get_flight_inventory("Reykjavik").base_price.copy()
+        inventory.reset_inventory()
+        second = inventory.get_flight_inventory("Reykjavik").base_price
+        
+        assert (first == second).all()
+    
+    def test_prices_depend_on_dates(self):
+        """Test seasonal and weekend pricing"""
+        flights = inventory.get_flight_inventory("Tokyo")
+        summer = flights.prices(inventory.parse_date("2024-07-03"), inventory.parse_date("2024-07-10"))
+        winter = flights.prices(inventory.parse_date("2024-01-10"), inventory.parse_date("2024-01-17"))
+        
+        assert summer.mean() > winter.mean()
+    
+    def test_cheapest(self):
+        """Test top-k selection with and without a mask"""
+        prices = inventory.np.array([5, 3, 9, 1, 7])
+        
+        assert list(inventory.cheapest(prices, 3)) == [3, 1, 0]
+        assert list(inventory.cheapest(prices, 2, prices > 4)) == [0, 4]
+        assert len(inventory.cheapest(prices, 0)) == 0
+
+    def test_destination_keys_are_normalized(self):
+        """Test spacing and case variants share one cached inventory"""
+        assert inventory.get_flight_inventory("Paris ") is inventory.get_flight_inventory("  paris")
+        assert inventory.get_hotel_inventory("new  york") is inventory.get_hotel_inventory("New York")
+
+    def test_caches_are_bounded(self, monkeypatch):
+        """Test the least recently used destinations are dropped past the bound"""
+        monkeypatch.setattr(inventory._FLIGHTS, 'max_entries', 2)
+        monkeypatch.setattr(inventory._HOTELS, 'max_entries', 2)
+        inventory.build_inventory(["Oslo", "Lima", "Quito"])
+
+        assert list(inventory._FLIGHTS) == list(inventory._HOTELS) == ["lima", "quito"]
+        assert inventory.get_flight_inventory("Oslo").destination == "Oslo"
+        assert "lima" not in inventory._FLIGHTS
+
+    def test_inventory_independent_of_build_set(self):
+        """Test a destination rebuilt alone, e.g. after eviction, is generated the same"""
+        inventory.build_inventory()
+        tokyo = inventory.get_flight_inventory("Tokyo").base_price.copy()
+        oslo = inventory.get_hotel_inventory("Oslo").base_price.copy()
+        inventory.reset_inventory()
+        inventory.build_inventory(["Oslo", "Tokyo"])
+
+        assert np.array_equal(inventory.get_flight_inventory("Tokyo").base_price, tokyo)
+        assert np.array_equal(inventory.get_hotel_inventory("Oslo").base_price, oslo)
+
+class TestRecords:
+    """Test suite for the compact flight and hotel records"""
+    
+    def setup_method(self):
+        flights = inventory.get_flight_inventory("Tokyo")
+        depart = inventory.parse_date("2025-06-01")
+        prices = flights.prices(depart, inventory.parse_date("2025-06-06"))
+        self.flights = [flights.record(i, prices[i], depart) for i in range(50)]
+        self.hotels = [inventory.get_hotel_inventory("Tokyo").record(i, 100, 2) for i in range(50)]
+    
+    def test_reads_like_result_dict(self):
+        """Test records expose the tool result keys, nested parts included"""
+        flight, hotel = self.flights[0], self.hotels[0]
+        
+        assert flight['id'] == 'FL-TOKYO-1'
+        assert flight['fare']['amount'] == flight['price']
+        assert duration_minutes(flight['duration']) == flight['duration_min']
+        assert flight['departure']['datetime'].startswith('2025-06-01T')
+        assert hotel['room_types'][0]['max_guests'] == 2
+        assert hotel['price_per_night'] == 100
+        assert dict(hotel) == hotel.to_dict()
+        assert json.loads(json.dumps(flight, default=json_default)) == json.loads(json.dumps(flight.to_dict()))
+    
+    def test_compact_and_read_only(self):
+        """Test records have no instance dict, share strings and cannot be changed"""
+        flight = self.flights[0]
+        
+        assert not hasattr(flight, '__dict__')
+        assert len({id(f.airline) for f in self.flights}) <= len(inventory.AIRLINES)
+        assert len({id(h.amenities) for h in self.hotels}) < len(self.hotels)
+        with pytest.raises(TypeError):
+            flight.price = 1
+        cheaper = flight._replace(price=flight.price - 10)
+        assert cheaper['fare']['amount'] == flight.price - 10 and cheaper['id'] == flight['id']
+    
+    def test_smaller_than_dicts(self):
+        """Test a result set of records takes a fraction of the memory of dicts"""
+        tracemalloc.start()
+        records = [self.flights[i % 50]._replace(index=i) for i in range(500)]
+        record_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        tracemalloc.start()
+        dicts = [record.to_dict() for record in records]
+        dict_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        
+        assert record_bytes * 3 < dict_bytes
+        assert len(dicts) == 500
+    
+    def test_snapshot_and_codecs(self):
+        """Test memory snapshots keep records and every codec round-trips them as dicts"""
+        result = {'flights': self.flights[:3]}
+        frozen, size = snapshot(result)
+        
+        assert frozen['flights'][0] is self.flights[0]
+        assert size == snapshot({'flights': [f.to_dict() for f in self.flights[:3]]})[1]
+        assert codecs.decode(codecs.encode(result, 'json'))['flights'][0] == json.loads(json.dumps(self.flights[0].to_dict()))
+        assert codecs.decode(codecs.encode(result, 'pickle'))['flights'][0] == self.flights[0]
+    
+    def test_invalid_date_falls_back(self):
+        """Test unparseable dates do not break a search"""
+        assert inventory.parse_date("next week") is not None
+
+class TestHotelIndex:
+    """Test suite for the per-city hotel index"""
+    
+    def setup_method(self):
+        """Index one city and fix the stay"""
+        self.hotels = inventory.get_hotel_inventory("Paris")
+        self.index = HotelIndex(self.hotels)
+        self.checkin = inventory.parse_date("2024-07-05")
+        self.checkout = inventory.parse_date("2024-07-09")
+        self.prices = self.hotels.nightly_prices(self.checkin, self.checkout)
+    
+    def brute_force(self, max_price=None, min_rating=None, amenities=0, max_distance_km=None):
+        """Reference answer: scan every hotel"""
+        mask = inventory.np.ones(len(self.hotels), dtype=bool)
+        if max_price is not None:
+            mask &= self.prices <= max_price
+        if min_rating is not None:
+            mask &= self.hotels.rating >= min_rating - 1e-4
+        if max_distance_km is not None:
+            mask &= self.hotels.distance_km <= max_distance_km + 1e-4
+        mask &= (self.hotels.amenities & amenities) == amenities
+        return inventory.np.flatnonzero(mask)
+    
+    @pytest.mark.parametrize("filters", [
+        {},
+        {'max_price': 90},
+        {'max_price': 120, 'min_rating': 4.5},
+        {'amenities': ['Pool', 'Gym'], 'max_distance_km': 2.0},
+        {'max_price': 100, 'min_rating': 4.0, 'amenities': ['Spa'], 'max_distance_km': 3.0},
+        {'max_price': 10}
+    ])
+    def test_price_ranking_matches_full_scan(self, filters):
+        """Test top-k cheapest matches a brute-force scan"""
+        mask = amenity_mask(filters.pop('amenities', None))
+        result = self.index.query(self.checkin, self.checkout, amenities=mask, limit=10, **filters)
+        expected = self.brute_force(amenities=mask, **filters)
+        expected = sorted(expected, key=lambda i: (self.prices[i], i))[:10]
+        
+        assert [i for i, _ in result] == list(expected)
+        assert [p for _, p in result] == [self.prices[i] for i in expected]
+    
+    def test_rating_and_distance_ranking(self):
+        """Test best-rated and closest orderings respect the filters"""
+        by_rating = self.index.query(self.checkin, self.checkout, max_price=100, sort_by='rating', limit=5)
+        by_distance = self.index.query(self.checkin, self.checkout, min_rating=4.5, sort_by='distance', limit=5)
+        ratings = [self.hotels.rating[i] for i, _ in by_rating]
+        distances = [self.hotels.distance_km[i] for i, _ in by_distance]
+        
+        assert ratings == sorted(ratings, reverse=True)
+        assert ratings[0] == self.hotels.rating[self.brute_force(max_price=100)].max()
+        assert distances == sorted(distances)
+        assert all(self.hotels.rating[i] >= 4.5 - 1e-4 for i, _ in by_distance)
+    
+    def test_invalid_sort(self):
+        """Test unknown sort keys are rejected"""
+        with pytest.raises(ValueError):
+            self.index.query(self.checkin, self.checkout, sort_by='stars')
+    
+    def test_tool_filters(self):
+        """Test the hotel tool passes filters through to the index"""
+        context = MockToolContext("test_user", "test_session")
+        result = find_hotels_ultimate("Paris", "2024-07-05", "2024-07-09", 150.0, 2, context,
+                                      min_rating=4.2, amenities=['pool', 'Gym'], max_distance_km=3)
+        
+        assert len(result['hotels']) > 0
+        for hotel in result['hotels']:
+            assert hotel['rating'] >= 4.2
+            assert {'Pool', 'Gym'} <= set(hotel['amenities'])
+            assert hotel['distance_to_center_km'] <= 3
+            assert hotel['price_per_night'] <= 180
+
+class TestGeo:
+    """Test suite for the geospatial index of hotels and points of interest"""
+    
+    def setup_method(self):
+        """Index one city's hotels"""
+        self.hotels = inventory.get_hotel_inventory("London")
+        self.index = GridIndex(self.hotels.lat, self.hotels.lon, cell_km=0.5)
+        self.np = inventory.np
+    
+    def test_haversine(self):
+        """Test known distances and broadcasting"""
+        paris, london = (48.8566, 2.3522), (51.5074, -0.1278)
+        assert abs(float(haversine_km(*paris, *london)) - 343.5) < 1.0
+        matrix = haversine_km(self.np.array([[0.0], [10.0]]), 0.0, self.np.array([[0.0, 1.0]]), 0.0)
+        assert matrix.shape == (2, 2)
+        assert abs(matrix[0, 1] - 111.2) < 0.1
+    
+    @pytest.mark.parametrize("radius_km", [0.2, 1.0, 3.5, 50.0])
+    def test_radius_matches_brute_force(self, radius_km):
+        """Test radius queries return exactly the hotels within the radius, closest first"""
+        lat, lon = 51.5194, -0.1270
+        distances = haversine_km(lat, lon, self.hotels.lat, self.hotels.lon)
+        positions, found = self.index.within(lat, lon, radius_km)
+        
+        assert set(positions.tolist()) == set(self.np.flatnonzero(distances <= radius_km).tolist())
+        assert list(found) == sorted(found)
+    
+    @pytest.mark.parametrize("k", [1, 7, 40, 5000])
+    def test_nearest_matches_brute_force(self, k):
+        """Test k-nearest queries agree with sorting every distance"""
+        lat, lon = 51.47, -0.45
+        distances = haversine_km(lat, lon, self.hotels.lat, self.hotels.lon)
+        positions, found = self.index.nearest(lat, lon, k)
+        
+        assert len(positions) == min(k, len(self.hotels))
+        assert self.np.allclose(found, self.np.sort(distances)[:len(positions)])
+    
+    def test_proximity_scores_chunked(self):
+        """Test chunked scoring matches the weighted mean of the full matrix"""
+        poi_lat, poi_lon = [51.5007, 51.5081], [-0.1246, -0.0759]
+        mean, distances = proximity_scores(self.hotels.lat, self.hotels.lon, poi_lat, poi_lon, weights=[3, 1], chunk=333)
+        full = haversine_km(self.hotels.lat[:, None], self.hotels.lon[:, None], self.np.array(poi_lat), self.np.array(poi_lon))
+        
+        assert self.np.allclose(distances, full)
+        assert self.np.allclose(mean, full @ self.np.array([0.75, 0.25]))
+    
+    def test_poi_catalog(self):
+        """Test catalogs are deterministic and include the city's landmarks"""
+        catalog = get_poi_catalog("London")
+        
+        assert catalog.find("big ben") == catalog.find("Big Ben") is not None
+        assert catalog.find("Tower") is not None
+        assert catalog.find("Atlantis") is None
+        assert catalog is get_poi_catalog("london")
+        with pytest.raises(ValueError):
+            catalog.category_mask("casino")
+    
+    def test_find_hotels_near(self):
+        """Test hotels are ranked by mean distance to the attractions"""
+        context = MockToolContext("geo_user", "geo_session")
+        result = find_hotels_near("London", "2024-07-05", "2024-07-09", 400.0, 2, context,
+                                  attractions=["British Museum", "Tower of London", "Mordor"], radius_km=2.0, limit=5)
+        means = [p['mean_distance_km'] for p in result['proximity']]
+        
+        assert result['unknown_attractions'] == ["Mordor"]
+        assert len(result['hotels']) == 5
+        assert means == sorted(means)
+        assert [p['hotel_id'] for p in result['proximity']] == [h['id'] for h in result['hotels']]
+        for proximity in result['proximity']:
+            assert min(proximity['distances_km'].values()) <= 2.0 + 0.01
+        assert all(h['price_per_night'] <= 480 for h in result['hotels'])
+    
+    def test_find_attractions(self):
+        """Test attractions near a landmark or a hotel, by radius, count and category"""
+        context = MockToolContext("geo_user", "geo_session")
+        nearest = find_attractions("London", context, near="Big Ben", k=5, category="museum")
+        around = find_attractions("London", context, near="HT-LONDON-1", radius_km=1.0)
+        
+        assert len(nearest['attractions']) == 5
+        assert all(a['category'] == 'museum' for a in nearest['attractions'])
+        assert nearest['origin']['name'] == "Big Ben"
+        assert around['origin']['location']['lat'] == round(float(self.hotels.lat[0]), 5)
+        assert all(a['distance_km'] <= 1.0 for a in around['attractions'])
+
 if __name__ == "__main__":
     pytest.main([__file__])
\ No newline at end of file